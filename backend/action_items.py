@@ -0,0 +1,181 @@
+# backend/action_items.py
+import os
+import re
+import json
+import bisect
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from telemetry import log
+
+# Trigger words marking a sentence as an action item / decision. Matched at
+# word starts, so "assign" also covers "assigned" / "assignment".
+DEFAULT_KEYWORDS = [
+    "action", "target date", "due", "deadline", "assign", "responsible",
+    "will do", "to do", "task", "deliver", "deliverable", "complete by",
+]
+# Extra comma-separated keywords for every organization
+ACTION_KEYWORDS = os.getenv("ACTION_KEYWORDS", "")
+# JSON file {"<organization>": ["keyword", ...], ...}; "default" replaces DEFAULT_KEYWORDS
+ACTION_KEYWORDS_FILE = os.getenv("ACTION_KEYWORDS_FILE", "")
+
+# One pass over the text: sentence ends (not after common abbreviations)
+# and line breaks. The punctuation class comes first so the abbreviation
+# lookbehinds only run at candidate positions.
+_SENTENCE_END = re.compile(
+    r"[.!?।॥\n](?<!\bMr\.)(?<!\bMrs\.)(?<!\bMs\.)(?<!\bDr\.)(?<!\bSt\.)(?<!\bvs\.)(?<!\bNo\.)"
+    r"(?<!\be\.g\.)(?<!\bi\.e\.)[.!?।॥]*[\"'”’)\]]*\s+"
+)
+
+_NAME = r"[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?"
+_OWNER_VERBS = r"will|shall|should|must|is\s+to|needs\s+to|has\s+to|is\s+responsible|agreed\s+to|takes|owns"
+_OWNER_PATTERNS = [
+    re.compile(rf"\b(?i:assigned\s+to|owner\s*:|responsible\s*:|action\s*:|handled\s+by)\s*(?P<owner>{_NAME})"),
+    # "assign the budget review to Priya"
+    re.compile(rf"\b(?i:assign(?:s|ed|ing)?)\s+(?:[\w'-]+\s+){{0,6}}?to\s+(?P<owner>{_NAME})"),
+    # mid-sentence capitals are mostly names: "... and Priya to send it"
+    re.compile(rf"[\s,:;(](?P<owner>{_NAME})\s+(?:to|{_OWNER_VERBS})\b"),
+    # every sentence starts with a capital: only take it before an owner verb
+    # ("Priya will send it"), never before a bare "to" ("Remember to ...")
+    re.compile(rf"^\s*(?P<owner>{_NAME})\s+(?:{_OWNER_VERBS})\b"),
+    re.compile(r"@(?P<owner>\w+)"),
+]
+# Capitalized words that are not people
+_NOT_OWNERS = {
+    "i", "we", "you", "he", "she", "they", "it", "this", "that", "these", "those", "there",
+    "the", "a", "an", "all", "everyone", "team", "please", "action", "decision", "task",
+    "next", "also", "then", "so", "and", "but", "if", "someone", "somebody", "nobody",
+    # imperatives that open a sentence
+    "remember", "make", "ensure", "let", "send", "share", "check", "follow", "update", "review",
+    "schedule", "prepare", "confirm", "circulate", "set", "get", "keep", "try", "note", "assign",
+    "submit", "complete", "finish", "plan", "book", "call", "email", "contact", "ask", "tell",
+}
+
+_WEEKDAY = r"(?:mon|tues|wednes|thurs|fri|satur|sun)day"
+_MONTH = (r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|"
+          r"sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)")
+_DATE = (
+    rf"(?:\d{{4}}-\d{{2}}-\d{{2}}"
+    rf"|\d{{1,2}}[/.-]\d{{1,2}}(?:[/.-]\d{{2,4}})?"
+    rf"|\d{{1,2}}(?:st|nd|rd|th)?\s+(?:of\s+)?{_MONTH}\.?(?:,?\s+\d{{4}})?"
+    rf"|{_MONTH}\.?\s+\d{{1,2}}(?:st|nd|rd|th)?(?:,?\s+\d{{4}})?"
+    rf"|(?:this|next|coming)?\s*{_WEEKDAY}"
+    rf"|today|tonight|tomorrow|eod|eow|eom"
+    rf"|(?:the\s+)?end\s+of\s+(?:the\s+|this\s+|next\s+)?(?:day|week|month|quarter|year|{_MONTH})"
+    rf"|next\s+(?:week|month|quarter|year)"
+    rf"|(?:the\s+)?(?:first|second|third|last)\s+week\s+of\s+(?:the\s+|next\s+)?(?:month|{_MONTH}))"
+)
+_DUE = re.compile(rf"\b(?:by|before|due(?:\s+on|\s+by)?|deadline(?:\s+is)?|target\s+date(?:\s+is)?|"
+                  rf"no\s+later\s+than|until|on)\s*:?\s*(?P<due>{_DATE})\b", re.IGNORECASE)
+
+
+def sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """
+    (start, end) offsets of the sentences in text, from a single regex pass.
+    """
+    spans = []
+    pos = 0
+    for m in _SENTENCE_END.finditer(text):
+        end = m.start() + len(m.group().rstrip())
+        if text[pos:end].strip():
+            spans.append((pos, end))
+        pos = m.end()
+    if text[pos:].strip():
+        spans.append((pos, len(text)))
+    return spans
+
+
+def split_sentences(text: str) -> List[str]:
+    return [text[s:e].strip() for s, e in sentence_spans(text or "")]
+
+
+def _keyword_pattern(keywords: List[str]) -> "re.Pattern":
+    words = sorted({k.strip().lower() for k in keywords if k.strip()}, key=len, reverse=True)
+    alternation = "|".join(r"\s+".join(map(re.escape, k.split())) for k in words)
+    return re.compile(rf"\b(?:{alternation})", re.IGNORECASE)
+
+
+class ActionItemExtractor:
+    """
+    Finds action-item sentences with one compiled trigger regex run over the
+    whole text (each hit is mapped to its sentence by offset), then pulls
+    an owner and a due date out of each matching sentence.
+    """
+
+    def __init__(self, keywords: Optional[List[str]] = None):
+        self.keywords = list(keywords or DEFAULT_KEYWORDS)
+        self._triggers = _keyword_pattern(self.keywords)
+
+    @staticmethod
+    def owner(sentence: str) -> Optional[str]:
+        for pattern in _OWNER_PATTERNS:
+            for m in pattern.finditer(sentence):
+                name = m.group("owner").strip()
+                if name.split()[0].lower() not in _NOT_OWNERS:
+                    return name
+        return None
+
+    @staticmethod
+    def due(sentence: str) -> Optional[str]:
+        m = _DUE.search(sentence)
+        return " ".join(m.group("due").split()) if m else None
+
+    def extract(self, text: str, spans: Optional[List[Tuple[int, int]]] = None) -> List[Dict]:
+        """
+        [{"text", "owner", "due", "trigger"}] in document order, one per sentence.
+        """
+        if not text:
+            return []
+        if spans is None:
+            spans = sentence_spans(text)
+        starts = [s for s, _ in spans]
+        items, seen = [], set()
+        for m in self._triggers.finditer(text):
+            i = bisect.bisect_right(starts, m.start()) - 1
+            if i < 0 or i in seen or m.start() >= spans[i][1]:
+                continue
+            seen.add(i)
+            sentence = text[spans[i][0]:spans[i][1]].strip()
+            items.append({
+                "text": sentence,
+                "owner": self.owner(sentence),
+                "due": self.due(sentence),
+                "trigger": m.group().lower(),
+            })
+        return items
+
+
+def _load_keyword_sets() -> Dict[str, List[str]]:
+    sets: Dict[str, List[str]] = {}
+    if ACTION_KEYWORDS_FILE:
+        try:
+            with open(ACTION_KEYWORDS_FILE, encoding="utf-8") as f:
+                sets = {str(k).lower(): list(v) for k, v in json.load(f).items()}
+        except Exception as e:
+            log(f"[Action keywords error] {ACTION_KEYWORDS_FILE}: {e}")
+    extra = [k for k in ACTION_KEYWORDS.split(",") if k.strip()]
+    base = sets.get("default", DEFAULT_KEYWORDS)
+    return {org: (words if org == "default" else base + words) + extra
+            for org, words in dict(sets, default=base).items()}
+
+
+_extractors: Dict[str, ActionItemExtractor] = {}
+_extractors_lock = threading.Lock()
+_keyword_sets = None
+
+
+def get_extractor(organization: Optional[str] = None) -> ActionItemExtractor:
+    """
+    Compiled extractor for an organization's keyword set (DEFAULT_KEYWORDS
+    plus ACTION_KEYWORDS for unknown or missing organizations).
+    """
+    global _keyword_sets
+    org = (organization or "default").lower()
+    with _extractors_lock:
+        if _keyword_sets is None:
+            _keyword_sets = _load_keyword_sets()
+        if org not in _keyword_sets:
+            org = "default"
+        if org not in _extractors:
+            _extractors[org] = ActionItemExtractor(_keyword_sets[org])
+        return _extractors[org]
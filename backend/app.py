@@ -1,16 +1,31 @@
 import eventlet
 eventlet.monkey_patch()  
+from eventlet import tpool
 import os
 import json
+import uuid
 import base64
-import tempfile
-from flask import Flask, request, jsonify, send_from_directory
+import time
+import threading
+from flask import Flask, Response, g, request, jsonify, send_from_directory
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit
+from werkzeug.utils import secure_filename
+from flask_socketio import SocketIO, emit, join_room
 from flask_bcrypt import Bcrypt
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
-from docx import Document
-import whisper
+from flask_jwt_extended import JWTManager, create_access_token, decode_token, get_jwt, get_jwt_identity, jwt_required
+from docx_render import render_mom_docx
+from jobs import QUEUE_RETRY_AFTER_SECONDS, JobQueue, QueueFull, transcribe_prefix_job
+from chunked_upload import MAX_CHUNK_BYTES, PREFIX_GUARD_SECONDS, UploadError, UploadManager
+from models import WHISPER_MODEL, registry, warmup
+from streaming import LiveInbox, StreamingTranscriber
+from live_mom import LiveMomSession
+from transcript_cache import get_cache
+from transcribe import get_asr, transcript_cache_key
+from pdf_service import get_pdf_service
+import storage
+from user_store import get_user_store
+from archive import get_archive
+from telemetry import in_context, log, metrics, new_request_id, reset_request_id, set_request_id, span
 
 #  Initialize Flask App 
 app = Flask(__name__)
@@ -22,16 +37,89 @@ app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY", "super-secret-key")
 bcrypt = Bcrypt(app)
 jwt = JWTManager(app)
 
-UPLOAD_DIR = "uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+# Transcription worker pool (each worker process holds its own Whisper model)
+TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", "2"))
 
-users = {}
 
 
-#  Load Whisper Model 
-print("Loading Whisper 'base' model... (10–60 seconds)")
-model = whisper.load_model("base")
-print("Whisper model loaded successfully!")
+#  Accounts and sessions live in SQLite (user_store.py) so any worker can
+#  serve any request. bcrypt is CPU-bound: it runs on eventlet's thread pool.
+@jwt.token_in_blocklist_loader
+def _token_revoked(jwt_header, jwt_payload):
+    return not get_user_store().session_active(jwt_payload["jti"])
+
+
+_dummy_hash = None
+
+
+def _check_password(stored_hash, password):
+    global _dummy_hash
+    if stored_hash is None:
+        # unknown user: spend the same time as a real check
+        if _dummy_hash is None:
+            _dummy_hash = tpool.execute(bcrypt.generate_password_hash, "dummy-password").decode("utf-8")
+        tpool.execute(bcrypt.check_password_hash, _dummy_hash, password)
+        return False
+    return tpool.execute(bcrypt.check_password_hash, stored_hash, password)
+
+
+#  Request ids: taken from X-Request-ID or generated, bound to every log
+#  line and span of the request (and of the jobs it submits).
+@app.before_request
+def _start_request():
+    g.request_started = time.perf_counter()
+    g.request_id = request.headers.get("X-Request-ID") or new_request_id()
+    g.request_token = set_request_id(g.request_id)
+
+
+@app.after_request
+def _finish_request(response):
+    started = g.get("request_started")
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        metrics.observe("mom_http_request_seconds", time.perf_counter() - started,
+                        route=route, method=request.method, status=response.status_code)
+    if g.get("request_id"):
+        response.headers["X-Request-ID"] = g.request_id
+    return response
+
+
+@app.teardown_request
+def _end_request(exc=None):
+    token = g.pop("request_token", None)
+    if token is not None:
+        reset_request_id(token)
+
+
+def _bind_socket_request():
+    # Socket.IO events bypass before_request: tag them by connection
+    set_request_id(f"live-{request.sid[:8]}")
+
+
+#  Models are loaded lazily through the shared registry (see models.py);
+#  set MODEL_WARMUP to preload them at startup.
+
+
+def _push_job_update(job):
+    payload = {k: job.get(k) for k in ("id", "status", "progress", "error")}
+    if job.get("status") == "done":
+        payload["result"] = job.get("result")
+    socketio.emit("job_progress", payload, to=job["id"])
+
+
+job_queue = None
+
+
+def get_job_queue():
+    """
+    Create the worker pool on first use (never at import time, so spawned
+    worker processes that re-import this module don't start their own pool).
+    """
+    global job_queue
+    if job_queue is None:
+        job_queue = JobQueue(TRANSCRIBE_WORKERS, WHISPER_MODEL, on_update=_push_job_update)
+        socketio.start_background_task(job_queue.run_forever, socketio.sleep)
+    return job_queue
 
 @app.route("/api/register", methods=["POST"])
 def register():
@@ -45,18 +133,20 @@ def register():
             return jsonify({"error": "All fields are required"}), 400
 
         #  Check if user already exists
-        if username in users:
+        store = get_user_store()
+        if store.get_user(username) is not None:
             return jsonify({"error": "User already exists"}), 400
 
         #  Hash and save
-        hashed_pw = bcrypt.generate_password_hash(password).decode("utf-8")
-        users[username] = hashed_pw
+        hashed_pw = tpool.execute(bcrypt.generate_password_hash, password).decode("utf-8")
+        if not store.create_user(username, hashed_pw):
+            return jsonify({"error": "User already exists"}), 400
 
-        print(f" Registered user: {username}")
+        log(f" Registered user: {username}")
         return jsonify({"message": "User registered successfully"}), 201
 
     except Exception as e:
-        print(f"[Register error] {e}")
+        log(f"[Register error] {e}")
         return jsonify({"error": str(e)}), 500
 
 
@@ -67,89 +157,85 @@ def login():
         username = (data.get("username") or "").strip()
         password = (data.get("password") or "").strip()
 
-        if username not in users:
-            return jsonify({"error": "Invalid username or password"}), 401
-
-        stored_hash = users[username]
-        if not bcrypt.check_password_hash(stored_hash, password):
+        store = get_user_store()
+        user = store.get_user(username)
+        if not _check_password(user["password_hash"] if user else None, password):
             return jsonify({"error": "Invalid username or password"}), 401
 
-        #  Generate JWT Token
+        #  Generate JWT Token and record the session
         access_token = create_access_token(identity=username)
+        claims = decode_token(access_token, allow_expired=True)
+        store.purge_sessions()
+        store.create_session(user["id"], claims["jti"], claims.get("exp") or float("inf"))
         return jsonify({"token": access_token, "username": username}), 200
 
     except Exception as e:
-        print(f"[Login error] {e}")
+        log(f"[Login error] {e}")
         return jsonify({"error": str(e)}), 500
 
 @app.route("/api/profile", methods=["GET"])
 @jwt_required()
 def profile():
-    user = get_jwt_identity()
-    return jsonify({"message": f"Welcome, {user['username']}!"})
+    username = get_jwt_identity()
+    return jsonify({"message": f"Welcome, {username}!"})
 
 
-def create_mom_docx(metadata, transcript, filename):
+@app.route("/api/logout", methods=["POST"])
+@jwt_required()
+def logout():
+    get_user_store().revoke_session(get_jwt()["jti"])
+    return jsonify({"message": "Logged out"}), 200
+
+
+def create_mom_docx(metadata, transcript, filename, segments=None, language=None, meeting_id=None):
     
-    doc = Document()
-
-    doc.add_heading("Minutes of the Meeting", level=1)
-    doc.add_paragraph(f"Meeting Name: {metadata.get('meeting_name', 'N/A')}")
-    doc.add_paragraph(f"Date of Meeting: {metadata.get('date', 'N/A')}\t Time: {metadata.get('time', 'N/A')}")
-    doc.add_paragraph(f"Minutes Prepared By: {metadata.get('minutes_prepared_by', 'N/A')}")
-    doc.add_paragraph(f"Location: {metadata.get('location', 'N/A')}")
-
-    doc.add_paragraph("")  # blank line
-
-    # 1. Meeting Objective
-    doc.add_heading("1. Meeting Objective", level=2)
-    doc.add_paragraph(metadata.get("meeting_objective", "N/A"))
-
-    # 2. Coordinated by
-    doc.add_paragraph("")
-    doc.add_heading("2. Coordinated by", level=2)
-    doc.add_paragraph(metadata.get("coordinated_by", "N/A"))
-
-    # 3. Attendance
-    doc.add_paragraph("")
-    doc.add_heading("3. Attendance at Meeting", level=2)
-    attendees = ", ".join(metadata.get("attendees", [])) or "No attendees provided."
-    doc.add_paragraph(attendees)
-
-    # Summary
-    doc.add_paragraph("")
-    doc.add_heading("Summary", level=2)
+    # Summary / action items: first two lines of the transcript
     summary_lines = transcript.strip().split(". ")
-    summary_points = summary_lines[:2]  # take first two lines
-    for i, s in enumerate(summary_points, 1):
-        doc.add_paragraph(f"{i}. {s.strip()}.")
-
-    # Action Items
-    doc.add_paragraph("")
-    doc.add_heading("Action Items / Decisions", level=2)
-    for i, s in enumerate(summary_points, 1):
-        doc.add_paragraph(f"{i}. {s.strip()}.")
-
-    # Detailed Minutes
-    doc.add_paragraph("")
-    doc.add_heading("Detailed Minutes", level=2)
+    summary_points = [f"{i}. {s.strip()}." for i, s in enumerate(summary_lines[:2], 1)]
+
     # Split transcript into pseudo timestamps
     lines = transcript.strip().split(". ")
-    for i, line in enumerate(lines):
-        doc.add_paragraph(f"[{i*5:.2f}]  - {line.strip()}.")
-
-    # Person-wise Summary 
-    doc.add_paragraph("")
-    doc.add_heading("Person-wise Summary", level=2)
-    doc.add_paragraph("Person1: " + " ".join(lines[:3])[:150] + "...")
-    doc.add_paragraph("Person2: " + " ".join(lines[3:6])[:150] + "...")
-
-    # Save file
-    path = os.path.join(UPLOAD_DIR, filename)
-    doc.save(path)
+    mom_sections = {
+        "meeting_objective": metadata.get("meeting_objective", "N/A"),
+        "summary": summary_points,
+        "action_items": [s.strip() + "." for s in summary_lines[:2]],
+        "detailed_minutes": [{"start": i * 5, "text": f"{line.strip()}."} for i, line in enumerate(lines)],
+    }
+    # Per speaker when the segments carry diarization labels
+    by_speaker = {}
+    for seg in segments or []:
+        if seg.get("speaker"):
+            by_speaker.setdefault(seg["speaker"], []).append(seg.get("text", "").strip())
+    if by_speaker:
+        person_summaries = {sp: " ".join(texts)[:150] + "..." for sp, texts in by_speaker.items()}
+    else:
+        person_summaries = {
+            "Person1": " ".join(lines[:3])[:150] + "...",
+            "Person2": " ".join(lines[3:6])[:150] + "...",
+        }
+
+    # Save file (shared template renderer, see docx_render.py)
+    path = storage.artifact_path(filename)
+    with span("docx"):
+        render_mom_docx(path, metadata, mom_sections, person_summaries, default="N/A", layout="upload")
+
+    # PDF is rendered off-request by the office worker pool
+    get_pdf_service().submit(path, _pdf_name(path))
+
+    # Searchable archive (/api/search); embedding runs off the event loop
+    try:
+        tpool.execute(in_context(get_archive().add_meeting), meeting_id or uuid.uuid4().hex,
+                      metadata, transcript, segments or mom_sections["detailed_minutes"],
+                      mom_sections, person_summaries, language, filename)
+    except Exception as e:
+        log(f"[Archive error] {e}")
     return path
 
 
+def _pdf_name(docx_name):
+    return os.path.splitext(docx_name)[0] + ".pdf"
+
+
 @app.route("/api/upload-audio", methods=["POST"])
 def upload_audio():
 
@@ -160,68 +246,508 @@ def upload_audio():
         file = request.files["file"]
         metadata = json.loads(request.form.get("metadata", "{}"))
 
-        filepath = os.path.join(UPLOAD_DIR, file.filename)
-        file.save(filepath)
-        print(f"🎧 Processing file: {filepath}")
-
         #  Detect text input 
         ext = os.path.splitext(file.filename)[1].lower()
-        transcript = ""
+        filename = secure_filename(f"{os.path.splitext(file.filename)[0]}_MoM.docx")
 
         if ext in [".txt", ".md"]:  
+            filepath = storage.upload_path(file.filename)
+            file.save(filepath)
+            log(f"🎧 Processing file: {filepath}")
             with open(filepath, "r", encoding="utf-8") as f:
                 transcript = f.read().strip()
-            print(" Detected text file, skipping Whisper transcription.")
-        else:
-            # Audio transcription
-            print(" Detected audio file, transcribing with Whisper...")
-            result = model.transcribe(filepath)
-            transcript = result.get("text", "").strip()
-            print(" Transcription complete.")
-
-        filename = f"{os.path.splitext(file.filename)[0]}_MoM.docx"
-        create_mom_docx(metadata, transcript, filename)
-
-        return jsonify({
-            "transcript": transcript,
-            "mom_docx": filename,
-            "person_summaries": {"Summary": transcript[:500] + "..."}
-        })
+            log(" Detected text file, skipping Whisper transcription.")
+            create_mom_docx(metadata, transcript, filename)
+            return jsonify(_mom_response(transcript, filename))
+
+        # Audio: turn away new work while the worker pool's backlog is full
+        if get_job_queue().full():
+            return _queue_full_response()
+
+        # Save under a unique name and hand off to the worker pool
+        job_id = uuid.uuid4().hex
+        filepath = storage.upload_path(file.filename, prefix=job_id)
+        file.save(filepath)
+
+        # Identical recording transcribed before with the same model: answer now
+        with span("cache_lookup") as sp:
+            cache_key = tpool.execute(in_context(transcript_cache_key), filepath)
+            cached = get_cache().get(cache_key)
+            sp["hit"] = cached is not None
+        if cached is not None:
+            transcript, segments, language = cached
+            log(f" Transcript cache hit for {file.filename}, skipping Whisper.")
+            create_mom_docx(metadata, transcript, filename, segments, language, meeting_id=job_id)
+            return jsonify(_mom_response(transcript, filename))
+
+        log(f"🎧 Queued file for transcription: {filepath} (job {job_id})")
+
+        def on_done(job, result):
+            transcript = result.get("text", "")
+            log(f" Transcription complete (job {job['id']}).")
+            create_mom_docx(metadata, transcript, filename, result.get("segments"),
+                            result.get("language"), meeting_id=job["id"])
+            return _mom_response(transcript, filename)
+
+        try:
+            get_job_queue().submit(filepath, job_id=job_id, on_done=on_done,
+                                   cache_key=cache_key, filename=file.filename)
+        except QueueFull as e:
+            try:
+                os.remove(filepath)
+            except OSError:
+                pass
+            return _queue_full_response(e.retry_after)
+        return jsonify({"job_id": job_id, "status": "queued"}), 202
 
     except Exception as e:
-        print(f"[Upload error] {e}")
+        log(f"[Upload error] {e}")
         return jsonify({"error": str(e)}), 500
 
 
+def _queue_full_response(retry_after=QUEUE_RETRY_AFTER_SECONDS):
+    response = jsonify({"error": "Server busy, please retry later", "retry_after": retry_after})
+    response.status_code = 503
+    response.headers["Retry-After"] = str(retry_after)
+    return response
+
+
+def _mom_response(transcript, filename):
+    return {
+        "transcript": transcript,
+        "mom_docx": filename,
+        "mom_pdf": _pdf_name(filename),
+        "person_summaries": {"Summary": transcript[:500] + "..."}
+    }
+
+
+#  Resumable chunked uploads: init -> PUT chunks at offsets -> finalize.
+#  The received prefix is transcribed while the tail is still arriving.
+def _submit_upload_pass(session, nbytes, final):
+    if not final:
+        def on_done(job, result):
+            upload_manager.prefix_done(session, result)
+            return result
+
+        def on_error(job, error):
+            # the final pass re-transcribes everything after committed_s
+            upload_manager.prefix_skipped(session)
+        try:
+            get_job_queue().submit_call(
+                transcribe_prefix_job,
+                (session.path, nbytes, session.committed_s, PREFIX_GUARD_SECONDS, session.language,
+                 session.speakers),
+                on_done=on_done, on_error=on_error, input_path=session.path,
+                filename=session.filename, upload_id=session.id)
+        except QueueFull:
+            # prefix passes are optional: skip this one, the final pass covers it
+            upload_manager.prefix_skipped(session)
+        return
+
+    filename = secure_filename(f"{os.path.splitext(session.filename)[0]}_MoM.docx")
+
+    def on_final(job, result):
+        segments = session.segments + result["segments"]
+        transcript = " ".join(seg["text"] for seg in segments).strip()
+        log(f" Transcription complete (upload {session.id}).")
+        create_mom_docx(session.metadata, transcript, filename, segments,
+                        result.get("language"), meeting_id=session.id)
+        session.status = "processed"
+        session.save()
+        return _mom_response(transcript, filename)
+
+    def on_final_error(job, error):
+        session.status = "failed"
+        session.save()
+
+    session.job_id = uuid.uuid4().hex
+    session.save()
+    get_job_queue().submit_call(
+        transcribe_prefix_job,
+        (session.path, nbytes, session.committed_s, 0.0, session.language, session.speakers),
+        job_id=session.job_id, on_done=on_final, on_error=on_final_error, bounded=False,
+        input_path=session.path, filename=session.filename, upload_id=session.id)
+
+
+upload_manager = UploadManager(submit_prefix=_submit_upload_pass)
+
+
+def _files_in_use():
+    # kept by the retention sweeper: uploads in progress and pending job inputs
+    paths = upload_manager.paths_in_use()
+    if job_queue is not None:
+        paths += job_queue.input_paths()
+    return paths
+
+
+@app.route("/api/uploads", methods=["POST"])
+def upload_init():
+    try:
+        if get_job_queue().full():
+            return _queue_full_response()
+        data = request.get_json(force=True)
+        session = upload_manager.init(
+            data.get("filename") or "recording",
+            int(data.get("size") or 0),
+            sha256=data.get("sha256"),
+            metadata=data.get("metadata") or {},
+        )
+        return jsonify(dict(session.to_dict(), max_chunk_bytes=MAX_CHUNK_BYTES)), 201
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+    except Exception as e:
+        log(f"[Upload init error] {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/uploads/<upload_id>", methods=["GET"])
+def upload_status(upload_id):
+    try:
+        return jsonify(upload_manager.get(upload_id).to_dict())
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+
+
+@app.route("/api/uploads/<upload_id>", methods=["PUT"])
+def upload_chunk(upload_id):
+    try:
+        offset = int(request.args.get("offset", request.headers.get("Upload-Offset", 0)))
+        length = request.content_length or 0
+        session = upload_manager.put_chunk(upload_id, offset, request.stream, length,
+                                           chunk_sha256=request.headers.get("X-Chunk-SHA256"))
+        return jsonify(session.to_dict())
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+    except Exception as e:
+        log(f"[Upload chunk error] {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/uploads/<upload_id>/finalize", methods=["POST"])
+def upload_finalize(upload_id):
+    try:
+        if get_job_queue().full():
+            return _queue_full_response()
+        session = upload_manager.finalize(upload_id, run=lambda fn, *args: tpool.execute(in_context(fn), *args))
+        return jsonify(session.to_dict()), 202
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+    except Exception as e:
+        log(f"[Upload finalize error] {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = get_job_queue().get(job_id)
+    if not job:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify({k: job.get(k) for k in ("id", "status", "progress", "error", "filename")})
+
+
+@app.route("/api/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id):
+    job = get_job_queue().get(job_id)
+    if not job:
+        return jsonify({"error": "Unknown job"}), 404
+    if job["status"] == "failed":
+        return jsonify({"error": job.get("error") or "Job failed"}), 500
+    if job["status"] != "done":
+        return jsonify({"status": job["status"], "progress": job["progress"]}), 202
+    return jsonify(job["result"])
+
+
+@app.route("/api/search", methods=["GET"])
+@jwt_required()
+def search_meetings():
+    query = (request.args.get("q") or "").strip()
+    if not query:
+        return jsonify({"error": "q is required"}), 400
+    mode = request.args.get("mode", "fts")
+    limit = max(1, min(int(request.args.get("limit", 20)), 100))
+    try:
+        started = time.perf_counter()
+        # semantic modes embed the query: keep that off the event loop
+        hits = tpool.execute(in_context(get_archive().search), query, limit, mode,
+                             request.args.get("meeting_id"))
+        return jsonify({"query": query, "mode": mode, "hits": hits,
+                        "took_ms": round((time.perf_counter() - started) * 1000, 1)})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        log(f"[Search error] {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/meetings/<meeting_id>", methods=["GET"])
+@jwt_required()
+def archived_meeting(meeting_id):
+    meeting = get_archive().get_meeting(meeting_id)
+    if meeting is None:
+        return jsonify({"error": "Meeting not found"}), 404
+    return jsonify(meeting)
+
+
+@app.route("/api/cache/stats", methods=["GET"])
+def cache_stats():
+    return jsonify(get_cache().stats())
+
+
+#  Prometheus metrics: stage latencies and ASR throughput are recorded as
+#  they happen (telemetry.span); the gauges below are read at scrape time.
+def _collect_service_metrics():
+    pdf = get_pdf_service(create=False)
+    queues = [({"queue": "transcribe_jobs"}, job_queue.pending() if job_queue else 0),
+              ({"queue": "pdf"}, pdf.pending() if pdf else 0)]
+    yield "mom_queue_depth", "gauge", "Items waiting or running per queue", queues
+    yield "mom_live_sessions", "gauge", "Open live transcription sessions", [({}, len(live_sessions))]
+    yield ("mom_model_load_seconds", "gauge", "Time taken to load each model",
+           [({"model": name}, round(sec, 3)) for name, sec in registry.load_times().items()])
+    yield ("mom_model_loaded", "gauge", "Models currently resident",
+           [({"model": name}, 1) for name in registry.loaded()])
+    stats = get_cache().stats()
+    yield ("mom_transcript_cache_lookups_total", "counter", "Transcript cache lookups",
+           [({"result": "hit"}, stats.get("hits", 0)), ({"result": "miss"}, stats.get("misses", 0))])
+    yield ("mom_transcript_cache_hit_ratio", "gauge", "Transcript cache hit ratio",
+           [({}, stats.get("hit_rate", 0.0))])
+    yield ("mom_transcript_cache_bytes", "gauge", "Transcript cache size", [({}, stats.get("bytes", 0))])
+
+
+metrics.add_collector(_collect_service_metrics)
+
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@socketio.on("subscribe_job")
+def handle_subscribe_job(data):
+    _bind_socket_request()
+    job_id = (data or {}).get("job_id")
+    if not job_id:
+        return
+    join_room(job_id)
+    job = get_job_queue().get(job_id)
+    if job:
+        _push_job_update(job)
+
+
 @app.route("/api/download/<filename>")
 def download_file(filename):
  
     try:
-        return send_from_directory(UPLOAD_DIR, filename, as_attachment=True)
+        directory = storage.find_download(filename)
+        if directory is None:
+            status = get_pdf_service().status(storage.artifact_path(filename))
+            if status == "pending":
+                return jsonify({"status": "pending"}), 202
+            return jsonify({"error": "File not found"}), 404
+        # conditional=True: ETag / Last-Modified (304s) and HTTP Range support
+        return send_from_directory(directory, filename, as_attachment=True,
+                                   conditional=True, etag=True, max_age=3600)
     except Exception as e:
-        print(f"[Download error] {e}")
+        log(f"[Download error] {e}")
         return jsonify({"error": str(e)}), 500
 
- 
+
+# Live sessions: one streaming engine per Socket.IO connection, plus the
+# incrementally built minutes for it
+live_sessions = {}
+live_moms = {}
+live_inboxes = {}
+live_rejected = {}  # sid -> time before which chunks are ignored
+live_model_lock = threading.Lock()
+live_summarizer_lock = threading.Lock()
+
+# Admission limit for concurrent live sessions; rejected clients are told
+# to retry after LIVE_RETRY_AFTER_SECONDS
+LIVE_MAX_SESSIONS = int(os.getenv("LIVE_MAX_SESSIONS", "8"))
+LIVE_RETRY_AFTER_SECONDS = int(os.getenv("LIVE_RETRY_AFTER_SECONDS", "30"))
+# Compressed audio queued per session while its transcriber catches up
+LIVE_MAX_QUEUED_KB = int(os.getenv("LIVE_MAX_QUEUED_KB", "512"))
+
+metrics.describe("mom_live_rejected_total", "counter", "Live sessions refused by the admission limit")
+metrics.describe("mom_live_dropped_chunks_total", "counter", "Live audio chunks refused by a full session queue")
+metrics.describe("mom_live_dropped_audio_seconds_total", "counter",
+                 "Live audio skipped because the transcriber lagged")
+
+
+def _run_in_thread(fn, *args, **kwargs):
+    # Whisper is CPU-bound; run it on a native thread so the event loop keeps
+    # serving. The shared model is not reentrant, so calls are serialized.
+    with live_model_lock:
+        return tpool.execute(in_context(fn), *args, **kwargs)
+
+
+def _run_summarizer(fn, *args, **kwargs):
+    with live_summarizer_lock:
+        return tpool.execute(in_context(fn), *args, **kwargs)
+
+
+def _refresh_live_mom(sid, mom):
+    # background task: summarize newly completed chunks, push the delta
+    try:
+        delta = mom.summarize(run=_run_summarizer)
+        if delta is not None:
+            socketio.emit("mom_delta", delta, to=sid)
+    except Exception as e:
+        log(f"[Live MoM error] {e}")
+
+
+def _emit_partial(sid, update):
+    text = " ".join(t for t in (update["stable"], update["tentative"]) if t)
+    socketio.emit("partial_text", {
+        "text": text if text else "[No speech detected]",
+        "stable": update["stable"],
+        "tentative": update["tentative"],
+        "segments": update["segments"],
+        "dropped_s": update.get("dropped_s", 0),
+    }, to=sid)
+    if update.get("dropped_s"):
+        metrics.inc("mom_live_dropped_audio_seconds_total", update["dropped_s"])
+    # minutes and action items for the new stable segments go out right
+    # away; summaries of completed chunks follow from a background task
+    mom = live_moms.get(sid)
+    if mom is None:
+        return
+    delta = mom.append(update["segments"])
+    if delta is not None:
+        socketio.emit("mom_delta", delta, to=sid)
+    if mom.unsummarized():
+        socketio.start_background_task(in_context(_refresh_live_mom), sid, mom)
+
+
+def _drain_live(sid, engine, inbox):
+    # The only task feeding this session: everything queued is written to
+    # the decoder in one go; steps follow from the decoded PCM (_on_live_audio)
+    while True:
+        blob = inbox.take()
+        if not blob:
+            return
+        try:
+            engine.feed(blob)
+        except Exception as e:
+            log(f"[Socket transcription error] {e}")
+            socketio.emit("partial_text", {"text": f"[Error during transcription: {str(e)}]"}, to=sid)
+
+
+def _step_live(sid, engine):
+    set_request_id(f"live-{sid[:8]}")
+    try:
+        engine.run_steps(run=_run_in_thread, emit=lambda update: _emit_partial(sid, update))
+    except Exception as e:
+        log(f"[Socket transcription error] {e}")
+        socketio.emit("partial_text", {"text": f"[Error during transcription: {str(e)}]"}, to=sid)
+
+
+def _on_live_audio(sid):
+    # called by the decoder thread whenever new PCM is in the ring buffer
+    engine = live_sessions.get(sid)
+    if engine is not None and engine.request_step():
+        socketio.start_background_task(_step_live, sid, engine)
+
+
+def _audio_bytes(data):
+    # binary Socket.IO frames arrive as bytes; older clients send base64 text
+    if isinstance(data, (bytes, bytearray)):
+        return bytes(data)
+    blob = data["blob"]
+    if isinstance(blob, (bytes, bytearray, memoryview)):
+        return bytes(blob)
+    return base64.b64decode(blob)
+
+
+def _admit_live(sid, metadata):
+    if time.time() < live_rejected.get(sid, 0):
+        return False
+    if len(live_sessions) >= LIVE_MAX_SESSIONS:
+        live_rejected[sid] = time.time() + LIVE_RETRY_AFTER_SECONDS
+        metrics.inc("mom_live_rejected_total")
+        log(f"[Live] Rejected session: {len(live_sessions)} of {LIVE_MAX_SESSIONS} in use")
+        emit("live_rejected", {"error": "Too many live sessions, please retry later",
+                               "retry_after": LIVE_RETRY_AFTER_SECONDS})
+        return False
+    live_rejected.pop(sid, None)
+    live_sessions[sid] = StreamingTranscriber(get_asr(), on_audio=lambda: _on_live_audio(sid))
+    live_moms[sid] = LiveMomSession(metadata)
+    live_inboxes[sid] = LiveInbox(LIVE_MAX_QUEUED_KB * 1024)
+    return True
+
+
 @socketio.on("audio_chunk")
 def handle_audio_chunk(data):
+    _bind_socket_request()
+    sid = request.sid
     try:
-        blob_data = base64.b64decode(data["blob"])
-        with tempfile.NamedTemporaryFile(suffix=".webm", delete=False) as tmp:
-            tmp.write(blob_data)
-            tmp_path = tmp.name
+        blob_data = _audio_bytes(data)
+        engine = live_sessions.get(sid)
+        if engine is None:
+            if not _admit_live(sid, data.get("metadata") if isinstance(data, dict) else None):
+                return
+            engine = live_sessions[sid]
+        inbox = live_inboxes[sid]
+
+        accepted, start_drainer = inbox.put(blob_data)
+        if not accepted:
+            metrics.inc("mom_live_dropped_chunks_total")
+            emit("live_backpressure", {"queued_bytes": inbox.size, "max_bytes": inbox.max_bytes})
+            return
+        if start_drainer:
+            socketio.start_background_task(in_context(_drain_live), sid, engine, inbox)
 
-        result = model.transcribe(tmp_path)
-        partial_text = result.get("text", "").strip()
-        os.unlink(tmp_path)
+    except Exception as e:
+        log(f"[Socket transcription error] {e}")
+        emit("partial_text", {"text": f"[Error during transcription: {str(e)}]"})
 
-        emit("partial_text", {"text": partial_text if partial_text else "[No speech detected]"})
 
+@socketio.on("audio_end")
+def handle_audio_end(data=None):
+    _bind_socket_request()
+    sid = request.sid
+    engine = live_sessions.pop(sid, None)
+    inbox = live_inboxes.pop(sid, None)
+    if engine is None:
+        return
+    try:
+        rest = inbox.close(timeout=60) if inbox is not None else b""
+        if rest:
+            engine.feed(rest)
+        update = engine.close(run=_run_in_thread)
+        if update is not None:
+            _emit_partial(sid, update)
+        emit("final_text", {"text": engine.stable_text, "segments": engine.stable_segments})
+        mom = live_moms.pop(sid, None)
+        if mom is not None:
+            emit("mom_final", mom.finish(run=_run_summarizer))
     except Exception as e:
-        print(f"[Socket transcription error] {e}")
-        emit("partial_text", {"text": f"[Error during transcription: {str(e)}]"})
+        log(f"[Socket transcription error] {e}")
+
+
+@socketio.on("disconnect")
+def handle_disconnect():
+    _bind_socket_request()
+    sid = request.sid
+    live_moms.pop(sid, None)
+    live_rejected.pop(sid, None)
+    inbox = live_inboxes.pop(sid, None)
+    engine = live_sessions.pop(sid, None)
+    if engine is not None:
+        try:
+            if inbox is not None:
+                inbox.close(timeout=60)
+            # nobody is left to receive a final step; just stop the decoder
+            engine.close(finalize=False)
+        except Exception as e:
+            log(f"[Live session cleanup error] {e}")
 
 
 if __name__ == "__main__":
-    print(" Starting GSFC MoM Backend on http://localhost:5001")
+    warmup()
+    registry.start_reaper(sleep=socketio.sleep)
+    socketio.start_background_task(storage.run_sweeper, socketio.sleep, in_use=_files_in_use)
+    recovered = upload_manager.recover()
+    if recovered:
+        log(f" Re-queued the final pass of {recovered} finalized upload(s).")
+    log(" Starting GSFC MoM Backend on http://localhost:5001")
     socketio.run(app, host="0.0.0.0", port=5001, debug=True)
@@ -0,0 +1,285 @@
+# backend/archive.py
+import os
+import re
+import json
+import time
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from models import get_embedder
+from telemetry import log, span
+from user_store import DB_PATH, DB_POOL_SIZE, ConnectionPool
+
+# Also embed archived segments for semantic / hybrid search
+ARCHIVE_EMBEDDINGS = os.getenv("ARCHIVE_EMBEDDINGS", "0") == "1"
+EMBEDDING_BATCH_SIZE = 64
+# Rank constant for reciprocal-rank fusion in hybrid search
+RRF_K = 60
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS meetings (
+        id TEXT PRIMARY KEY,
+        title TEXT,
+        meeting_date TEXT,
+        metadata TEXT NOT NULL,
+        transcript TEXT NOT NULL,
+        summary TEXT NOT NULL,
+        action_items TEXT NOT NULL,
+        person_summaries TEXT NOT NULL,
+        language TEXT,
+        docx TEXT,
+        created_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS ix_meetings_created_at ON meetings (created_at);
+    CREATE TABLE IF NOT EXISTS meeting_segments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        meeting_id TEXT NOT NULL REFERENCES meetings (id) ON DELETE CASCADE,
+        kind TEXT NOT NULL,
+        idx INTEGER NOT NULL,
+        start REAL,
+        end REAL,
+        speaker TEXT,
+        text TEXT NOT NULL,
+        embedding BLOB
+    );
+    CREATE INDEX IF NOT EXISTS ix_meeting_segments_meeting ON meeting_segments (meeting_id, kind, idx);
+    CREATE VIRTUAL TABLE IF NOT EXISTS meeting_segments_fts USING fts5(
+        text, content='meeting_segments', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    );
+    CREATE TRIGGER IF NOT EXISTS meeting_segments_ai AFTER INSERT ON meeting_segments BEGIN
+        INSERT INTO meeting_segments_fts (rowid, text) VALUES (new.id, new.text);
+    END;
+    CREATE TRIGGER IF NOT EXISTS meeting_segments_ad AFTER DELETE ON meeting_segments BEGIN
+        INSERT INTO meeting_segments_fts (meeting_segments_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END;
+"""
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_query(text: str) -> str:
+    """
+    Turn free text into an FTS5 query: every word must match (quoted, so
+    user input can't inject FTS operators), the last one as a prefix.
+    """
+    terms = _TERM.findall(text or "")
+    if not terms:
+        return ""
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _rows(mom_sections: Dict, segments: List[Dict]) -> List[tuple]:
+    rows = []
+    for i, seg in enumerate(segments or []):
+        text = (seg.get("text") or "").strip()
+        if text:
+            rows.append(("segment", i, seg.get("start"), seg.get("end"), seg.get("speaker"), text))
+    summary = mom_sections.get("summary") or []
+    for i, text in enumerate(summary if isinstance(summary, list) else [summary]):
+        if text and text.strip():
+            rows.append(("summary", i, None, None, None, text.strip()))
+    for i, text in enumerate(mom_sections.get("action_items") or []):
+        if text and text.strip():
+            rows.append(("action_item", i, None, None, None, text.strip()))
+    return rows
+
+
+class _VectorIndex:
+    """
+    In-memory matrix of normalized segment embeddings, filled from the
+    database and topped up incrementally (rows other processes added are
+    picked up on the next search).
+    """
+
+    def __init__(self):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.matrix = None
+        self.last_id = 0
+        self.lock = threading.Lock()
+
+    def refresh(self, conn) -> None:
+        rows = conn.execute(
+            "SELECT id, embedding FROM meeting_segments WHERE id > ? AND embedding IS NOT NULL ORDER BY id",
+            (self.last_id,)).fetchall()
+        if not rows:
+            return
+        ids = np.array([r["id"] for r in rows], dtype=np.int64)
+        vecs = np.vstack([np.frombuffer(r["embedding"], dtype=np.float32) for r in rows])
+        self.ids = np.concatenate([self.ids, ids])
+        self.matrix = vecs if self.matrix is None else np.vstack([self.matrix, vecs])
+        self.last_id = int(ids[-1])
+
+    def top(self, query: np.ndarray, k: int) -> List[tuple]:
+        if self.matrix is None or not len(self.ids):
+            return []
+        scores = self.matrix @ query
+        k = min(k, scores.size)
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(int(self.ids[i]), float(scores[i])) for i in best]
+
+
+class MeetingArchive:
+    """
+    Processed meetings (transcript, segments, summaries, action items) with
+    an FTS5 index over segments, summary points and action items, and an
+    optional embedding index (ARCHIVE_EMBEDDINGS=1) for semantic search.
+    """
+
+    def __init__(self, path: str = DB_PATH, pool_size: int = DB_POOL_SIZE,
+                 embeddings: bool = ARCHIVE_EMBEDDINGS):
+        self.pool = ConnectionPool(path, pool_size)
+        self.embeddings = embeddings
+        self._vectors = _VectorIndex()
+        with self.pool.connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        vecs = get_embedder().encode(texts, batch_size=EMBEDDING_BATCH_SIZE,
+                                     normalize_embeddings=True, show_progress_bar=False)
+        return np.asarray(vecs, dtype=np.float32)
+
+    def add_meeting(self, meeting_id: str, metadata: Dict, transcript: str, segments: List[Dict],
+                    mom_sections: Dict, person_summaries: Optional[Dict] = None,
+                    language: Optional[str] = None, docx: Optional[str] = None) -> int:
+        """
+        Store (or replace) one meeting; returns the number of indexed rows.
+        """
+        rows = _rows(mom_sections, segments)
+        vectors = [None] * len(rows)
+        if self.embeddings and rows:
+            try:
+                with span("archive_embed", rows=len(rows)):
+                    vectors = [v.tobytes() for v in self._embed([r[-1] for r in rows])]
+            except Exception as e:
+                log(f"[Archive embedding error] {e}")
+
+        summary = mom_sections.get("summary") or []
+        with span("archive_write", rows=len(rows)), self.pool.connection() as conn:
+            conn.execute("DELETE FROM meeting_segments WHERE meeting_id = ?", (meeting_id,))
+            conn.execute(
+                "INSERT OR REPLACE INTO meetings (id, title, meeting_date, metadata, transcript, summary, "
+                "action_items, person_summaries, language, docx, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (meeting_id, metadata.get("meeting_name"), metadata.get("date"),
+                 json.dumps(metadata, default=str), transcript or "",
+                 json.dumps(summary if isinstance(summary, list) else [summary]),
+                 json.dumps(mom_sections.get("action_items") or []),
+                 json.dumps(person_summaries or {}), language, docx, time.time()))
+            conn.executemany(
+                "INSERT INTO meeting_segments (meeting_id, kind, idx, start, end, speaker, text, embedding) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(meeting_id,) + row + (vec,) for row, vec in zip(rows, vectors)])
+        return len(rows)
+
+    def get_meeting(self, meeting_id: str) -> Optional[Dict]:
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT * FROM meetings WHERE id = ?", (meeting_id,)).fetchone()
+            if row is None:
+                return None
+            segments = conn.execute(
+                "SELECT start, end, speaker, text FROM meeting_segments "
+                "WHERE meeting_id = ? AND kind = 'segment' ORDER BY idx", (meeting_id,)).fetchall()
+        meeting = dict(row)
+        for key in ("metadata", "summary", "action_items", "person_summaries"):
+            meeting[key] = json.loads(meeting[key])
+        meeting["segments"] = [dict(s) for s in segments]
+        return meeting
+
+    def _hits(self, conn, ids: List[int]) -> Dict[int, Dict]:
+        if not ids:
+            return {}
+        marks = ",".join("?" * len(ids))
+        rows = conn.execute(
+            "SELECT s.id, s.meeting_id, s.kind, s.idx, s.start, s.end, s.speaker, s.text, "
+            f"m.title, m.meeting_date FROM meeting_segments s JOIN meetings m ON m.id = s.meeting_id "
+            f"WHERE s.id IN ({marks})", ids).fetchall()
+        return {r["id"]: dict(r) for r in rows}
+
+    def _search_fts(self, conn, query: str, limit: int, meeting_id: Optional[str]) -> List[Dict]:
+        match = fts_query(query)
+        if not match:
+            return []
+        sql = ("SELECT s.id, s.meeting_id, s.kind, s.idx, s.start, s.end, s.speaker, s.text, "
+               "m.title, m.meeting_date, bm25(meeting_segments_fts) AS rank, "
+               "snippet(meeting_segments_fts, 0, '[', ']', '…', 12) AS snippet "
+               "FROM meeting_segments_fts "
+               "JOIN meeting_segments s ON s.id = meeting_segments_fts.rowid "
+               "JOIN meetings m ON m.id = s.meeting_id "
+               "WHERE meeting_segments_fts MATCH ?")
+        args = [match]
+        if meeting_id:
+            sql += " AND s.meeting_id = ?"
+            args.append(meeting_id)
+        sql += " ORDER BY rank LIMIT ?"
+        args.append(limit)
+        hits = []
+        for r in conn.execute(sql, args).fetchall():
+            hit = dict(r)
+            # bm25() is lower-is-better; report higher-is-better
+            hit["score"] = round(-hit.pop("rank"), 6)
+            hits.append(hit)
+        return hits
+
+    def _search_semantic(self, conn, query: str, limit: int, meeting_id: Optional[str]) -> List[Dict]:
+        vec = self._embed([query])[0]
+        with self._vectors.lock:
+            self._vectors.refresh(conn)
+            # over-fetch when filtering by meeting
+            scored = self._vectors.top(vec, limit * 20 if meeting_id else limit)
+        found = self._hits(conn, [sid for sid, _ in scored])
+        hits = []
+        for sid, score in scored:
+            hit = found.get(sid)
+            if hit is None or (meeting_id and hit["meeting_id"] != meeting_id):
+                continue
+            hit["score"] = round(score, 4)
+            hits.append(hit)
+            if len(hits) >= limit:
+                break
+        return hits
+
+    def search(self, query: str, limit: int = 20, mode: str = "fts",
+               meeting_id: Optional[str] = None) -> List[Dict]:
+        """
+        Ranked hits: mode "fts" (BM25), "semantic" (cosine over embeddings)
+        or "hybrid" (reciprocal-rank fusion of both).
+        """
+        if mode != "fts" and not self.embeddings:
+            raise ValueError("Semantic search is disabled (set ARCHIVE_EMBEDDINGS=1)")
+        with span("archive_search", mode=mode), self.pool.connection() as conn:
+            if mode == "fts":
+                return self._search_fts(conn, query, limit, meeting_id)
+            if mode == "semantic":
+                return self._search_semantic(conn, query, limit, meeting_id)
+            if mode != "hybrid":
+                raise ValueError(f"Unknown search mode: {mode}")
+            fused: Dict[int, Dict] = {}
+            for results in (self._search_fts(conn, query, limit * 2, meeting_id),
+                            self._search_semantic(conn, query, limit * 2, meeting_id)):
+                for rank, hit in enumerate(results):
+                    entry = fused.setdefault(hit["id"], dict(hit, score=0.0))
+                    entry["score"] += 1.0 / (RRF_K + rank + 1)
+                    if hit.get("snippet"):
+                        entry["snippet"] = hit["snippet"]
+            hits = sorted(fused.values(), key=lambda h: -h["score"])[:limit]
+            for h in hits:
+                h["score"] = round(h["score"], 5)
+            return hits
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_archive() -> MeetingArchive:
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = MeetingArchive()
+        return _archive
@@ -0,0 +1,396 @@
+# backend/batch.py
+"""
+Offline bulk processing: minutes for a directory (or list) of recordings
+without the web tier.
+
+    python batch.py /data/meetings --out /data/mom            # walk a directory
+    python batch.py --list files.jsonl --out /data/mom        # one path (or JSON object) per line
+    python batch.py /data/meetings --out /data/mom --workers 4 --threads 4 --nlp-workers 2
+
+Recordings flow through three stages, each with its own pool of worker
+processes (pipeline.StagedPipeline): transcription (transcribe_file,
+--workers), NLP (translate_text_if_needed + generate_mom_and_person_summaries,
+--nlp-workers) and documents (create_docx_and_pdf, and the meeting archive
+unless --no-archive, --docgen-workers). Whisper and the summarizer are each
+loaded only in their own stage's workers and stay busy on different files
+at once; at most --queue-size finished transcripts wait for the NLP stage,
+so a slow stage holds back new transcriptions instead of buffering the whole
+batch. Every finished file is appended to a JSONL manifest
+(default <out>/manifest.jsonl); a re-run skips files already done with the
+same size and mtime, so an interrupted back-fill resumes where it stopped.
+Failed files are retried up to --max-attempts times across runs.
+
+List entries are paths or {"path": ..., "metadata": {...}}; a <name>.json
+next to a recording is merged into its metadata as well.
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import multiprocessing
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+AUDIO_EXTS = (".mp3", ".wav", ".m4a", ".aac", ".ogg", ".opus", ".flac", ".webm", ".mp4", ".mkv", ".wma")
+TEXT_EXTS = (".txt", ".md")
+# Intra-op threads per worker; the default pool size is cpus // threads
+DEFAULT_THREADS = 2
+
+# Defaults for batch runs (set before any project module is imported, so
+# spawned workers inherit them; explicit env vars win)
+BATCH_ENV = {
+    "LOG_SPANS": "0",
+    "MODEL_WARMUP": "",
+    # one office instance per worker process is enough
+    "PDF_WORKERS": "1",
+}
+
+
+def _fingerprint(path: str) -> str:
+    st = os.stat(path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def _uid(path: str) -> str:
+    """
+    Stable output name: file stem plus a short hash of the absolute path,
+    so same-named recordings in different folders don't collide.
+    """
+    digest = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:8]
+    return f"{Path(path).stem}_{digest}"
+
+
+def discover(inputs: List[str], list_file: Optional[str], exts: Tuple[str, ...]) -> List[Tuple[str, Dict]]:
+    """
+    (absolute path, metadata) for every recording under the given
+    directories / files and in the list file, without duplicates.
+    """
+    found: Dict[str, Dict] = {}
+
+    def add(path: str, metadata: Optional[Dict] = None) -> None:
+        path = os.path.abspath(path)
+        if path not in found:
+            found[path] = dict(metadata or {})
+
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, dirs, files in os.walk(item):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(exts):
+                        add(os.path.join(root, name))
+        elif os.path.isfile(item):
+            add(item)
+        else:
+            print(f"Skipping missing input: {item}")
+
+    if list_file:
+        base = os.path.dirname(os.path.abspath(list_file))
+        with open(list_file, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                entry = json.loads(line) if line.startswith("{") else {"path": line}
+                add(os.path.join(base, entry["path"]), entry.get("metadata"))
+    return list(found.items())
+
+
+def _sidecar_metadata(path: str) -> Dict:
+    sidecar = os.path.splitext(path)[0] + ".json"
+    if not os.path.isfile(sidecar):
+        return {}
+    try:
+        with open(sidecar, encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception as e:
+        print(f"Ignoring unreadable metadata {sidecar}: {e}")
+        return {}
+
+
+class Manifest:
+    """
+    Append-only JSONL checkpoint: one record per finished (or failed)
+    file, flushed and fsynced as it is written. The last record for a
+    path wins; compact() rewrites the file with just those.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records: Dict[str, Dict] = {}
+        self.lines = 0
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from an interrupted run
+                    self.records[rec["path"]] = rec
+                    self.lines += 1
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._f = open(path, "a", encoding="utf-8")
+
+    def is_done(self, path: str, fingerprint: str) -> bool:
+        rec = self.records.get(path)
+        return (rec is not None and rec.get("status") == "done" and rec.get("fingerprint") == fingerprint
+                and os.path.exists(rec.get("docx") or ""))
+
+    def attempts(self, path: str, fingerprint: str) -> int:
+        rec = self.records.get(path)
+        if rec is None or rec.get("status") != "failed" or rec.get("fingerprint") != fingerprint:
+            return 0
+        return rec.get("attempts", 1)
+
+    def write(self, rec: Dict) -> None:
+        self.records[rec["path"]] = rec
+        self._f.write(json.dumps(rec, default=str) + "\n")
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self.lines += 1
+
+    def compact(self) -> None:
+        if self.lines <= len(self.records):
+            return
+        self._f.close()
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for rec in self.records.values():
+                f.write(json.dumps(rec, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self.lines = len(self.records)
+        self._f = open(self.path, "a", encoding="utf-8")
+
+    def close(self) -> None:
+        self._f.close()
+
+
+def _init_worker(threads: int) -> None:
+    sys.path.insert(0, HERE)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def _in_item(name: str, item: Tuple[str, Dict, str], fn: Callable[[], Dict]) -> Dict:
+    from telemetry import reset_request_id, set_request_id, span
+
+    path, _, uid = item
+    token = set_request_id(uid)
+    try:
+        with span(f"batch_{name}", file=Path(path).name):
+            return fn()
+    finally:
+        reset_request_id(token)
+
+
+def transcribe_stage(item: Tuple[str, Dict, str], _: None) -> Dict:
+    """
+    Pipeline stage 1 (transcription workers): transcript, segments and
+    language of one recording; .txt/.md inputs are read as the transcript.
+    """
+    path = item[0]
+
+    def work() -> Dict:
+        if path.lower().endswith(TEXT_EXTS):
+            with open(path, encoding="utf-8") as f:
+                return {"transcript": f.read().strip(), "segments": [], "language": None}
+        from transcribe import transcribe_file
+        transcript, segments, language = transcribe_file(path)
+        return {"transcript": transcript, "segments": segments, "language": language}
+
+    return _in_item("transcribe", item, work)
+
+
+def summarize_stage(item: Tuple[str, Dict, str], transcribed: Dict) -> Dict:
+    """
+    Pipeline stage 2 (NLP workers): translation and the minutes content.
+    """
+    metadata = item[1]
+
+    def work() -> Dict:
+        from transcribe import translate_text_if_needed
+        from nlp import generate_mom_and_person_summaries
+        text, translated = transcribed["transcript"], False
+        if transcribed["language"] is not None:
+            text, translated = translate_text_if_needed(text, transcribed["language"])
+        mom, person_summaries = generate_mom_and_person_summaries(text, transcribed["segments"], metadata)
+        return dict(transcribed, translated=translated, mom=mom, person_summaries=person_summaries)
+
+    return _in_item("summarize", item, work)
+
+
+def docgen_stage(out_dir: str, archive: bool, item: Tuple[str, Dict, str], content: Dict) -> Dict:
+    """
+    Pipeline stage 3 (document workers): DOCX/PDF and the archive entry.
+    Returns a picklable summary of the outputs.
+    """
+    _, metadata, uid = item
+
+    def work() -> Dict:
+        from docgen import create_docx_and_pdf
+        out_docx, out_pdf = create_docx_and_pdf(uid, content["mom"], metadata, content["person_summaries"],
+                                                Path(out_dir))
+        if archive:
+            from archive import get_archive
+            get_archive().add_meeting(uid, metadata, content["transcript"], content["segments"], content["mom"],
+                                      content["person_summaries"], content["language"], Path(out_docx).name)
+        return {
+            "docx": str(out_docx),
+            "pdf": str(out_pdf) if out_pdf != out_docx else None,
+            "language": content["language"],
+            "translated": content["translated"],
+            "segments": len(content["segments"]),
+            "chars": len(content["transcript"]),
+        }
+
+    return _in_item("docgen", item, work)
+
+
+def run(items: List[Tuple[str, Dict]], out_dir: str, manifest: Manifest, workers: int, threads: int,
+        archive: bool, max_attempts: int, force: bool, nlp_workers: int = 1, docgen_workers: int = 1,
+        queue_size: int = 2) -> Tuple[int, int, int]:
+    """
+    Process every item not already in the manifest; returns (done, failed, skipped).
+    """
+    from pipeline import Stage, StagedPipeline
+
+    todo = []
+    skipped = 0
+    for path, metadata in items:
+        try:
+            fingerprint = _fingerprint(path)
+        except OSError as e:
+            print(f"Skipping unreadable {path}: {e}")
+            skipped += 1
+            continue
+        attempts = manifest.attempts(path, fingerprint)
+        if not force and (manifest.is_done(path, fingerprint) or attempts >= max_attempts):
+            skipped += 1
+            continue
+        meta = {"meeting_name": Path(path).stem}
+        meta.update(_sidecar_metadata(path))
+        meta.update(metadata)
+        todo.append((path, meta, fingerprint, attempts))
+    # longest recordings first, so the pool doesn't end on one straggler
+    todo.sort(key=lambda t: -int(t[2].split(":")[0]))
+    print(f"{len(todo)} to process, {skipped} skipped, {workers} transcription worker(s) x {threads} thread(s), "
+          f"{nlp_workers} NLP, {docgen_workers} document worker(s)")
+    if not todo:
+        return 0, 0, skipped
+
+    done = failed = 0
+    ctx = multiprocessing.get_context("spawn")
+    executors = [ProcessPoolExecutor(max_workers=n, mp_context=ctx, initializer=_init_worker, initargs=(threads,))
+                 for n in (workers, nlp_workers, docgen_workers)]
+    pipeline = StagedPipeline([
+        Stage("transcribe", transcribe_stage, executors[0], workers),
+        Stage("summarize", summarize_stage, executors[1], nlp_workers),
+        Stage("docgen", partial(docgen_stage, out_dir, archive), executors[2], docgen_workers),
+    ], queue_size=queue_size)
+    started: Dict[str, Tuple[str, int, float]] = {}
+
+    def feed():
+        for path, meta, fingerprint, attempts in todo:
+            started[path] = (fingerprint, attempts, time.time())
+            yield path, meta, _uid(path)
+
+    try:
+        for n, (item, result, error) in enumerate(pipeline.run(feed()), 1):
+            path = item[0]
+            fingerprint, attempts, submitted = started.pop(path)
+            rec = {"path": path, "fingerprint": fingerprint, "uid": _uid(path), "finished_at": time.time()}
+            if isinstance(error, BrokenProcessPool):
+                raise error
+            if error is None:
+                rec.update(result, status="done")
+                done += 1
+                print(f"[{n}/{len(todo)}] done   {path} -> {rec['docx']}")
+            else:
+                rec.update(status="failed", error=str(error), attempts=attempts + 1)
+                failed += 1
+                print(f"[{n}/{len(todo)}] failed {path}: {error}")
+            rec["wall_s"] = round(rec["finished_at"] - submitted, 2)
+            manifest.write(rec)
+    except BrokenProcessPool:
+        # a worker died (e.g. OOM-killed): what finished is checkpointed, the
+        # rest is picked up by the next run
+        print("A worker process died; re-run to resume the remaining files.")
+        failed += len(todo) - done - failed
+    except KeyboardInterrupt:
+        print("Interrupted; re-run to resume.")
+        raise
+    finally:
+        for executor in executors:
+            executor.shutdown(wait=True, cancel_futures=True)
+    return done, failed, skipped
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate minutes for many recordings offline")
+    parser.add_argument("inputs", nargs="*", help="recording files or directories (walked recursively)")
+    parser.add_argument("--list", help="file with one path or JSON object per line")
+    parser.add_argument("--out", required=True, help="output directory for DOCX/PDF files")
+    parser.add_argument("--manifest", help="checkpoint file (default: <out>/manifest.jsonl)")
+    parser.add_argument("--metadata", help="JSON file with metadata applied to every meeting")
+    parser.add_argument("--ext", default=",".join(AUDIO_EXTS),
+                        help="extensions picked up when walking directories (add .txt for transcripts)")
+    parser.add_argument("--threads", type=int, default=DEFAULT_THREADS, help="threads per worker")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="transcription worker processes (default: cpus // threads, less the NLP workers)")
+    parser.add_argument("--nlp-workers", type=int, default=1, help="translation/summarization worker processes")
+    parser.add_argument("--docgen-workers", type=int, default=1, help="DOCX/PDF worker processes")
+    parser.add_argument("--queue-size", type=int, default=2,
+                        help="finished items allowed to wait for each next stage")
+    parser.add_argument("--max-attempts", type=int, default=3, help="give up on a file after this many failures")
+    parser.add_argument("--force", action="store_true", help="reprocess files already in the manifest")
+    parser.add_argument("--no-archive", action="store_true", help="don't add meetings to the search archive")
+    args = parser.parse_args(argv)
+    if not args.inputs and not args.list:
+        parser.error("give at least one input directory/file or --list")
+
+    threads = max(1, args.threads)
+    nlp_workers = max(1, args.nlp_workers)
+    workers = args.workers or max(1, (os.cpu_count() or 1) // threads - nlp_workers)
+    # must be set before workers start (they import the project modules)
+    for k, v in BATCH_ENV.items():
+        os.environ.setdefault(k, v)
+    for k in ("WHISPER_TORCH_THREADS", "CT2_CPU_THREADS", "OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ.setdefault(k, str(threads))
+
+    exts = tuple(e.strip().lower() if e.strip().startswith(".") else "." + e.strip().lower()
+                 for e in args.ext.split(",") if e.strip())
+    items = discover(args.inputs, args.list, exts)
+    if args.metadata:
+        with open(args.metadata, encoding="utf-8") as f:
+            common = json.load(f)
+        items = [(path, dict(common, **meta)) for path, meta in items]
+
+    os.makedirs(args.out, exist_ok=True)
+    manifest = Manifest(args.manifest or os.path.join(args.out, "manifest.jsonl"))
+    t0 = time.time()
+    try:
+        done, failed, skipped = run(items, os.path.abspath(args.out), manifest, workers, threads,
+                                    not args.no_archive, max(1, args.max_attempts), args.force,
+                                    nlp_workers, max(1, args.docgen_workers), args.queue_size)
+        manifest.compact()
+    finally:
+        manifest.close()
+    print(f"Finished in {time.time() - t0:.1f}s: {done} done, {failed} failed, {skipped} skipped")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,423 @@
+# backend/bench.py
+"""
+Benchmark harness for the transcription, NLP and docgen hot paths.
+
+    python bench.py                                  # default stages and sizes
+    python bench.py --stages chunk,mom --sizes 500,2000,8000 --repeat 5
+    python bench.py --save-baseline bench_baseline.json
+    python bench.py --baseline bench_baseline.json --tolerance 0.25
+
+Inputs are synthetic but reproducible (--seed): transcripts are built from
+the text samples in uploads/ plus a small built-in corpus, audio by
+splicing slices of the sample recordings in uploads/. Tiny models are used
+and the Hugging Face hub is switched to offline mode unless --online is
+given, so only locally cached weights are loaded. Stages whose model or
+tool is unavailable are reported as skipped.
+"""
+import os
+import sys
+import json
+import glob
+import time
+import wave
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SEED_DIR = os.path.join(HERE, "uploads")
+
+# Model choices for benchmark runs (overridable through the usual env vars)
+BENCH_ENV = {
+    "WHISPER_MODEL": "tiny",
+    "SUMMARIZER_MODEL": "sshleifer/distilbart-xsum-1-1",
+    "MODEL_WARMUP": "",
+    "LOG_SPANS": "0",
+}
+OFFLINE_ENV = {"HF_HUB_OFFLINE": "1", "TRANSFORMERS_OFFLINE": "1"}
+
+TEXT_STAGES = ("chunk", "summarize", "mom", "translate", "docx", "docgen")
+AUDIO_STAGES = ("transcribe", "diarize")
+DEFAULT_STAGES = "chunk,summarize,mom,translate,transcribe,diarize,docx"
+SPEAKERS = ("Person1", "Person2", "Person3")
+WORDS_PER_SECOND = 2.5
+
+_CORPUS = [
+    "Good morning everyone, let us start with the status of the procurement work.",
+    "The vendor has confirmed delivery of the remaining units by the end of next week.",
+    "We need to finalize the budget for the second quarter before Friday.",
+    "Ravi will prepare the revised project schedule and share it with the team.",
+    "The testing phase was delayed because the lab equipment was not available.",
+    "Please make sure the safety audit report is submitted to the plant manager.",
+    "Action item: the quality team should review the supplier contracts.",
+    "We discussed the training plan for the new operators joining this month.",
+    "The maintenance shutdown is scheduled for the first week of the next month.",
+    "Decision: the committee approved the purchase of two additional pumps.",
+    "There were some concerns about the cost overrun in the civil works package.",
+    "Meera will follow up with the finance department on pending invoices.",
+    "The production target for this quarter has been achieved ahead of time.",
+    "We should track energy consumption per unit of output from now on.",
+    "Any other points before we close? If not, thank you all for joining.",
+]
+
+
+# synthetic inputs
+
+def _seed_sentences() -> List[str]:
+    sentences = list(_CORPUS)
+    for path in sorted(glob.glob(os.path.join(SEED_DIR, "*.txt")) +
+                       glob.glob(os.path.join(SEED_DIR, "*.md"))):
+        try:
+            with open(path, encoding="utf-8", errors="ignore") as f:
+                lines = [ln.strip() for ln in f.read().splitlines() if ln.strip()]
+        except OSError:
+            continue
+        sentences.extend(ln if ln[-1] in ".!?" else ln + "." for ln in lines)
+    return sentences
+
+
+def make_transcript(words: int, rng: random.Random) -> Tuple[str, List[Dict]]:
+    """
+    A transcript of about `words` words with speaker-labelled segments.
+    """
+    sentences = _seed_sentences()
+    segments, count, t = [], 0, 0.0
+    while count < words:
+        text = rng.choice(sentences)
+        n = len(text.split())
+        dur = n / WORDS_PER_SECOND
+        segments.append({"start": round(t, 2), "end": round(t + dur, 2), "text": text,
+                         "speaker": rng.choice(SPEAKERS)})
+        count += n
+        t += dur + rng.uniform(0.2, 1.5)
+    return " ".join(s["text"] for s in segments), segments
+
+
+def _seed_audio():
+    from transcribe import decode_audio
+    clips = []
+    for pattern in ("*.wav", "*.mp3", "*.webm", "*.m4a", "*.ogg"):
+        for path in sorted(glob.glob(os.path.join(SEED_DIR, pattern))):
+            try:
+                audio = decode_audio(path)
+            except Exception as e:
+                print(f"[Bench] skipping seed {os.path.basename(path)}: {e}")
+                continue
+            if audio.size:
+                clips.append(audio)
+    if not clips:
+        raise RuntimeError(f"no decodable audio seeds in {SEED_DIR}")
+    return clips
+
+
+def make_audio(seconds: float, rng: random.Random, out_dir: str, clips) -> str:
+    """
+    Write a 16 kHz mono WAV of `seconds` spliced from random 2-8 s slices
+    of the seed recordings.
+    """
+    import numpy as np
+    from transcribe import SAMPLE_RATE
+    need = int(seconds * SAMPLE_RATE)
+    parts, total = [], 0
+    while total < need:
+        clip = rng.choice(clips)
+        n = min(int(rng.uniform(2, 8) * SAMPLE_RATE), clip.size, need - total)
+        start = rng.randrange(0, clip.size - n + 1)
+        parts.append(clip[start:start + n])
+        total += n
+    pcm = (np.clip(np.concatenate(parts), -1, 1) * 32767).astype("<i2")
+    path = os.path.join(out_dir, f"bench_{int(seconds)}s.wav")
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(pcm.tobytes())
+    return path
+
+
+def _mom_sections(text: str, segments: List[Dict]) -> Tuple[Dict, Dict, Dict]:
+    metadata = {"meeting_name": "Benchmark", "date": "2024-01-01", "time": "10:00",
+                "location": "Board room", "attendees": [
+                    {"name": s, "designation": "Engineer", "email": f"{s.lower()}@example.com",
+                     "mobile": ""} for s in SPEAKERS]}
+    sections = {
+        "meeting_objective": "Benchmark run",
+        "summary": [s["text"] for s in segments[:10]],
+        "action_items": [s["text"] for s in segments if "will" in s["text"] or "should" in s["text"]],
+        "detailed_minutes": segments,
+    }
+    persons = {sp: " ".join(s["text"] for s in segments if s["speaker"] == sp)[:500] for sp in SPEAKERS}
+    return metadata, sections, persons
+
+
+# stages: each returns a zero-argument callable for one run
+
+def _stage(name: str, size: int, rng: random.Random, ctx: Dict) -> Callable[[], object]:
+    if name in AUDIO_STAGES:
+        from transcribe import transcribe_file
+        if "clips" not in ctx:
+            ctx["clips"] = _seed_audio()
+        path = make_audio(size, rng, ctx["tmp"], ctx["clips"])
+        if name == "diarize":
+            import numpy as np
+            from transcribe import SAMPLE_RATE, OnlineDiarizer, decode_audio
+            audio = decode_audio(path)
+            # 2-8 s pseudo segments over the whole recording
+            bounds = np.cumsum([0] + [rng.uniform(2, 8) for _ in range(int(size / 2) + 1)])
+            segs = [{"start": float(a), "end": float(min(b, size))} for a, b in zip(bounds, bounds[1:]) if a < size]
+            return lambda: OnlineDiarizer().label_segments(audio, [dict(s) for s in segs])
+        return lambda: transcribe_file(path, use_cache=False)
+
+    text, segments = make_transcript(size, rng)
+    if name == "chunk":
+        from nlp import chunk_sentences
+        return lambda: chunk_sentences(text)
+    if name == "summarize":
+        from nlp import safe_summarize
+        return lambda: safe_summarize(text)
+    if name == "mom":
+        from nlp import generate_mom_and_person_summaries
+        metadata = {"meeting_name": "Benchmark"}
+        return lambda: generate_mom_and_person_summaries(text, segments, metadata)
+    if name == "translate":
+        from transcribe import translate_text_if_needed
+        return lambda: translate_text_if_needed(text, ctx["translate_lang"])
+    if name == "docx":
+        from docx_render import render_mom_docx
+        metadata, sections, persons = _mom_sections(text, segments)
+        out = os.path.join(ctx["tmp"], f"bench_{size}.docx")
+        return lambda: render_mom_docx(out, metadata, sections, persons)
+    if name == "docgen":
+        from pathlib import Path
+        from docgen import create_docx_and_pdf
+        metadata, sections, persons = _mom_sections(text, segments)
+        counter = iter(range(1 << 30))
+        # unique names so the PDF service cannot answer from its de-dup table
+        return lambda: create_docx_and_pdf(f"bench_{size}_{next(counter)}", sections, metadata,
+                                           persons, Path(ctx["tmp"]))
+    raise ValueError(f"Unknown stage: {name}")
+
+
+# measurement
+
+class RssSampler:
+    """
+    Peak resident set size of this process while active (polls
+    /proc/self/statm; falls back to ru_maxrss where /proc is missing).
+    Child processes (job/summary pools, LibreOffice) are not included.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._page = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def _rss(self) -> int:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * self._page
+        except (OSError, ValueError, IndexError):
+            import resource
+            kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return kb if sys.platform == "darwin" else kb * 1024
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = self._rss()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._rss())
+
+
+def percentile(values: List[float], q: float) -> float:
+    xs = sorted(values)
+    if not xs:
+        return 0.0
+    pos = (len(xs) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(xs) - 1)
+    return xs[lo] + (xs[hi] - xs[lo]) * (pos - lo)
+
+
+def measure(fn: Callable[[], object], repeat: int, warmup: int = 1) -> Dict:
+    """
+    Run fn `warmup` times (first call timed separately: it includes model
+    loading), then `repeat` times; latencies in seconds.
+    """
+    with RssSampler() as rss:
+        t0 = time.perf_counter()
+        fn()
+        first = time.perf_counter() - t0
+        for _ in range(warmup - 1):
+            fn()
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+    return {
+        "first_s": round(first, 4),
+        "runs": len(times),
+        "p50_s": round(percentile(times, 0.50), 4),
+        "p95_s": round(percentile(times, 0.95), 4),
+        "mean_s": round(sum(times) / len(times), 4),
+        "peak_rss_mb": round(rss.peak / (1024 * 1024), 1),
+    }
+
+
+def run(stages: List[str], sizes: List[int], audio_sizes: List[int], repeat: int,
+        seed: int, translate_lang: str, tmp: str) -> Dict:
+    ctx = {"tmp": tmp, "translate_lang": translate_lang}
+    results = {}
+    for name in stages:
+        unit = "audio_s" if name in AUDIO_STAGES else "words"
+        for size in (audio_sizes if name in AUDIO_STAGES else sizes):
+            key = f"{name}@{size}"
+            # same input for a stage/size whatever else is benchmarked
+            rng = random.Random(f"{seed}:{key}")
+            try:
+                fn = _stage(name, size, rng, ctx)
+                stats = measure(fn, repeat)
+            except Exception as e:
+                print(f"[Bench] {key} skipped: {type(e).__name__}: {e}")
+                results[key] = {"stage": name, "size": size, "unit": unit, "skipped": str(e)}
+                continue
+            stats.update({"stage": name, "size": size, "unit": unit,
+                          "throughput": round(size / stats["p50_s"], 2) if stats["p50_s"] else None})
+            results[key] = stats
+            print(f"[Bench] {key}: p50 {stats['p50_s']:.3f}s  p95 {stats['p95_s']:.3f}s  "
+                  f"{stats['throughput']} {unit}/s  rss {stats['peak_rss_mb']} MB")
+    return results
+
+
+# reporting
+
+def report(results: Dict) -> str:
+    head = f"{'stage':<12}{'size':>8} {'unit':<8}{'p50 s':>9}{'p95 s':>9}{'first s':>9}{'thrpt/s':>11}{'rss MB':>9}"
+    lines = [head, "-" * len(head)]
+    for r in results.values():
+        if "skipped" in r:
+            lines.append(f"{r['stage']:<12}{r['size']:>8} {r['unit']:<8}  skipped: {r['skipped'][:60]}")
+            continue
+        lines.append(f"{r['stage']:<12}{r['size']:>8} {r['unit']:<8}{r['p50_s']:>9.3f}{r['p95_s']:>9.3f}"
+                     f"{r['first_s']:>9.3f}{r['throughput'] or 0:>11.1f}{r['peak_rss_mb']:>9.1f}")
+    return "\n".join(lines)
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> Tuple[str, List[str]]:
+    """
+    Compare p50 latency and peak RSS with a stored run. Returns the
+    report and the keys that regressed by more than `tolerance`.
+    """
+    lines = [f"{'benchmark':<20}{'base p50':>10}{'p50':>10}{'ratio':>8}{'base rss':>10}{'rss':>8}  status"]
+    regressions = []
+    for key, cur in results.items():
+        base = baseline.get(key)
+        if not base or "skipped" in base or "skipped" in cur:
+            continue
+        ratio = cur["p50_s"] / base["p50_s"] if base["p50_s"] else 1.0
+        rss_ratio = cur["peak_rss_mb"] / base["peak_rss_mb"] if base["peak_rss_mb"] else 1.0
+        status = "ok"
+        if ratio > 1 + tolerance or rss_ratio > 1 + tolerance:
+            status = "REGRESSION"
+            regressions.append(key)
+        elif ratio < 1 - tolerance:
+            status = "faster"
+        lines.append(f"{key:<20}{base['p50_s']:>10.3f}{cur['p50_s']:>10.3f}{ratio:>8.2f}"
+                     f"{base['peak_rss_mb']:>10.1f}{cur['peak_rss_mb']:>8.1f}  {status}")
+    return "\n".join(lines), regressions
+
+
+def _ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark transcription, NLP and docgen stages")
+    parser.add_argument("--stages", default=DEFAULT_STAGES,
+                        help=f"comma-separated subset of {','.join(TEXT_STAGES + AUDIO_STAGES)}")
+    parser.add_argument("--sizes", default="500,2000,8000", help="transcript sizes in words")
+    parser.add_argument("--audio-sizes", default="30,120", help="audio lengths in seconds")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--translate-lang", default="hi", help="source language for the translate stage")
+    parser.add_argument("--online", action="store_true", help="allow model downloads")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare with a results file from --save-baseline")
+    parser.add_argument("--save-baseline", help="store this run as a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before failing")
+    parser.add_argument("--keep", action="store_true", help="keep generated inputs/outputs")
+    args = parser.parse_args(argv)
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(TEXT_STAGES + AUDIO_STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    tmp = tempfile.mkdtemp(prefix="mom_bench_")
+    # must be set before any project module is imported
+    for k, v in BENCH_ENV.items():
+        os.environ.setdefault(k, v)
+    if not args.online:
+        for k, v in OFFLINE_ENV.items():
+            os.environ.setdefault(k, v)
+    os.environ["STORAGE_ROOT"] = os.path.join(tmp, "storage")
+    os.environ["TRANSCRIPT_CACHE_PATH"] = os.path.join(tmp, "transcript_cache.db")
+    sys.path.insert(0, HERE)
+
+    try:
+        results = run(stages, _ints(args.sizes), _ints(args.audio_sizes), max(1, args.repeat),
+                      args.seed, args.translate_lang, tmp)
+    finally:
+        if not args.keep:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    doc = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "models": {k: os.environ.get(k) for k in ("WHISPER_MODEL", "SUMMARIZER_MODEL")},
+        },
+        "results": results,
+    }
+    print()
+    print(report(results))
+    for path in filter(None, (args.json, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+        print(f"Results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        text, regressions = compare(results, baseline.get("results", {}), args.tolerance)
+        print()
+        print(text)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
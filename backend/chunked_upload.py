@@ -0,0 +1,314 @@
+# backend/chunked_upload.py
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+from typing import BinaryIO, Callable, Dict, List, Optional
+
+import storage
+from telemetry import log
+
+# Largest chunk accepted by PUT (clients may send smaller ones)
+MAX_CHUNK_BYTES = int(os.getenv("UPLOAD_MAX_CHUNK_MB", "16")) * 1024 * 1024
+# Start transcribing the received prefix every time it grows by this much
+PREFIX_STEP_BYTES = int(os.getenv("UPLOAD_PREFIX_STEP_MB", "8")) * 1024 * 1024
+# Audio near the end of a partial prefix is re-done on the next pass
+PREFIX_GUARD_SECONDS = 5.0
+
+
+class UploadError(Exception):
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _merge(ranges: List[List[int]], start: int, end: int) -> List[List[int]]:
+    out = []
+    for s, e in sorted(ranges + [[start, end]]):
+        if out and s <= out[-1][1]:
+            out[-1][1] = max(out[-1][1], e)
+        else:
+            out.append([s, e])
+    return out
+
+
+def _subtract(ranges: List[List[int]], start: int, end: int) -> List[List[int]]:
+    out = []
+    for s, e in ranges:
+        if e <= start or s >= end:
+            out.append([s, e])
+            continue
+        if s < start:
+            out.append([s, start])
+        if e > end:
+            out.append([end, e])
+    return out
+
+
+class UploadSession:
+    """
+    State of one resumable upload. Persisted as a JSON sidecar next to the
+    data file so an interrupted upload can resume after a restart.
+    """
+
+    FIELDS = ("id", "filename", "path", "size", "sha256", "metadata", "received",
+              "created_at", "updated_at", "status", "committed_s", "segments",
+              "language", "speakers", "prefix_submitted", "job_id")
+
+    def __init__(self, **state):
+        self.id = state["id"]
+        self.filename = state["filename"]
+        self.path = state["path"]
+        self.size = int(state["size"])
+        self.sha256 = state.get("sha256")
+        self.metadata = state.get("metadata") or {}
+        self.received: List[List[int]] = state.get("received") or []
+        self.created_at = state.get("created_at", time.time())
+        self.updated_at = state.get("updated_at", self.created_at)
+        self.status = state.get("status", "uploading")
+        # progressive transcription of the contiguous prefix
+        self.committed_s = state.get("committed_s", 0.0)
+        self.segments: List[Dict] = state.get("segments") or []
+        self.language = state.get("language")
+        # diarizer state (transcribe.OnlineDiarizer) so every pass labels speakers alike
+        self.speakers: Optional[Dict] = state.get("speakers")
+        self.prefix_submitted = state.get("prefix_submitted", 0)
+        self.job_id = state.get("job_id")
+        self.prefix_inflight = False
+        self.finalize_pending = False
+        self.lock = threading.Lock()
+
+    @property
+    def contiguous(self) -> int:
+        if self.received and self.received[0][0] == 0:
+            return self.received[0][1]
+        return 0
+
+    @property
+    def meta_path(self) -> str:
+        return self.path + ".upload.json"
+
+    def save(self) -> None:
+        self.updated_at = time.time()
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({k: getattr(self, k) for k in self.FIELDS}, f)
+        os.replace(tmp, self.meta_path)
+
+    def to_dict(self) -> Dict:
+        return {
+            "upload_id": self.id,
+            "filename": self.filename,
+            "size": self.size,
+            "received": self.received,
+            "received_bytes": sum(e - s for s, e in self.received),
+            "next_offset": self.contiguous,
+            "status": self.status,
+            "transcribed_seconds": round(self.committed_s, 2),
+            "job_id": self.job_id,
+        }
+
+
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class UploadManager:
+    """
+    init / put chunk at offset / finalize protocol.
+
+    Chunks are written straight into the preallocated destination file, so
+    nothing is buffered beyond one read block. Whenever the contiguous
+    prefix grows by PREFIX_STEP_BYTES, `submit_prefix(session, nbytes,
+    final)` is called so transcription of what has arrived can start
+    before the tail is uploaded.
+
+    Sessions survive a restart through their sidecars: `get` restores one
+    on demand and `recover` re-queues the final pass of every upload that
+    was finalized but never processed.
+    """
+
+    def __init__(self, submit_prefix: Optional[Callable] = None):
+        self.submit_prefix = submit_prefix
+        self._sessions: Dict[str, UploadSession] = {}
+        self._lock = threading.Lock()
+
+    def init(self, filename: str, size: int, sha256: Optional[str] = None,
+             metadata: Optional[Dict] = None) -> UploadSession:
+        if size <= 0:
+            raise UploadError("size must be positive")
+        upload_id = uuid.uuid4().hex
+        path = storage.upload_path(filename, prefix=upload_id)
+        with open(path, "wb") as f:
+            f.truncate(size)
+        session = UploadSession(id=upload_id, filename=filename, path=path, size=size,
+                                sha256=(sha256 or "").lower() or None, metadata=metadata)
+        session.save()
+        with self._lock:
+            self._sessions[upload_id] = session
+        return session
+
+    def paths_in_use(self) -> List[str]:
+        """
+        Data and sidecar files of uploads still arriving or awaiting their
+        final pass; the retention sweeper must leave them alone.
+        """
+        with self._lock:
+            sessions = list(self._sessions.values())
+        paths = []
+        for s in sessions:
+            if s.status in ("uploading", "complete"):
+                paths += [s.path, s.meta_path, s.meta_path + ".tmp"]
+        return paths
+
+    def _restore(self, meta_path: str) -> UploadSession:
+        with open(meta_path, encoding="utf-8") as f:
+            session = UploadSession(**json.load(f))
+        with self._lock:
+            if session.id in self._sessions:
+                return self._sessions[session.id]
+            self._sessions[session.id] = session
+        if session.status == "complete" and self.submit_prefix is not None:
+            # finalized, but the server stopped before the final pass finished
+            self.submit_prefix(session, session.size, True)
+        return session
+
+    def get(self, upload_id: str) -> UploadSession:
+        with self._lock:
+            session = self._sessions.get(upload_id)
+        if session is not None:
+            return session
+        # resume after a restart from the sidecar
+        name = os.path.basename(upload_id)
+        for entry in os.scandir(storage.UPLOAD_DIR):
+            if entry.name.startswith(name + "_") and entry.name.endswith(".upload.json"):
+                return self._restore(entry.path)
+        raise UploadError("Unknown upload", 404)
+
+    def recover(self) -> int:
+        """
+        At start-up: restore every finalized upload whose final pass never
+        finished and queue that pass again. Returns how many were queued.
+        """
+        queued = 0
+        for entry in os.scandir(storage.UPLOAD_DIR):
+            if not entry.name.endswith(".upload.json"):
+                continue
+            try:
+                with open(entry.path, encoding="utf-8") as f:
+                    state = json.load(f)
+                if state.get("status") == "complete" and state.get("id") not in self._sessions:
+                    self._restore(entry.path)
+                    queued += 1
+            except (OSError, ValueError, KeyError) as e:
+                log(f"[Upload recovery] skipping {entry.name}: {e}")
+        return queued
+
+    def put_chunk(self, upload_id: str, offset: int, stream: BinaryIO,
+                  length: int, chunk_sha256: Optional[str] = None) -> UploadSession:
+        session = self.get(upload_id)
+        if session.status != "uploading":
+            raise UploadError("Upload already finalized", 409)
+        if offset < 0 or length <= 0 or offset + length > session.size:
+            raise UploadError("Chunk outside declared size", 416)
+        if length > MAX_CHUNK_BYTES:
+            raise UploadError("Chunk too large", 413)
+
+        h = hashlib.sha256()
+        written = 0
+        with open(session.path, "r+b") as f:
+            f.seek(offset)
+            while written < length:
+                block = stream.read(min(1 << 20, length - written))
+                if not block:
+                    break
+                f.write(block)
+                h.update(block)
+                written += len(block)
+        if written != length:
+            raise UploadError("Chunk shorter than Content-Length")
+        if chunk_sha256 and h.hexdigest() != chunk_sha256.lower():
+            # the range on disk is now unreliable: mark it missing so it is re-sent
+            with session.lock:
+                session.received = _subtract(session.received, offset, offset + length)
+                session.save()
+            raise UploadError("Chunk checksum mismatch", 422)
+
+        with session.lock:
+            session.received = _merge(session.received, offset, offset + length)
+            session.save()
+        self._maybe_transcribe_prefix(session)
+        return session
+
+    def _maybe_transcribe_prefix(self, session: UploadSession) -> None:
+        if self.submit_prefix is None:
+            return
+        with session.lock:
+            grow = session.contiguous - session.prefix_submitted
+            if (session.prefix_inflight or grow <= 0 or grow < PREFIX_STEP_BYTES
+                    or session.contiguous >= session.size):
+                return
+            session.prefix_inflight = True
+            session.prefix_submitted = session.contiguous
+        self.submit_prefix(session, session.contiguous, False)
+
+    def prefix_done(self, session: UploadSession, result: Dict) -> None:
+        """
+        Record a finished prefix pass; called from the job's on_done.
+        """
+        with session.lock:
+            session.segments.extend(result["segments"])
+            session.committed_s = result["committed_s"]
+            session.language = result["language"]
+            session.speakers = result.get("speakers")
+            session.prefix_inflight = False
+            session.save()
+            finalize = session.finalize_pending
+        if finalize:
+            self.submit_prefix(session, session.size, True)
+        else:
+            self._maybe_transcribe_prefix(session)
+
+    def prefix_skipped(self, session: UploadSession) -> None:
+        """
+        A prefix pass could not be queued or failed; its audio is left to
+        a later pass, and a finalize that waited for it goes ahead.
+        """
+        with session.lock:
+            session.prefix_inflight = False
+            finalize = session.finalize_pending
+        if finalize:
+            self.submit_prefix(session, session.size, True)
+
+    def finalize(self, upload_id: str, run: Optional[Callable] = None) -> UploadSession:
+        """
+        Check the whole file and queue its final pass. `run(fn, *args)`
+        executes the whole-file hash (e.g. on eventlet's tpool); it
+        defaults to a direct call.
+        """
+        session = self.get(upload_id)
+        if session.status != "uploading":
+            return session
+        if session.contiguous < session.size:
+            raise UploadError(f"Missing data from offset {session.contiguous}", 409)
+        if session.sha256:
+            digest = (run or (lambda fn, *args: fn(*args)))(_file_sha256, session.path)
+            if digest != session.sha256:
+                session.status = "corrupt"
+                session.save()
+                raise UploadError("File checksum mismatch", 422)
+
+        with session.lock:
+            session.status = "complete"
+            session.save()
+            # let an in-flight prefix pass finish first; its on_done finalizes
+            session.finalize_pending = session.prefix_inflight
+        if not session.finalize_pending and self.submit_prefix is not None:
+            self.submit_prefix(session, session.size, True)
+        return session
@@ -0,0 +1,233 @@
+# backend/docx_render.py
+import io
+import re
+import zipfile
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional
+from xml.sax.saxutils import escape
+
+from docx import Document
+
+# Characters Word refuses inside XML text (python-docx raises on them)
+_INVALID_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_FIELDS = ("meeting_name", "date", "time", "minutes_prepared_by", "location",
+           "meeting_objective", "coordinated_by")
+_BLOCKS = ("attendance", "summary", "action_items", "detailed_minutes", "person_summaries")
+_CELLS = ("name", "designation", "email", "mobile")
+
+_T_OPEN = '<w:t xml:space="preserve">'
+
+# "minutes": docgen.create_docx_and_pdf (inline coordinator, bold timestamps)
+# "upload": app.create_mom_docx (coordinator heading, plain timestamps)
+LAYOUTS = ("minutes", "upload")
+
+
+def _marker(name: str) -> str:
+    return f"@@{name}@@"
+
+
+def _text(value) -> str:
+    """
+    Escape a value for use inside <w:t>, turning tabs and newlines into
+    the same <w:tab/> / <w:br/> elements python-docx would emit.
+    """
+    s = escape(_INVALID_XML.sub("", "" if value is None else str(value)))
+    return (s.replace("\t", f"</w:t><w:tab/>{_T_OPEN}")
+             .replace("\n", f"</w:t><w:br/>{_T_OPEN}"))
+
+
+def _paragraph(text: str) -> str:
+    return f"<w:p><w:r>{_T_OPEN}{_text(text)}</w:t></w:r></w:p>"
+
+
+def _bold_lead_paragraph(lead: str, text: str) -> str:
+    return (f"<w:p><w:r><w:rPr><w:b/></w:rPr>{_T_OPEN}{_text(lead)}</w:t></w:r>"
+            f"<w:r>{_T_OPEN}{_text(text)}</w:t></w:r></w:p>")
+
+
+def _enclosing(xml: str, marker: str, open_tag: str, close_tag: str):
+    i = xml.index(marker)
+    start = max(xml.rfind(open_tag + ">", 0, i), xml.rfind(open_tag + " ", 0, i))
+    end = xml.index(close_tag, i) + len(close_tag)
+    return start, end
+
+
+class _Template:
+    """
+    The MoM layout built once with python-docx, then split into static XML
+    fragments around the field markers and repeated blocks.
+    """
+
+    def __init__(self, layout: str = "minutes"):
+        self.layout = layout
+        doc = Document()
+        doc.add_heading("Minutes of the Meeting", level=1)
+        doc.add_paragraph(f"Meeting Name: {_marker('meeting_name')}")
+        doc.add_paragraph(f"Date of Meeting: {_marker('date')}\t Time: {_marker('time')}")
+        doc.add_paragraph(f"Minutes Prepared By: {_marker('minutes_prepared_by')}")
+        doc.add_paragraph(f"Location: {_marker('location')}")
+        doc.add_paragraph("")
+
+        doc.add_heading("1. Meeting Objective", level=2)
+        doc.add_paragraph(_marker("meeting_objective"))
+
+        doc.add_paragraph("")
+        if layout == "upload":
+            doc.add_heading("2. Coordinated by", level=2)
+            doc.add_paragraph(_marker("coordinated_by"))
+        else:
+            doc.add_paragraph(f"2. Coordinated by: {_marker('coordinated_by')}")
+
+        doc.add_paragraph("")
+        doc.add_heading("3. Attendance at Meeting", level=2)
+        doc.add_paragraph(_marker("attendance"))
+        table = doc.add_table(rows=2, cols=4)
+        for cell, title in zip(table.rows[0].cells, ("Name", "Designation/Department", "E-mail", "Mobile No.")):
+            cell.text = title
+        for cell, name in zip(table.rows[1].cells, _CELLS):
+            cell.text = _marker("cell_" + name)
+
+        doc.add_paragraph("")
+        doc.add_heading("Summary", level=2)
+        doc.add_paragraph(_marker("summary"))
+
+        doc.add_paragraph("")
+        doc.add_heading("Action Items / Decisions", level=2)
+        doc.add_paragraph(_marker("action_items"))
+
+        doc.add_paragraph("")
+        doc.add_heading("Detailed Minutes", level=2)
+        doc.add_paragraph(_marker("detailed_minutes"))
+
+        doc.add_paragraph("")
+        doc.add_heading("Person-wise Summary", level=2)
+        doc.add_paragraph(_marker("person_summaries"))
+
+        buf = io.BytesIO()
+        doc.save(buf)
+        self._load(buf.getvalue())
+
+    def _load(self, package: bytes) -> None:
+        self.parts = []
+        with zipfile.ZipFile(io.BytesIO(package)) as z:
+            for info in z.infolist():
+                if info.filename == "word/document.xml":
+                    xml = z.read(info).decode("utf-8")
+                else:
+                    self.parts.append((info.filename, z.read(info)))
+        xml = xml.replace("<w:t>", _T_OPEN)
+
+        # attendee table: keep the header row, turn the marker row into a row template
+        t_start, t_end = _enclosing(xml, _marker("cell_name"), "<w:tbl", "</w:tbl>")
+        table = xml[t_start:t_end]
+        r_start, r_end = _enclosing(table, _marker("cell_name"), "<w:tr", "</w:tr>")
+        self.table_head = table[:r_start]
+        self.table_row = table[r_start:r_end]
+        self.table_tail = table[r_end:]
+        xml = xml[:t_start] + _marker("table") + xml[t_end:]
+
+        # block markers replace their whole placeholder paragraph
+        for name in _BLOCKS:
+            p_start, p_end = _enclosing(xml, _marker(name), "<w:p", "</w:p>")
+            xml = xml[:p_start] + _marker(name) + xml[p_end:]
+        # the attendance paragraph marker and the table sit next to each other
+        xml = xml.replace(_marker("attendance") + _marker("table"), _marker("attendance"))
+
+        # split into static text / marker names for fast streaming
+        self.pieces = re.split(r"@@(\w+)@@", xml)
+
+
+_templates: Dict[str, _Template] = {}
+_template_lock = threading.Lock()
+
+
+def _get_template(layout: str) -> _Template:
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown MoM layout: {layout}")
+    with _template_lock:
+        if layout not in _templates:
+            _templates[layout] = _Template(layout)
+        return _templates[layout]
+
+
+def _attendance(tpl: _Template, attendees: List) -> Iterator[str]:
+    if not attendees:
+        yield _paragraph("No attendees provided.")
+        return
+    if not isinstance(attendees[0], dict):
+        # plain list of names
+        yield _paragraph(", ".join(str(a) for a in attendees))
+        return
+    yield tpl.table_head
+    for a in attendees:
+        row = tpl.table_row
+        for name in _CELLS:
+            row = row.replace(_marker("cell_" + name), _text(a.get(name, "")))
+        yield row
+    yield tpl.table_tail
+
+
+def _blocks(tpl: _Template, metadata: Dict, mom_sections: Dict,
+            person_summaries: Dict) -> Dict[str, Iterable[str]]:
+    summary = mom_sections.get("summary", "")
+    summary_lines = summary if isinstance(summary, list) else [summary]
+
+    def minutes():
+        for seg in mom_sections.get("detailed_minutes", []):
+            speaker = seg.get("speaker") or ""
+            start = seg.get("start") or 0.0
+            if tpl.layout == "upload":
+                yield _paragraph(f"[{start:.2f}] {speaker} - {seg.get('text', '')}")
+            else:
+                yield _bold_lead_paragraph(f"[{start:.2f}] {speaker} - ", seg.get("text", ""))
+
+    return {
+        "attendance": _attendance(tpl, metadata.get("attendees", [])),
+        "summary": (_paragraph(s) for s in summary_lines),
+        "action_items": (_paragraph(f"{idx}. {act}")
+                         for idx, act in enumerate(mom_sections.get("action_items", []), 1)),
+        "detailed_minutes": minutes(),
+        "person_summaries": (_paragraph(f"{sp}: {summ}") for sp, summ in person_summaries.items()),
+    }
+
+
+def render_mom_docx(out, metadata: Dict, mom_sections: Dict,
+                    person_summaries: Optional[Dict] = None, default: str = "",
+                    layout: str = "minutes") -> None:
+    """
+    Write the MoM document to `out` (path or binary file object).
+
+    The static layout comes from a python-docx template built once per
+    process; only the repeated sections (attendee rows, action items,
+    detailed minutes, person-wise summaries) are generated as
+    WordprocessingML and streamed straight into the zip entry.
+    `default` is used for missing metadata fields; `layout` is one of
+    LAYOUTS.
+    """
+    tpl = _get_template(layout)
+    fields = {name: metadata.get(name, default) for name in _FIELDS}
+    fields["meeting_objective"] = mom_sections.get("meeting_objective", default)
+    blocks = _blocks(tpl, metadata, mom_sections, person_summaries or {})
+
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as z:
+        for name, data in tpl.parts:
+            if name == "[Content_Types].xml":
+                z.writestr(name, data)
+        with z.open("word/document.xml", "w") as f:
+            for i, piece in enumerate(tpl.pieces):
+                if i % 2 == 0:
+                    f.write(piece.encode("utf-8"))
+                elif piece in blocks:
+                    buf = []
+                    for xml in blocks[piece]:
+                        buf.append(xml)
+                        if len(buf) >= 256:
+                            f.write("".join(buf).encode("utf-8"))
+                            buf = []
+                    f.write("".join(buf).encode("utf-8"))
+                else:
+                    f.write(_text(fields.get(piece, "")).encode("utf-8"))
+        for name, data in tpl.parts:
+            if name != "[Content_Types].xml":
+                z.writestr(name, data)
@@ -0,0 +1,336 @@
+# backend/jobs.py
+import os
+import time
+import uuid
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional
+
+from transcript_cache import get_cache
+from transcribe import (DIARIZATION, SAMPLE_RATE, OnlineDiarizer, decode_audio, decode_prefix, get_asr,
+                        transcribe_array, transcribe_file)
+from telemetry import get_request_id, log, metrics, reset_request_id, set_request_id, span
+
+# Jobs queued or running before new uploads are turned away, and the
+# Retry-After hint given to them
+MAX_PENDING_JOBS = int(os.getenv("MAX_PENDING_JOBS", "32"))
+QUEUE_RETRY_AFTER_SECONDS = int(os.getenv("QUEUE_RETRY_AFTER_SECONDS", "30"))
+
+# Per-process state for pool workers (set by _init_worker)
+_worker_progress = None
+
+
+class QueueFull(Exception):
+    """
+    Raised by JobQueue.submit_call when max_pending jobs are already waiting.
+    """
+
+    def __init__(self, pending: int, retry_after: int = QUEUE_RETRY_AFTER_SECONDS):
+        super().__init__(f"Transcription queue is full ({pending} jobs pending)")
+        self.pending = pending
+        self.retry_after = retry_after
+
+
+def _init_worker(model_name: str, progress_queue) -> None:
+    """
+    Runs once in every pool process: load the ASR engine so each worker
+    keeps its own model resident between jobs (transcribe_file uses the
+    same registry entry).
+    """
+    global _worker_progress
+    _worker_progress = progress_queue
+    # spans and counters recorded here are applied by the parent's poll()
+    metrics.set_sink(lambda update: progress_queue.put_nowait((None, "metric", update)))
+    log(f"[worker {os.getpid()}] Loading ASR model '{model_name}'...")
+    get_asr(model_name)
+    log(f"[worker {os.getpid()}] ASR model loaded.")
+
+
+def _run_job(fn: Callable, request_id: Optional[str], job_id: str, *args):
+    """
+    Worker-side wrapper: carries the submitting request's id into the
+    worker's log lines and spans.
+    """
+    token = set_request_id(request_id or job_id)
+    try:
+        with span("job", fn=fn.__name__):
+            return fn(job_id, *args)
+    finally:
+        reset_request_id(token)
+
+
+def _report(job_id: str, status: str, progress: int) -> None:
+    if _worker_progress is None:
+        return
+    try:
+        _worker_progress.put_nowait((job_id, status, progress))
+    except Exception:
+        pass
+
+
+def _transcribe_job(job_id: str, filepath: str, cache_key: Optional[str] = None) -> Dict:
+    """
+    Executed inside a pool worker. Returns a picklable result dict.
+    If cache_key is given the transcript is stored in the transcript cache.
+    """
+    _report(job_id, "running", 10)
+    # in-memory decode + VAD pre-filter; the web process already checked the cache
+    text, segments, language = transcribe_file(filepath, use_cache=False)
+    _report(job_id, "transcribed", 80)
+
+    if cache_key:
+        try:
+            get_cache().put(cache_key, text, segments, language)
+        except Exception as e:
+            log(f"[worker {os.getpid()}] Transcript cache write failed: {e}")
+
+    return {
+        "text": text,
+        "segments": segments,
+        "language": language,
+    }
+
+
+def transcribe_prefix_job(job_id: str, filepath: str, nbytes: int, start_s: float,
+                           guard_s: float, language: Optional[str],
+                           speakers: Optional[Dict] = None) -> Dict:
+    """
+    Transcribe the audio in the first `nbytes` of a file that may still be
+    uploading, from start_s on. Segments ending within guard_s of the end
+    of the decoded prefix are left for the next pass (the cut may fall
+    mid-word); guard_s=0 finalizes everything. `speakers` is the previous
+    pass's diarizer state; the updated state is returned with the result.
+    """
+    _report(job_id, "running", 10)
+    if nbytes >= os.path.getsize(filepath):
+        # the whole file is there: decode it by path, so ffmpeg can seek (an
+        # MP4/M4A with its index at the end cannot be read from a pipe)
+        audio = decode_audio(filepath)
+    else:
+        audio = decode_prefix(filepath, nbytes)
+    end_s = audio.size / SAMPLE_RATE
+    _, segments, language = transcribe_array(audio[int(start_s * SAMPLE_RATE):],
+                                             offset_s=start_s, language=language, diarize=False)
+    _report(job_id, "transcribed", 80)
+
+    if guard_s > 0:
+        segments = [s for s in segments if s["end"] <= end_s - guard_s]
+        committed_s = segments[-1]["end"] if segments else start_s
+    else:
+        committed_s = end_s
+    # label only what is committed, so the next pass doesn't count it twice
+    if DIARIZATION:
+        diarizer = OnlineDiarizer.from_state(speakers)
+        diarizer.label_segments(audio, segments)
+        speakers = diarizer.state()
+    return {"segments": segments, "committed_s": committed_s, "language": language, "speakers": speakers}
+
+
+class JobQueue:
+    """
+    Bounded pool of transcription worker processes.
+
+    Jobs are submitted from request handlers and return immediately;
+    `poll()` must be called periodically from the web process (see
+    `run_forever`) to collect progress and finished results.
+    """
+
+    def __init__(self, workers: int, model_name: str,
+                 on_update: Optional[Callable[[Dict], None]] = None,
+                 max_pending: int = MAX_PENDING_JOBS):
+        self.workers = max(1, workers)
+        self.model_name = model_name
+        self.on_update = on_update
+        self.max_pending = max(1, max_pending)
+
+        # spawn: never fork an eventlet-patched interpreter
+        self._ctx = multiprocessing.get_context("spawn")
+        self._progress = self._ctx.Queue()
+        self._executor = None
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict] = {}
+        self._futures: Dict[str, object] = {}
+        self._callbacks: Dict[str, Callable] = {}
+        self._error_callbacks: Dict[str, Callable] = {}
+        self._inputs: Dict[str, str] = {}  # job id -> file the pending job reads
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=self._ctx,
+                initializer=_init_worker,
+                initargs=(self.model_name, self._progress),
+            )
+        return self._executor
+
+    def submit(self, filepath: str, job_id: Optional[str] = None,
+               on_done: Optional[Callable[[Dict, Dict], Dict]] = None,
+               cache_key: Optional[str] = None, **info) -> str:
+        """
+        Queue `filepath` for transcription and return the job id.
+        `on_done(job, result)` runs in the web process once the worker
+        finishes and may return the payload stored as the job result.
+        """
+        return self.submit_call(_transcribe_job, (filepath, cache_key), job_id=job_id,
+                                on_done=on_done, input_path=filepath, **info)
+
+    def submit_call(self, fn: Callable, args: tuple, job_id: Optional[str] = None,
+                    on_done: Optional[Callable[[Dict, Dict], Dict]] = None,
+                    bounded: bool = True, input_path: Optional[str] = None,
+                    on_error: Optional[Callable[[Dict, Exception], None]] = None, **info) -> str:
+        """
+        Queue any module-level worker function, called as fn(job_id, *args).
+        Raises QueueFull when max_pending jobs are pending; bounded=False
+        is for work already admitted (e.g. the last pass of an upload).
+        `input_path` is reported by input_paths() until the job finishes.
+        `on_error(job, exc)` runs in the web process if the worker or
+        on_done raised.
+        """
+        job_id = job_id or uuid.uuid4().hex
+        now = time.time()
+        job = {
+            "id": job_id,
+            "status": "queued",
+            "progress": 0,
+            "created_at": now,
+            "updated_at": now,
+            "result": None,
+            "error": None,
+        }
+        job.update(info)
+        job.setdefault("request_id", get_request_id())
+
+        with self._lock:
+            if bounded and len(self._futures) >= self.max_pending:
+                raise QueueFull(len(self._futures))
+            self._jobs[job_id] = job
+            if on_done:
+                self._callbacks[job_id] = on_done
+            if on_error:
+                self._error_callbacks[job_id] = on_error
+            call = (_run_job, fn, job["request_id"], job_id) + tuple(args)
+            try:
+                future = self._get_executor().submit(*call)
+            except BrokenProcessPool:
+                # a worker died; start a fresh pool and retry once
+                self._executor = None
+                future = self._get_executor().submit(*call)
+            self._futures[job_id] = future
+            if input_path:
+                self._inputs[job_id] = input_path
+
+        self._notify(job)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._futures)
+
+    def full(self) -> bool:
+        return self.pending() >= self.max_pending
+
+    def input_paths(self) -> List[str]:
+        """
+        Files read by jobs that have not finished yet.
+        """
+        with self._lock:
+            return list(self._inputs.values())
+
+    def _update(self, job_id: str, **fields) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return None
+            job.update(fields)
+            job["updated_at"] = time.time()
+            return dict(job)
+
+    def _notify(self, job: Optional[Dict]) -> None:
+        if job and self.on_update:
+            try:
+                self.on_update(job)
+            except Exception as e:
+                log(f"[Job notify error] {e}")
+
+    def poll(self) -> None:
+        """
+        Drain worker progress messages and finalize completed futures.
+        Never blocks, so it is safe to call from an eventlet green thread.
+        """
+        while True:
+            try:
+                job_id, status, progress = self._progress.get_nowait()
+            except queue.Empty:
+                break
+            except Exception:
+                break
+            if job_id is None and status == "metric":
+                metrics.apply(progress)
+                continue
+            self._notify(self._update(job_id, status=status, progress=progress))
+
+        with self._lock:
+            finished = [(jid, f) for jid, f in self._futures.items() if f.done()]
+            for jid, _ in finished:
+                del self._futures[jid]
+                self._inputs.pop(jid, None)
+
+        for job_id, future in finished:
+            callback = self._callbacks.pop(job_id, None)
+            on_error = self._error_callbacks.pop(job_id, None)
+            job = self.get(job_id) or {}
+            token = set_request_id(job.get("request_id"))
+            try:
+                result = future.result()
+                if callback:
+                    result = callback(job, result)
+                job = self._update(job_id, status="done", progress=100, result=result)
+            except Exception as e:
+                log(f"[Job {job_id} error] {e}")
+                job = self._update(job_id, status="failed", error=str(e))
+                if on_error:
+                    try:
+                        on_error(job or {}, e)
+                    except Exception as cb_error:
+                        log(f"[Job {job_id} on_error failed] {cb_error}")
+            finally:
+                reset_request_id(token)
+            if job:
+                metrics.observe("mom_job_seconds", time.time() - job["created_at"], status=job["status"])
+            self._notify(job)
+
+    def run_forever(self, sleep: Callable[[float], None], interval: float = 0.5) -> None:
+        """
+        Poll loop for a background task, e.g.
+        socketio.start_background_task(jobs.run_forever, socketio.sleep)
+        """
+        while True:
+            self.poll()
+            self.purge()
+            sleep(interval)
+
+    def purge(self, max_age: float = 3600) -> List[str]:
+        """
+        Forget finished jobs older than max_age seconds.
+        """
+        cutoff = time.time() - max_age
+        with self._lock:
+            stale = [jid for jid, j in self._jobs.items()
+                     if j["status"] in ("done", "failed") and j["updated_at"] < cutoff]
+            for jid in stale:
+                del self._jobs[jid]
+        return stale
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
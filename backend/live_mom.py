@@ -0,0 +1,142 @@
+# backend/live_mom.py
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from action_items import get_extractor, sentence_spans
+from nlp import MOM_SUMMARY_LENGTHS, assemble_mom, chunk_sentences, summarize_many
+from telemetry import span
+
+# Same chunk size as the one-shot MoM (nlp._mom_requests)
+LIVE_CHUNK_CHARS = 900
+
+
+class LiveMomSession:
+    """
+    Minutes of a live meeting, built up as finalized segments arrive.
+
+    Text is packed into sentence chunks as it comes in; only chunks that
+    are complete (a later sentence no longer fits) are summarized. Complete
+    chunks never change, so summaries are kept by chunk index and a refresh
+    only looks at chunks past the last summarized one. Action
+    items are extracted from newly completed sentences only. append() and
+    summarize() return deltas for the client; finish() returns the full MoM.
+    """
+
+    def __init__(self, metadata: Optional[Dict] = None, chunk_chars: int = LIVE_CHUNK_CHARS):
+        self.metadata = dict(metadata or {})
+        self.chunk_chars = chunk_chars
+        self.extractor = get_extractor(self.metadata.get("organization"))
+
+        self.segments: List[Dict] = []
+        self.text = ""
+        self.scanned = 0          # offset in text up to which action items were extracted
+        self.chunks: List[str] = []
+        self.pending = ""         # text of the chunk still being filled
+        self.action_items: List[Dict] = []
+        self.summaries: List[str] = []  # summaries of chunks[:len(summaries)]
+        self.pending_summary: Optional[Tuple[str, str]] = None  # (open chunk, summary) when final
+        self.sent_points = 0      # chunk summaries already pushed to the client
+        self.version = 0
+        self._summarizing = threading.Lock()
+
+    def _scan(self, final: bool) -> List[Dict]:
+        # the last sentence may still be growing unless the session is over
+        tail = self.text[self.scanned:]
+        spans = sentence_spans(tail)
+        if not final:
+            spans = spans[:-1]
+        if not spans:
+            return []
+        items = self.extractor.extract(tail, spans)
+        self.scanned += spans[-1][1]
+        self.action_items.extend(items)
+        return items
+
+    def append(self, segments: List[Dict]) -> Optional[Dict]:
+        """
+        Add finalized segments; returns {"version", "minutes", "action_items"}
+        with only what is new, or None if nothing was added.
+        """
+        minutes = []
+        for seg in segments or []:
+            text = (seg.get("text") or "").strip()
+            if not text:
+                continue
+            minutes.append({"start": seg.get("start"), "end": seg.get("end"),
+                            "text": text, "speaker": seg.get("speaker")})
+        if not minutes:
+            return None
+        self.segments.extend(minutes)
+        added = " ".join(m["text"] for m in minutes)
+        self.text = f"{self.text} {added}" if self.text else added
+
+        # re-pack only the open chunk; everything before its last piece is complete
+        packed = chunk_sentences(f"{self.pending} {added}".strip(), max_chars=self.chunk_chars)
+        self.chunks.extend(packed[:-1])
+        self.pending = packed[-1] if packed else ""
+
+        self.version += 1
+        return {"version": self.version, "minutes": minutes, "action_items": self._scan(final=False)}
+
+    def _pending_summarized(self) -> bool:
+        return self.pending_summary is not None and self.pending_summary[0] == self.pending
+
+    def unsummarized(self, final: bool = False) -> List[str]:
+        todo = self.chunks[len(self.summaries):]
+        if final and self.pending and not self._pending_summarized():
+            todo.append(self.pending)
+        return todo
+
+    def summarize(self, run: Optional[Callable] = None, final: bool = False,
+                  wait: bool = False) -> Optional[Dict]:
+        """
+        Summarize the chunks completed since the last call (plus the open
+        chunk when final). `run(fn, *args)` lets the caller move the model
+        call off the event loop. Returns {"version", "summary_points",
+        "summary"} or None if there was nothing new (or another summarize
+        is running and wait is False).
+        """
+        if not self._summarizing.acquire(blocking=wait):
+            return None
+        try:
+            # chunks only grow at the end, so indices stay valid while the
+            # model runs and append() keeps adding
+            complete = len(self.chunks) - len(self.summaries)
+            todo = self.unsummarized(final)
+            if todo:
+                max_len, min_len = MOM_SUMMARY_LENGTHS
+                run = run or (lambda fn, *a, **kw: fn(*a, **kw))
+                with span("live_mom_summarize", chunks=len(todo)):
+                    out = run(summarize_many, [(c, max_len, min_len) for c in todo])
+                self.summaries.extend(out[:complete])
+                if len(out) > complete:
+                    self.pending_summary = (todo[-1], out[-1])
+            points = self.points(final)
+            new_points = points[self.sent_points:]
+            if not new_points:
+                return None
+            self.sent_points = len(points)
+            self.version += 1
+            return {"version": self.version, "summary_points": new_points,
+                    "summary": " ".join(points)}
+        finally:
+            self._summarizing.release()
+
+    def points(self, final: bool = False) -> List[str]:
+        """
+        Summaries of the completed chunks (and the open one when final), in order.
+        """
+        summaries = list(self.summaries)
+        if final and self.pending and len(summaries) == len(self.chunks) and self._pending_summarized():
+            summaries.append(self.pending_summary[1])
+        return [s for s in summaries if s]
+
+    def finish(self, run: Optional[Callable] = None) -> Dict:
+        """
+        Flush the open chunk and the last sentence; returns the full MoM in
+        the same shape as nlp.generate_mom_content.
+        """
+        self._scan(final=True)
+        self.summarize(run=run, final=True, wait=True)
+        return assemble_mom(self.text, self.segments, self.metadata, self.points(final=True),
+                            details=self.action_items)
@@ -0,0 +1,173 @@
+# backend/models.py
+import os
+import time
+import threading
+from typing import Callable, Dict, List, Optional
+
+from telemetry import log, span
+
+# Single Whisper size shared by the web process, workers and transcribe.py
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+SUMMARIZER_MODEL = os.getenv("SUMMARIZER_MODEL", "sshleifer/distilbart-cnn-12-6")
+# Sentence embeddings for semantic search over the meeting archive
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+# Comma-separated models to load at startup, e.g. "asr,summarizer"
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "")
+# Older warm-up names: Whisper is owned by the configured ASR engine
+_WARMUP_ALIASES = {"whisper": "asr"}
+# Unload models unused for this many seconds (0 = keep forever)
+MODEL_IDLE_TTL = float(os.getenv("MODEL_IDLE_TTL", "0"))
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of lazily loaded models.
+
+    Each model is registered with a loader and only built on the first
+    `get()`. Concurrent first calls load it once (per-name lock). Models
+    idle for longer than `ttl` seconds are dropped by `sweep()`.
+    """
+
+    def __init__(self, ttl: float = MODEL_IDLE_TTL):
+        self.ttl = ttl
+        self._loaders: Dict[str, Callable[[], object]] = {}
+        self._models: Dict[str, object] = {}
+        self._last_used: Dict[str, float] = {}
+        self._load_seconds: Dict[str, float] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+
+    def register(self, name: str, loader: Callable[[], object]) -> None:
+        with self._lock:
+            self._loaders.setdefault(name, loader)
+            self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name: str):
+        model = self._models.get(name)
+        if model is None:
+            lock = self._locks.get(name)
+            if lock is None:
+                raise KeyError(f"Unknown model: {name}")
+            with lock:
+                model = self._models.get(name)
+                if model is None:
+                    log(f"Loading model '{name}'...")
+                    t0 = time.time()
+                    with span("model_load", model=name):
+                        model = self._loaders[name]()
+                    self._load_seconds[name] = time.time() - t0
+                    self._models[name] = model
+                    log(f"Model '{name}' loaded in {self._load_seconds[name]:.1f}s")
+        self._last_used[name] = time.time()
+        return model
+
+    def touch(self, name: str) -> None:
+        """
+        Mark a loaded model as used by a caller that holds on to it.
+        """
+        if name in self._models:
+            self._last_used[name] = time.time()
+
+    def unload(self, name: str) -> bool:
+        lock = self._locks.get(name)
+        if lock is None:
+            return False
+        with lock:
+            model = self._models.pop(name, None)
+        if model is None:
+            return False
+        del model
+        try:
+            import gc
+            gc.collect()
+        except Exception:
+            pass
+        log(f"Unloaded idle model '{name}'")
+        return True
+
+    def sweep(self) -> List[str]:
+        """
+        Unload every model unused for longer than ttl seconds.
+        """
+        if self.ttl <= 0:
+            return []
+        cutoff = time.time() - self.ttl
+        idle = [n for n in list(self._models) if self._last_used.get(n, 0) < cutoff]
+        return [n for n in idle if self.unload(n)]
+
+    def warmup(self, names: List[str]) -> None:
+        for name in names:
+            try:
+                self.get(name)
+            except Exception as e:
+                log(f"[Warm-up error] {name}: {e}")
+
+    def start_reaper(self, interval: float = 60.0,
+                     sleep: Callable[[float], None] = time.sleep) -> None:
+        """
+        Run sweep() periodically on a daemon thread (no-op without a ttl).
+        """
+        if self.ttl <= 0 or self._reaper is not None:
+            return
+
+        def loop():
+            while True:
+                sleep(interval)
+                self.sweep()
+
+        self._reaper = threading.Thread(target=loop, daemon=True)
+        self._reaper.start()
+
+    def loaded(self) -> List[str]:
+        return list(self._models)
+
+    def load_times(self) -> Dict[str, float]:
+        return dict(self._load_seconds)
+
+
+registry = ModelRegistry()
+
+
+def load_whisper(name: Optional[str] = None):
+    """
+    A fresh openai-whisper model. Not registered here: the ASR engine that
+    wraps it (transcribe.get_asr) is the registry entry.
+    """
+    import whisper
+    return whisper.load_model(name or WHISPER_MODEL)
+
+
+def _load_summarizer():
+    from transformers import pipeline
+    # Summarizer pipeline (lightweight). We enable truncation safety.
+    return pipeline("summarization", model=SUMMARIZER_MODEL, truncation=True)
+
+
+def _load_embedder():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBEDDING_MODEL, device="cpu")
+
+
+registry.register("summarizer", _load_summarizer)
+registry.register("embedder", _load_embedder)
+
+
+def get_summarizer():
+    return registry.get("summarizer")
+
+
+def get_embedder():
+    return registry.get("embedder")
+
+
+def warmup(names: Optional[List[str]] = None) -> None:
+    """
+    Opt-in eager loading, e.g. MODEL_WARMUP=asr,summarizer ("asr" is the
+    engine selected by ASR_ENGINE; registered when transcribe is imported).
+    """
+    if names is None:
+        names = [n.strip() for n in MODEL_WARMUP.split(",") if n.strip()]
+    names = list(dict.fromkeys(_WARMUP_ALIASES.get(n, n) for n in names))
+    registry.warmup(names)
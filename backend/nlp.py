@@ -1,19 +1,34 @@
 # backend/nlp.py
-from typing import List, Dict
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Tuple
 import nltk
 from nltk.tokenize import sent_tokenize
-from transformers import pipeline
 import math
+from models import get_summarizer
+from telemetry import span
+from action_items import get_extractor, sentence_spans, split_sentences
 
 nltk.download('punkt', quiet=True)
 
-# Summarizer pipeline (lightweight). We enable truncation safety.
-# Using sshleifer/distilbart-cnn-12-6 (small) as before for speed.
-summarizer = pipeline(
-    "summarization",
-    model="sshleifer/distilbart-cnn-12-6",
-    truncation=True
-)
+# Summarizer pipeline (sshleifer/distilbart-cnn-12-6) is loaded lazily
+# through the shared model registry; see models.get_summarizer.
+
+# Number of chunks sent through the summarizer per forward pass
+SUMMARY_BATCH_SIZE = int(os.getenv("SUMMARY_BATCH_SIZE", "8"))
+
+# (max_length, min_length) used for the overall and per-person summaries
+MOM_SUMMARY_LENGTHS = (120, 20)
+PERSON_SUMMARY_LENGTHS = (80, 12)
+
+# Hierarchical (map-reduce) summarization for long meetings
+HIERARCHICAL_SUMMARY = os.getenv("HIERARCHICAL_SUMMARY", "0") == "1"
+SUMMARY_TARGET_CHARS = int(os.getenv("SUMMARY_TARGET_CHARS", "1500"))
+SUMMARY_LEVEL_TOKENS = int(os.getenv("SUMMARY_LEVEL_TOKENS", "512"))
+SUMMARY_MAX_LEVELS = int(os.getenv("SUMMARY_MAX_LEVELS", "4"))
+SUMMARY_WORKERS = int(os.getenv("SUMMARY_WORKERS", "0"))  # 0/1 = in-process
 
 def chunk_sentences(text: str, max_chars: int = 900) -> List[str]:
     """
@@ -46,59 +61,196 @@ def safe_summarize(text: str, max_length: int = 120, min_length: int = 20) -> st
     if not text or text.isspace():
         return ""
     try:
-        out = summarizer(text, max_length=max_length, min_length=min_length, truncation=True, do_sample=False)
+        out = get_summarizer()(text, max_length=max_length, min_length=min_length, truncation=True, do_sample=False)
         return out[0]['summary_text']
     except Exception as e:
         # fallback: shorten and retry
         try:
             short = text[:800]
-            out = summarizer(short, max_length=max_length, min_length=min_length, truncation=True, do_sample=False)
+            out = get_summarizer()(short, max_length=max_length, min_length=min_length, truncation=True, do_sample=False)
             return out[0]['summary_text']
         except Exception as e2:
             # last resort: return first 1-2 sentences as "summary"
             sents = sent_tokenize(text)
             return " ".join(sents[:2]) if sents else text[:200]
 
-def generate_mom_content(text: str, segments: List[Dict], metadata: Dict) -> Dict:
+def summarize_many(requests: List[Tuple[str, int, int]],
+                   batch_size: int = SUMMARY_BATCH_SIZE) -> List[str]:
     """
-    Returns structured MoM content:
-      - meeting_objective (from metadata)
-      - summary (safe concatenated summary)
-      - action_items (heuristic extraction)
-      - detailed_minutes (mirrors incoming segments)
-    Designed to work with both full transcripts and small incremental (live) transcripts.
+    Summarize many (text, max_length, min_length) requests at once.
+      - identical requests are summarized only once
+      - requests are grouped by length settings and sorted by text length
+        so each batch pads as little as possible
+      - results are scattered back in input order
+    A batch that fails falls back to safe_summarize item by item.
     """
-    # Defensive defaults
-    if text is None:
-        text = ""
+    results = [""] * len(requests)
+    unique: Dict[Tuple[str, int, int], List[int]] = {}
+    for i, req in enumerate(requests):
+        if req[0] and not req[0].isspace():
+            unique.setdefault(req, []).append(i)
+
+    groups: Dict[Tuple[int, int], List[str]] = {}
+    for text, max_len, min_len in unique:
+        groups.setdefault((max_len, min_len), []).append(text)
+
+    with span("summarize", requests=len(requests), unique=len(unique)):
+        for (max_len, min_len), texts in groups.items():
+            texts.sort(key=len)
+            for start in range(0, len(texts), max(1, batch_size)):
+                batch = texts[start:start + batch_size]
+                try:
+                    out = get_summarizer()(batch, max_length=max_len, min_length=min_len,
+                                           truncation=True, do_sample=False, batch_size=len(batch))
+                    summaries = [o["summary_text"] for o in out]
+                except Exception:
+                    summaries = [safe_summarize(t, max_length=max_len, min_length=min_len) for t in batch]
+                for t, summ in zip(batch, summaries):
+                    for i in unique[(t, max_len, min_len)]:
+                        results[i] = summ
+    return results
+
+
+def chunk_tokens(text: str, max_tokens: int = SUMMARY_LEVEL_TOKENS) -> List[str]:
+    """
+    Like chunk_sentences, but packs whole sentences up to a summarizer
+    token budget instead of a character count.
+    """
+    if not text:
+        return []
+    tokenizer = get_summarizer().tokenizer
+    chunks = []
+    cur, cur_tokens = [], 0
+    for s in sent_tokenize(text):
+        n = len(tokenizer.encode(s, add_special_tokens=False))
+        if cur and cur_tokens + n > max_tokens:
+            chunks.append(" ".join(cur))
+            cur, cur_tokens = [], 0
+        cur.append(s)
+        cur_tokens += n
+    if cur:
+        chunks.append(" ".join(cur))
+    return chunks
+
+
+# One pool per requested size (as transcribe._get_chunk_pool)
+_map_pools: Dict[int, ProcessPoolExecutor] = {}
+_map_pools_lock = threading.Lock()
+
+
+def _get_map_pool(workers: int) -> ProcessPoolExecutor:
+    # Each worker imports this module and therefore holds its own summarizer
+    with _map_pools_lock:
+        pool = _map_pools.get(workers)
+        if pool is None:
+            pool = _map_pools[workers] = ProcessPoolExecutor(max_workers=workers,
+                                                             mp_context=multiprocessing.get_context("spawn"))
+        return pool
+
+
+def _map_summaries(chunks: List[str], max_length: int, min_length: int, workers: int) -> List[str]:
+    """
+    Map step: summarize every chunk of one level, sharded across the
+    process pool when workers > 1 (each shard is still batched).
+    """
+    requests = [(c, max_length, min_length) for c in chunks]
+    if workers <= 1 or len(requests) <= SUMMARY_BATCH_SIZE:
+        return summarize_many(requests)
+    shard = math.ceil(len(requests) / workers)
+    shards = [requests[i:i + shard] for i in range(0, len(requests), shard)]
+    results = []
+    for part in _get_map_pool(workers).map(summarize_many, shards):
+        results.extend(part)
+    return results
+
+
+def hierarchical_summarize(text: str, target_chars: int = SUMMARY_TARGET_CHARS,
+                           level_tokens: int = SUMMARY_LEVEL_TOKENS,
+                           max_levels: int = SUMMARY_MAX_LEVELS,
+                           workers: int = SUMMARY_WORKERS) -> str:
+    """
+    Map-reduce summary with bounded output:
+      1) split the text into chunks of at most level_tokens tokens
+      2) summarize all chunks (in parallel across workers)
+      3) regroup the summaries into level_tokens chunks and repeat
+         until the result fits target_chars or max_levels is reached
+    """
+    if not text or text.isspace():
+        return ""
+    max_len, min_len = MOM_SUMMARY_LENGTHS
+    current = text
+    with span("summarize_hierarchical", chars=len(text)) as sp:
+        for level in range(max_levels):
+            sp["levels"] = level + 1
+            chunks = chunk_tokens(current, max_tokens=level_tokens)
+            summaries = [s for s in _map_summaries(chunks, max_len, min_len, workers) if s]
+            combined = " ".join(summaries).strip()
+            if not combined or len(combined) >= len(current):
+                # summarizer isn't shrinking the text any more
+                break
+            current = combined
+            if len(current) <= target_chars or len(chunks) == 1:
+                break
+    return current
+
+
+def _speaker_texts(segments: List[Dict]) -> Dict[str, str]:
+    """
+    Join segment text per speaker.
+    - If segments already contain speaker labels, group by them.
+    - Otherwise, fallback to alternating assignment (keeps previous behavior).
+    """
+    speakers = {}
+    # group text under speaker labels if present
+    for seg in segments or []:
+        sp = seg.get("speaker")
+        seg_text = seg.get("text", "")
+        if sp:
+            speakers.setdefault(sp, []).append(seg_text)
+
+    # fallback: alternate assignment if no speaker labels
+    if not speakers:
+        for i, seg in enumerate(segments or []):
+            sp = f"Person{(i % 2) + 1}"
+            speakers.setdefault(sp, []).append(seg.get("text", ""))
+
+    return {sp: " ".join(texts).strip() for sp, texts in speakers.items()}
+
+
+def _mom_requests(text: str) -> List[Tuple[str, int, int]]:
+    max_len, min_len = MOM_SUMMARY_LENGTHS
+    return [(c, max_len, min_len) for c in chunk_sentences(text, max_chars=900)]
 
-    # 1) Chunk by sentences (safe size)
-    chunks = chunk_sentences(text, max_chars=900)  # conservative size
 
-    # 2) Summarize chunk-by-chunk, then combine
-    summaries = []
-    for c in chunks:
-        s = safe_summarize(c, max_length=120, min_length=20)
-        if s:
-            summaries.append(s)
-    overall_summary = " ".join(summaries).strip()
+def _person_requests(segments: List[Dict]) -> List[Tuple[str, List[Tuple[str, int, int]]]]:
+    max_len, min_len = PERSON_SUMMARY_LENGTHS
+    return [(sp, [(c, max_len, min_len) for c in chunk_sentences(joined, max_chars=800)])
+            for sp, joined in _speaker_texts(segments).items()]
+
+
+def assemble_mom(text: str, segments: List[Dict], metadata: Dict, summaries: List[str],
+                 details: Optional[List[Dict]] = None) -> Dict:
+    """
+    Build the MoM dict from already computed chunk summaries (used by the
+    one-shot generators and by callers that summarize incrementally, which
+    may also pass the action items they extracted as they went).
+    """
+    # sentence boundaries are found once and shared by the fallbacks and the extractor
+    text = text or ""
+    overall_summary = " ".join(s for s in summaries if s).strip()
+    spans = sentence_spans(text) if details is None or (not overall_summary and text) else []
     if not overall_summary and text:
         # fallback: short raw text if summarizer couldn't run
-        overall_summary = " ".join(sent_tokenize(text)[:3])
-
-    # 3) Extract action items with heuristics
-    action_items = []
-    for sent in sent_tokenize(text):
-        lower = sent.lower()
-        if any(k in lower for k in [
-            "action", "target date", "due", "deadline", "assign", "responsible",
-            "will do", "to do", "task", "deliver", "deliverable", "complete by"
-        ]):
-            action_items.append(sent)
+        overall_summary = " ".join(text[s:e].strip() for s, e in spans[:3])
+
+    # 3) Extract action items (single-pass trigger match + owner / due date)
+    if details is None:
+        details = get_extractor(metadata.get("organization")).extract(text, spans)
+    action_items = [item["text"] for item in details]
 
     # fallback to top sentences from summary if none found
     if not action_items:
-        action_items = sent_tokenize(overall_summary)[:3]
+        action_items = split_sentences(overall_summary)[:3]
 
     # 4) Build detailed minutes from segments (keep existing shape)
     detailed_minutes = []
@@ -114,44 +266,80 @@ def generate_mom_content(text: str, segments: List[Dict], metadata: Dict) -> Dic
         "meeting_objective": metadata.get("meeting_objective", ""),
         "summary": overall_summary,
         "action_items": action_items,
+        "action_item_details": details,
         "detailed_minutes": detailed_minutes
     }
     return mom
 
-def generate_person_summaries(text: str, segments: List[Dict]) -> Dict:
-    """
-    Create per-speaker summaries.
-    - If segments already contain speaker labels, group by them.
-    - Otherwise, fallback to alternating assignment (keeps previous behavior).
-    - Each speaker's text is chunked and summarized safely.
-    """
-    speakers = {}
-    # group text under speaker labels if present
-    for seg in segments or []:
-        sp = seg.get("speaker")
-        seg_text = seg.get("text", "")
-        if sp:
-            speakers.setdefault(sp, []).append(seg_text)
 
-    # fallback: alternate assignment if no speaker labels
-    if not speakers:
-        for i, seg in enumerate(segments or []):
-            sp = f"Person{(i % 2) + 1}"
-            speakers.setdefault(sp, []).append(seg.get("text", ""))
-
-    # summarize each speaker's joined text
+def _build_person_summaries(person_reqs, summaries: List[str]) -> Dict:
     person_summaries = {}
-    for sp, texts in speakers.items():
-        joined = " ".join(texts).strip()
-        if not joined:
+    pos = 0
+    for sp, reqs in person_reqs:
+        if not reqs:
             person_summaries[sp] = ""
             continue
-        # chunk by sentences
-        chunks = chunk_sentences(joined, max_chars=800)
-        out_summ = []
-        for c in chunks:
-            s = safe_summarize(c, max_length=80, min_length=12)
-            if s:
-                out_summ.append(s)
+        out_summ = [s for s in summaries[pos:pos + len(reqs)] if s]
+        pos += len(reqs)
         person_summaries[sp] = " ".join(out_summ).strip() or "No summary available."
     return person_summaries
+
+
+def generate_mom_content(text: str, segments: List[Dict], metadata: Dict,
+                         hierarchical: bool = None) -> Dict:
+    """
+    Returns structured MoM content:
+      - meeting_objective (from metadata)
+      - summary (safe concatenated summary, or a bounded map-reduce
+        summary when hierarchical=True / HIERARCHICAL_SUMMARY=1)
+      - action_items (heuristic extraction)
+      - detailed_minutes (mirrors incoming segments)
+    Re-summarizes the whole text on every call; live sessions that refresh
+    the minutes repeatedly use live_mom.LiveMomSession instead.
+    """
+    # Defensive defaults
+    if text is None:
+        text = ""
+    if hierarchical is None:
+        hierarchical = HIERARCHICAL_SUMMARY
+
+    with span("mom", chars=len(text)):
+        if hierarchical:
+            return assemble_mom(text, segments, metadata, [hierarchical_summarize(text)])
+
+        # 1) Chunk by sentences (safe size), 2) summarize in batches, then combine
+        summaries = summarize_many(_mom_requests(text))
+        return assemble_mom(text, segments, metadata, summaries)
+
+
+def generate_person_summaries(text: str, segments: List[Dict]) -> Dict:
+    """
+    Create per-speaker summaries.
+    Each speaker's text is chunked and all chunks are summarized in batches.
+    """
+    with span("person_summaries"):
+        person_reqs = _person_requests(segments)
+        summaries = summarize_many([r for _, reqs in person_reqs for r in reqs])
+        return _build_person_summaries(person_reqs, summaries)
+
+
+def generate_mom_and_person_summaries(text: str, segments: List[Dict],
+                                      metadata: Dict, hierarchical: bool = None) -> Tuple[Dict, Dict]:
+    """
+    Same output as generate_mom_content + generate_person_summaries, but the
+    overall and per-speaker chunks go through the summarizer together, so
+    batches stay full and repeated chunks are summarized once.
+    """
+    if text is None:
+        text = ""
+    if hierarchical is None:
+        hierarchical = HIERARCHICAL_SUMMARY
+    if hierarchical:
+        return (generate_mom_content(text, segments, metadata, hierarchical=True),
+                generate_person_summaries(text, segments))
+    with span("mom", chars=len(text)):
+        mom_reqs = _mom_requests(text)
+        person_reqs = _person_requests(segments)
+        summaries = summarize_many(mom_reqs + [r for _, reqs in person_reqs for r in reqs])
+        mom = assemble_mom(text, segments, metadata, summaries[:len(mom_reqs)])
+        return mom, _build_person_summaries(person_reqs, summaries[len(mom_reqs):])
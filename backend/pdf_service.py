@@ -0,0 +1,312 @@
+# backend/pdf_service.py
+import os
+import queue
+import shutil
+import socket
+import hashlib
+import zipfile
+import tempfile
+import threading
+import subprocess
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Dict, Optional
+
+from telemetry import get_request_id, log, reset_request_id, set_request_id, span
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+PDF_BASE_PORT = int(os.getenv("PDF_BASE_PORT", "2002"))
+SOFFICE_BIN = os.getenv("SOFFICE_BIN", "soffice")
+# Max DOCX hashes / PDF paths remembered for de-duplication and status
+PDF_DEDUP_ENTRIES = 1024
+# Converted PDFs, named by the content hash of their DOCX; de-duplicated
+# requests copy from here
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "mom_pdf_cache"))
+# Refuse to start without the `uno` bridge instead of falling back to one
+# cold soffice start per document
+PDF_REQUIRE_UNO = os.getenv("PDF_REQUIRE_UNO", "0") == "1"
+
+
+def _have_uno() -> bool:
+    try:
+        import uno  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _blocking(fn, *args):
+    """
+    Run a blocking office call. Under eventlet's monkey-patching the worker
+    threads are green threads, and a pyuno call (which eventlet cannot
+    patch) would freeze the whole hub until LibreOffice answers, so the
+    call goes to eventlet's native thread pool instead.
+    """
+    try:
+        from eventlet import patcher, tpool
+    except ImportError:
+        return fn(*args)
+    if patcher.is_monkey_patched("thread"):
+        return tpool.execute(fn, *args)
+    return fn(*args)
+
+
+def _free_port(preferred: int) -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        try:
+            s.bind(("127.0.0.1", preferred))
+            return preferred
+        except OSError:
+            s.bind(("127.0.0.1", 0))
+            return s.getsockname()[1]
+
+
+class _OfficeWorker:
+    """
+    One long-lived headless LibreOffice instance with its own user profile.
+
+    When the `uno` Python bridge is available the instance listens on a
+    local socket and every conversion is a load/export/close over UNO (no
+    process start-up per document). Without `uno` there is no long-lived
+    instance: each conversion runs `soffice --convert-to` with this
+    worker's dedicated, already initialized profile (PdfService logs this
+    at start-up), so at most one office process per worker runs.
+    """
+
+    def __init__(self, index: int, use_uno: bool = True):
+        self.index = index
+        self.profile = Path(tempfile.gettempdir()) / f"mom_soffice_{os.getpid()}_{index}"
+        self.port = None
+        self.proc = None
+        self.desktop = None
+        self.use_uno = use_uno
+
+    def _profile_url(self) -> str:
+        return self.profile.resolve().as_uri()
+
+    def _start(self) -> None:
+        self.port = _free_port(PDF_BASE_PORT + self.index)
+        self.proc = subprocess.Popen(
+            [SOFFICE_BIN, "--headless", "--invisible", "--nologo", "--norestore", "--nodefault",
+             f"-env:UserInstallation={self._profile_url()}",
+             f"--accept=socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        import uno
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext("com.sun.star.bridge.UnoUrlResolver", local)
+        deadline = time.time() + 30
+        while True:
+            try:
+                ctx = resolver.resolve(
+                    f"uno:socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext")
+                break
+            except Exception:
+                if time.time() > deadline or self.proc.poll() is not None:
+                    self.stop()
+                    raise RuntimeError("LibreOffice listener did not start")
+                time.sleep(0.25)
+        self.desktop = ctx.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+
+    def _convert_uno(self, docx: Path, pdf: Path) -> None:
+        import uno
+        from com.sun.star.beans import PropertyValue
+
+        def prop(name, value):
+            p = PropertyValue()
+            p.Name, p.Value = name, value
+            return p
+
+        if self.desktop is None or self.proc is None or self.proc.poll() is not None:
+            self._start()
+        doc = self.desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(str(docx.resolve())), "_blank", 0, (prop("Hidden", True),))
+        try:
+            doc.storeToURL(uno.systemPathToFileUrl(str(pdf.resolve())),
+                           (prop("FilterName", "writer_pdf_Export"),))
+        finally:
+            doc.close(True)
+
+    def _convert_cli(self, docx: Path, pdf: Path) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            subprocess.run(
+                [SOFFICE_BIN, "--headless", "--norestore", f"-env:UserInstallation={self._profile_url()}",
+                 "--convert-to", "pdf", "--outdir", tmp, str(docx)],
+                check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=300,
+            )
+            shutil.move(str(Path(tmp) / (docx.stem + ".pdf")), str(pdf))
+
+    def convert(self, docx: Path, pdf: Path) -> None:
+        if self.use_uno:
+            try:
+                self._convert_uno(docx, pdf)
+                return
+            except Exception as e:
+                # a crashed office instance is restarted on the next conversion
+                log(f"[PDF worker {self.index}] UNO conversion failed: {e}")
+                self.stop()
+        self._convert_cli(docx, pdf)
+
+    def stop(self) -> None:
+        self.desktop = None
+        if self.proc is not None:
+            try:
+                self.proc.terminate()
+                self.proc.wait(timeout=10)
+            except Exception:
+                self.proc.kill()
+            self.proc = None
+
+
+class PdfService:
+    """
+    Queue-fed DOCX -> PDF conversion on a fixed pool of office workers.
+    Identical DOCX contents (by SHA-256) are converted once into
+    PDF_CACHE_DIR/<hash>.pdf: concurrent requests share the in-flight
+    Future, later ones copy the cached PDF.
+    """
+
+    def __init__(self, workers: int = PDF_WORKERS, cache_dir: str = PDF_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._by_hash: Dict[str, Future] = {}
+        self._by_pdf: Dict[str, Future] = {}
+        self.pooled = _have_uno()
+        if not self.pooled:
+            if PDF_REQUIRE_UNO:
+                raise RuntimeError("PDF_REQUIRE_UNO is set but the LibreOffice `uno` Python bridge is not importable")
+            log("[PDF] `uno` bridge not importable: office pool disabled, every conversion starts a new "
+                "soffice process (install python3-uno or add LibreOffice's program dir to PYTHONPATH)")
+        self._workers = [_OfficeWorker(i, self.pooled) for i in range(max(1, workers))]
+        for w in self._workers:
+            threading.Thread(target=self._run, args=(w,), name=f"pdf-{w.index}", daemon=True).start()
+
+    @staticmethod
+    def _hash(path: Path) -> str:
+        """
+        SHA-256 over the DOCX's entry names and contents. Zip entry
+        timestamps change on every render, so the raw bytes of two
+        identical documents never match.
+        """
+        h = hashlib.sha256()
+        try:
+            with zipfile.ZipFile(path) as z:
+                for info in sorted(z.infolist(), key=lambda i: i.filename):
+                    h.update(f"{info.filename}\0{info.file_size}\0".encode("utf-8"))
+                    with z.open(info) as f:
+                        for block in iter(lambda: f.read(1 << 20), b""):
+                            h.update(block)
+        except zipfile.BadZipFile:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    h.update(block)
+        return h.hexdigest()
+
+    def _cached(self, digest: str) -> Path:
+        return self.cache_dir / f"{digest}.pdf"
+
+    def _forget(self, digest: str) -> None:
+        # called with the lock held when a hash falls out of the table
+        future = self._by_hash.pop(digest)
+        if future.done():
+            try:
+                os.remove(self._cached(digest))
+            except OSError:
+                pass
+
+    def submit(self, docx_path, pdf_path=None) -> Future:
+        """
+        Queue a conversion and return a Future resolving to the PDF path.
+        """
+        docx = Path(docx_path)
+        pdf = Path(pdf_path) if pdf_path else docx.with_suffix(".pdf")
+        digest = self._hash(docx)
+
+        cached = self._cached(digest)
+
+        with self._lock:
+            source = self._by_hash.get(digest)
+            if source is not None and source.done() and not cached.exists():
+                # the cached copy was cleaned up; convert again
+                source = None
+            future = Future()
+            self._by_pdf[str(pdf)] = future
+            if len(self._by_pdf) > PDF_DEDUP_ENTRIES:
+                self._by_pdf.pop(next(iter(self._by_pdf)))
+            if source is None:
+                self._by_hash[digest] = future
+                if len(self._by_hash) > PDF_DEDUP_ENTRIES:
+                    self._forget(next(iter(self._by_hash)))
+                self._queue.put((docx, cached, pdf, future, get_request_id()))
+                return future
+
+        def copy_when_ready(src: Future):
+            try:
+                src.result()
+                shutil.copyfile(cached, pdf)
+                future.set_result(str(pdf))
+            except Exception as e:
+                future.set_exception(e)
+
+        source.add_done_callback(copy_when_ready)
+        return future
+
+    def status(self, pdf_path) -> Optional[str]:
+        """
+        'pending', 'done', 'failed', or None for unknown conversions.
+        """
+        with self._lock:
+            future = self._by_pdf.get(str(Path(pdf_path)))
+        if future is None:
+            return None
+        if not future.done():
+            return "pending"
+        return "failed" if future.exception() else "done"
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self, worker: _OfficeWorker) -> None:
+        while True:
+            docx, cached, pdf, future, request_id = self._queue.get()
+            token = set_request_id(request_id)
+            try:
+                with span("pdf_convert", worker=worker.index):
+                    # convert under a private name, then publish atomically
+                    tmp = cached.with_name(f"{cached.stem}.{os.getpid()}.{worker.index}.pdf")
+                    _blocking(worker.convert, docx, tmp)
+                    os.replace(tmp, cached)
+                    shutil.copyfile(cached, pdf)
+                future.set_result(str(pdf))
+            except Exception as e:
+                log(f"[PDF conversion error] {docx}: {e}")
+                with self._lock:
+                    # let a later request retry this document
+                    for digest, f in list(self._by_hash.items()):
+                        if f is future:
+                            del self._by_hash[digest]
+                future.set_exception(e)
+            finally:
+                reset_request_id(token)
+
+    def shutdown(self) -> None:
+        for w in self._workers:
+            w.stop()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_pdf_service(create: bool = True) -> Optional[PdfService]:
+    """
+    Process-wide service; create=False returns None if it was never started.
+    """
+    global _service
+    with _service_lock:
+        if _service is None and create:
+            _service = PdfService()
+        return _service
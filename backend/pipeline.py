@@ -0,0 +1,80 @@
+# backend/pipeline.py
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class Stage:
+    """
+    One step of a StagedPipeline: fn(item, value) run on its own executor,
+    at most `workers` calls at a time. `value` is what the previous stage
+    returned for the item (None for the first stage).
+    """
+
+    def __init__(self, name: str, fn: Callable[[Any, Any], Any], executor: Executor, workers: int = 1):
+        self.name = name
+        self.fn = fn
+        self.executor = executor
+        self.workers = max(1, workers)
+
+
+class StagedPipeline:
+    """
+    Runs items through consecutive stages so that different items occupy
+    different stages at the same time (item 2 transcribing while item 1
+    is summarized). Results wait for the next stage in a queue of at most
+    `queue_size` items; a stage whose output queue is full takes no new
+    work, which in turn stops new items being read from the input, so a
+    slow stage never lets the rest of the batch pile up in memory.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 2):
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+
+    def _has_room(self, i: int, queues: List[Deque]) -> bool:
+        return i + 1 == len(self.stages) or len(queues[i + 1]) < self.queue_size
+
+    def run(self, items: Iterable) -> Iterator[Tuple[Any, Any, Optional[BaseException]]]:
+        """
+        Yields (item, last stage's value, None) as items finish, or
+        (item, None, error) as soon as a stage fails for one; the other
+        items carry on. Items are read from `items` lazily.
+        """
+        source = iter(items)
+        exhausted = False
+        queues: List[Deque[Tuple[Any, Any]]] = [deque() for _ in self.stages]
+        busy = [0] * len(self.stages)
+        running: Dict[Future, Tuple[int, Any]] = {}
+        while True:
+            # later stages first, so finished work drains before new work enters
+            for i in reversed(range(len(self.stages))):
+                stage = self.stages[i]
+                while busy[i] < stage.workers and self._has_room(i, queues):
+                    if queues[i]:
+                        item, value = queues[i].popleft()
+                    elif i == 0 and not exhausted:
+                        try:
+                            item, value = next(source), None
+                        except StopIteration:
+                            exhausted = True
+                            break
+                    else:
+                        break
+                    running[stage.executor.submit(stage.fn, item, value)] = (i, item)
+                    busy[i] += 1
+            if not running:
+                return
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                i, item = running.pop(fut)
+                busy[i] -= 1
+                try:
+                    value = fut.result()
+                except Exception as e:
+                    yield item, None, e
+                    continue
+                if i + 1 == len(self.stages):
+                    yield item, value, None
+                else:
+                    queues[i + 1].append((item, value))
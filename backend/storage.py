@@ -0,0 +1,134 @@
+# backend/storage.py
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from werkzeug.utils import secure_filename
+
+from telemetry import log
+
+# Raw uploads and generated artifacts live in separate trees
+STORAGE_ROOT = os.getenv("STORAGE_ROOT", "storage")
+UPLOAD_DIR = os.path.join(STORAGE_ROOT, "uploads")
+ARTIFACT_DIR = os.path.join(STORAGE_ROOT, "artifacts")
+# Older deployments wrote everything here; still served read-only
+LEGACY_DIRS = ["uploads", "output"]
+
+# Retention: files older than the TTL are removed, then the oldest files
+# go until each tree fits its quota (0 disables a limit)
+UPLOAD_TTL_HOURS = float(os.getenv("UPLOAD_TTL_HOURS", "24"))
+ARTIFACT_TTL_HOURS = float(os.getenv("ARTIFACT_TTL_HOURS", "168"))
+UPLOAD_QUOTA_MB = float(os.getenv("UPLOAD_QUOTA_MB", "5000"))
+ARTIFACT_QUOTA_MB = float(os.getenv("ARTIFACT_QUOTA_MB", "2000"))
+SWEEP_INTERVAL_SECONDS = float(os.getenv("SWEEP_INTERVAL_SECONDS", "600"))
+
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+os.makedirs(ARTIFACT_DIR, exist_ok=True)
+
+
+def upload_path(filename: str, prefix: str = "") -> str:
+    """
+    Where a raw upload is stored (client file names are sanitized).
+    """
+    name = secure_filename(filename) or "upload"
+    return os.path.join(UPLOAD_DIR, f"{prefix}_{name}" if prefix else name)
+
+
+def artifact_path(filename: str) -> str:
+    """
+    Where a generated file (MoM DOCX/PDF) is stored.
+    """
+    return os.path.join(ARTIFACT_DIR, secure_filename(filename))
+
+
+def find_download(filename: str) -> Optional[str]:
+    """
+    Directory holding `filename` for download: artifacts first, then the
+    legacy directories. Raw uploads are not downloadable.
+    """
+    name = secure_filename(filename)
+    if not name or name != filename:
+        return None
+    for d in [ARTIFACT_DIR] + LEGACY_DIRS:
+        if os.path.isfile(os.path.join(d, name)):
+            return d
+    return None
+
+
+def _files(directory: str) -> List[os.DirEntry]:
+    try:
+        return [e for e in os.scandir(directory) if e.is_file(follow_symlinks=False)]
+    except FileNotFoundError:
+        return []
+
+
+def sweep_directory(directory: str, ttl_seconds: float, quota_bytes: float,
+                    now: Optional[float] = None, keep: Optional[Set[str]] = None) -> Dict:
+    """
+    Delete expired files, then the least recently modified ones until the
+    directory is under quota. Files whose absolute path is in `keep`
+    (still in use) are never touched. Returns counts for logging.
+    """
+    now = now or time.time()
+    keep = keep or set()
+    removed, freed = 0, 0
+    entries = []
+    for e in _files(directory):
+        if os.path.abspath(e.path) in keep:
+            continue
+        try:
+            st = e.stat()
+        except FileNotFoundError:
+            continue
+        if ttl_seconds > 0 and now - st.st_mtime > ttl_seconds:
+            try:
+                os.unlink(e.path)
+                removed += 1
+                freed += st.st_size
+            except OSError:
+                pass
+        else:
+            entries.append((st.st_mtime, st.st_size, e.path))
+
+    total = sum(size for _, size, _ in entries)
+    if quota_bytes > 0 and total > quota_bytes:
+        for _, size, path in sorted(entries):
+            if total <= quota_bytes:
+                break
+            try:
+                os.unlink(path)
+                removed += 1
+                freed += size
+                total -= size
+            except OSError:
+                pass
+    return {"directory": directory, "removed": removed, "freed_bytes": freed, "bytes": total}
+
+
+def sweep(in_use: Iterable[str] = ()) -> List[Dict]:
+    mb = 1024 * 1024
+    keep = {os.path.abspath(p) for p in in_use}
+    return [
+        sweep_directory(UPLOAD_DIR, UPLOAD_TTL_HOURS * 3600, UPLOAD_QUOTA_MB * mb, keep=keep),
+        sweep_directory(ARTIFACT_DIR, ARTIFACT_TTL_HOURS * 3600, ARTIFACT_QUOTA_MB * mb, keep=keep),
+    ]
+
+
+def run_sweeper(sleep: Callable[[float], None] = time.sleep,
+                interval: float = SWEEP_INTERVAL_SECONDS,
+                in_use: Optional[Callable[[], Iterable[str]]] = None) -> None:
+    """
+    Retention loop for a background task, e.g.
+    socketio.start_background_task(storage.run_sweeper, socketio.sleep)
+    `in_use()` lists files that must survive this pass (uploads still
+    arriving, inputs of queued jobs).
+    """
+    while True:
+        try:
+            for stats in sweep(in_use() if in_use else ()):
+                if stats["removed"]:
+                    log(f"[Retention] {stats['directory']}: removed {stats['removed']} files "
+                          f"({stats['freed_bytes'] / 1024 / 1024:.1f} MB)")
+        except Exception as e:
+            log(f"[Retention error] {e}")
+        sleep(interval)
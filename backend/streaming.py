@@ -0,0 +1,373 @@
+# backend/streaming.py
+import subprocess
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from transcribe import DIARIZATION, OnlineDiarizer, has_speech
+
+SAMPLE_RATE = 16000
+
+
+class PcmRingBuffer:
+    """
+    Fixed-capacity float32 ring buffer addressed by absolute sample index.
+    Only the most recent `capacity` samples are retained.
+    """
+
+    def __init__(self, seconds: float):
+        self.capacity = int(seconds * SAMPLE_RATE)
+        self._buf = np.zeros(self.capacity, dtype=np.float32)
+        self._lock = threading.Lock()
+        self.total = 0  # samples written since start
+
+    def write(self, samples: np.ndarray) -> None:
+        if samples.size == 0:
+            return
+        with self._lock:
+            if samples.size > self.capacity:
+                # older samples would be overwritten immediately
+                self.total += samples.size - self.capacity
+                samples = samples[-self.capacity:]
+            pos = self.total % self.capacity
+            first = min(self.capacity - pos, samples.size)
+            self._buf[pos:pos + first] = samples[:first]
+            self._buf[:samples.size - first] = samples[first:]
+            self.total += samples.size
+
+    @property
+    def oldest(self) -> int:
+        return max(0, self.total - self.capacity)
+
+    def read(self, start: int, end: Optional[int] = None) -> np.ndarray:
+        """
+        Copy samples [start, end) out of the buffer (clamped to what is retained).
+        """
+        with self._lock:
+            end = self.total if end is None else min(end, self.total)
+            start = max(start, self.total - self.capacity)
+            if end <= start:
+                return np.zeros(0, dtype=np.float32)
+            s, e = start % self.capacity, end % self.capacity
+            if s < e:
+                return self._buf[s:e].copy()
+            return np.concatenate((self._buf[s:], self._buf[:e]))
+
+
+class LiveInbox:
+    """
+    Bounded per-session queue of incoming compressed chunks. One drainer
+    at a time takes everything queued as a single coalesced write, so
+    chunks stay in order and a lagging session never has more than one
+    transcription step pending. Chunks beyond max_bytes are refused.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._chunks: List[bytes] = []
+        self.size = 0
+        self.draining = False
+        self.closed = False
+        self.idle = threading.Event()
+        self.idle.set()
+        self._lock = threading.Lock()
+
+    def put(self, blob: bytes) -> Tuple[bool, bool]:
+        """
+        Queue a chunk; returns (accepted, start_drainer). start_drainer is
+        True for the caller that must start draining.
+        """
+        with self._lock:
+            if self.closed or (self._chunks and self.size + len(blob) > self.max_bytes):
+                return False, False
+            self._chunks.append(blob)
+            self.size += len(blob)
+            if self.draining:
+                return True, False
+            self.draining = True
+            self.idle.clear()
+            return True, True
+
+    def take(self) -> bytes:
+        """
+        Everything queued, joined; b"" ends the drainer's turn.
+        """
+        with self._lock:
+            blob = b"".join(self._chunks)
+            self._chunks = []
+            self.size = 0
+            if not blob:
+                self.draining = False
+                self.idle.set()
+            return blob
+
+    def close(self, timeout: Optional[float] = None) -> bytes:
+        """
+        Refuse further chunks, wait for a running drainer and return what is left.
+        """
+        with self._lock:
+            self.closed = True
+        self.idle.wait(timeout)
+        with self._lock:
+            blob = b"".join(self._chunks)
+            self._chunks = []
+            self.size = 0
+            return blob
+
+
+class StreamingTranscriber:
+    """
+    Per-session live transcription engine.
+
+    Compressed chunks (e.g. MediaRecorder webm) are piped into one long-lived
+    ffmpeg process which emits 16 kHz mono PCM into a ring buffer, so audio is
+    decoded exactly once. Each `step()` only transcribes the audio after the
+    last committed point; segments that end well before the live edge become
+    stable and advance the commit point, the rest is reported as tentative
+    and re-transcribed next time with the committed text as prompt.
+
+    Steps are driven by decoded PCM arriving rather than by chunks being
+    fed: `on_audio()` is called from the decoder thread after every write,
+    and request_step()/run_steps() coalesce those into one step loop.
+    """
+
+    def __init__(self, model, window_s: float = 15.0, overlap_s: float = 2.0,
+                 min_step_s: float = 0.5, buffer_s: float = 120.0,
+                 prompt_chars: int = 200, on_audio: Optional[Callable[[], None]] = None,
+                 **decode_options):
+        self.model = model
+        self.window = int(window_s * SAMPLE_RATE)
+        self.overlap = int(overlap_s * SAMPLE_RATE)
+        self.min_step = int(min_step_s * SAMPLE_RATE)
+        self.prompt_chars = prompt_chars
+        self.on_audio = on_audio
+        self.decode_options = decode_options
+
+        self.buffer = PcmRingBuffer(buffer_s)
+        self.committed = 0        # absolute sample index of finalized audio
+        self.processed = 0        # buffer.total at the previous step
+        self.stable_text = ""
+        self.stable_segments: List[Dict] = []
+        self.tentative_text = ""
+        self.tentative_segments: List[Dict] = []  # absolute times, from the last step
+        self.busy = False
+        # stable segments get speaker labels as they are finalized
+        self.diarizer = OnlineDiarizer() if DIARIZATION else None
+
+        self._decoder = None
+        self._reader = None
+        self._step_lock = threading.Lock()
+        self._step_wanted = False
+        self._stepping = False
+        self.steps_idle = threading.Event()
+        self.steps_idle.set()
+
+    # decoding
+    def _start_decoder(self) -> None:
+        # no input buffering or probing, so PCM comes out as soon as a chunk is in
+        self._decoder = subprocess.Popen(
+            ["ffmpeg", "-loglevel", "error", "-fflags", "nobuffer", "-probesize", "32",
+             "-analyzeduration", "0", "-i", "pipe:0",
+             "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+        self._reader = threading.Thread(target=self._read_pcm, args=(self._decoder,), daemon=True)
+        self._reader.start()
+
+    def _read_pcm(self, proc) -> None:
+        leftover = b""
+        while True:
+            data = proc.stdout.read1(32000) if hasattr(proc.stdout, "read1") else proc.stdout.read(32000)
+            if not data:
+                break
+            data = leftover + data
+            usable = len(data) - (len(data) % 2)
+            leftover = data[usable:]
+            pcm = np.frombuffer(data[:usable], dtype=np.int16).astype(np.float32) / 32768.0
+            self.buffer.write(pcm)
+            if pcm.size and self.on_audio is not None:
+                self.on_audio()
+
+    def feed(self, blob: bytes) -> None:
+        """
+        Push one compressed chunk into the decoder. If the previous decoder
+        exited (e.g. the client restarted its recorder and sent a new
+        container header) a fresh one is started.
+        """
+        if self._decoder is None or self._decoder.poll() is not None:
+            self._start_decoder()
+        try:
+            self._decoder.stdin.write(blob)
+            self._decoder.stdin.flush()
+        except (BrokenPipeError, OSError):
+            self._start_decoder()
+            self._decoder.stdin.write(blob)
+            self._decoder.stdin.flush()
+
+    # step scheduling
+    def request_step(self) -> bool:
+        """
+        Note that new audio arrived; True for the caller that must start
+        run_steps(), False if a step loop is already running and will pick
+        the audio up.
+        """
+        with self._step_lock:
+            self._step_wanted = True
+            if self._stepping:
+                return False
+            self._stepping = True
+            self.steps_idle.clear()
+            return True
+
+    def run_steps(self, run: Optional[Callable] = None,
+                  emit: Optional[Callable[[Dict], None]] = None) -> None:
+        """
+        Step until no new audio arrived during the last step, passing each
+        update to emit().
+        """
+        while True:
+            with self._step_lock:
+                if not self._step_wanted:
+                    self._stepping = False
+                    self.steps_idle.set()
+                    return
+                self._step_wanted = False
+            try:
+                update = self.step(run=run)
+            except Exception:
+                with self._step_lock:
+                    self._stepping = False
+                    self.steps_idle.set()
+                raise
+            if update is not None and emit is not None:
+                emit(update)
+
+    # transcription
+    def _prompt(self) -> Optional[str]:
+        return self.stable_text[-self.prompt_chars:] or None
+
+    def _commit_tentative(self) -> List[Dict]:
+        # finalize the last tentative segments as they were transcribed
+        segments, self.tentative_segments = self.tentative_segments, []
+        self.tentative_text = ""
+        if not segments:
+            return []
+        if self.diarizer is not None:
+            start = int(segments[0]["start"] * SAMPLE_RATE)
+            audio = self.buffer.read(start, int(segments[-1]["end"] * SAMPLE_RATE))
+            self.diarizer.label_segments(audio, segments, offset_s=start / SAMPLE_RATE)
+        self.committed = max(self.committed, int(segments[-1]["end"] * SAMPLE_RATE))
+        return segments
+
+    def step(self, run: Optional[Callable] = None, force: bool = False) -> Optional[Dict]:
+        """
+        Transcribe audio added since the last commit. `run(fn, *args, **kw)`
+        lets the caller execute the model call elsewhere (e.g. eventlet's
+        tpool); it defaults to a direct call. Returns None when there is not
+        enough new audio, otherwise a dict with the newly stable text and
+        the current tentative tail.
+        """
+        total = self.buffer.total
+        if self.busy or (not force and total - self.processed < self.min_step):
+            return None
+
+        # before the window slides past audio only reported as tentative,
+        # keep its last transcription instead of silently losing it
+        forced = []
+        if total - self.window > self.committed:
+            forced = self._commit_tentative()
+
+        # audio more than a window behind the live edge is skipped, so a
+        # lagging session catches up instead of falling further behind
+        start = max(self.committed, self.buffer.oldest, total - self.window)
+        dropped_s = round((start - self.committed) / SAMPLE_RATE, 2)
+        self.committed = start
+        audio = self.buffer.read(start, total)
+
+        new_stable, tentative, language = [], [], None
+        if audio.size and (self.tentative_text or has_speech(audio)):
+            self.busy = True
+            try:
+                run = run or (lambda fn, *a, **kw: fn(*a, **kw))
+                result = run(self.model.transcribe, audio,
+                             initial_prompt=self._prompt(), condition_on_previous_text=False,
+                             **self.decode_options)
+            finally:
+                self.busy = False
+            language = result.get("language")
+
+            # segments ending before the live edge minus the overlap are final
+            horizon = (total - start - self.overlap) / SAMPLE_RATE
+            if force:
+                horizon = float("inf")
+            commit_at = None
+            for seg in result.get("segments", []):
+                text = seg["text"].strip()
+                if not text:
+                    continue
+                piece = {
+                    "start": round(start / SAMPLE_RATE + seg["start"], 2),
+                    "end": round(start / SAMPLE_RATE + seg["end"], 2),
+                    "text": text
+                }
+                if seg["end"] <= horizon and not tentative:
+                    new_stable.append(piece)
+                    commit_at = start + int(seg["end"] * SAMPLE_RATE)
+                else:
+                    tentative.append(piece)
+
+            if new_stable and self.diarizer is not None:
+                self.diarizer.label_segments(audio, new_stable, offset_s=start / SAMPLE_RATE)
+
+            if commit_at is not None:
+                self.committed = commit_at
+            elif not tentative and total - start > self.window - self.overlap:
+                # a full window of silence: drop it rather than re-transcribing
+                self.committed = total - self.overlap
+        elif audio.size:
+            # dead air: skip the model and keep only the overlap for context
+            self.committed = max(self.committed, total - self.overlap)
+        elif not forced:
+            return None
+        self.processed = total
+
+        new_stable = forced + new_stable
+        stable_delta = " ".join(s["text"] for s in new_stable)
+        if stable_delta:
+            self.stable_segments.extend(new_stable)
+            self.stable_text = (self.stable_text + " " + stable_delta).strip()
+        self.tentative_segments = tentative
+        self.tentative_text = " ".join(s["text"] for s in tentative)
+
+        return {
+            "stable": stable_delta,
+            "tentative": self.tentative_text,
+            "segments": new_stable,
+            "language": language,
+            "dropped_s": dropped_s,
+        }
+
+    def close(self, run: Optional[Callable] = None, finalize: bool = True) -> Optional[Dict]:
+        """
+        Flush the decoder, finalize any remaining audio and stop ffmpeg.
+        With finalize=False (client gone) the decoder is only stopped and
+        no model call is made.
+        """
+        final = None
+        if not finalize:
+            self.on_audio = None
+        if self._decoder is not None:
+            try:
+                self._decoder.stdin.close()
+            except Exception:
+                pass
+            if self._reader is not None:
+                self._reader.join(timeout=5)
+            self._decoder.wait(timeout=5)
+            self._decoder = None
+        # a step loop woken by the last decoded PCM finishes first
+        self.steps_idle.wait(timeout=60)
+        if finalize and self.buffer.total > self.committed:
+            final = self.step(run=run, force=True)
+        return final
@@ -0,0 +1,241 @@
+# backend/telemetry.py
+import os
+import time
+import uuid
+import bisect
+import threading
+import contextvars
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Log one key=value line per finished span
+LOG_SPANS = os.getenv("LOG_SPANS", "1") == "1"
+
+# Seconds; the last bucket is +Inf
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+_request_id = contextvars.ContextVar("request_id", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+# request ids
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def get_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def set_request_id(request_id: Optional[str]):
+    """
+    Bind a request id to the current context; returns a token for reset_request_id.
+    """
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token) -> None:
+    _request_id.reset(token)
+
+
+def in_context(fn: Callable) -> Callable:
+    """
+    Wrap fn so it runs with the caller's request id on another thread
+    (e.g. tpool.execute(in_context(fn), *args)).
+    """
+    return partial(contextvars.copy_context().run, fn)
+
+
+def log(*args, **kwargs) -> None:
+    """
+    print() with the current request id prefixed.
+    """
+    rid = _request_id.get()
+    if rid:
+        args = (f"[req {rid}]",) + args
+    kwargs.setdefault("flush", True)
+    print(*args, **kwargs)
+
+
+# metrics
+
+_Labels = Tuple[Tuple[str, str], ...]
+
+
+def _key(labels: Dict) -> _Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class _Metric:
+    def __init__(self, name: str, kind: str, help: str, buckets: Optional[Iterable[float]] = None):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.buckets = tuple(buckets) if buckets else None
+        self.values: Dict[_Labels, object] = {}
+
+
+class Metrics:
+    """
+    Minimal in-process metrics store rendered in the Prometheus text
+    format. Counters, gauges and histograms are keyed by label set;
+    collectors add values computed at scrape time (queue depths, cache
+    and model stats).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple]]] = []
+        # worker processes forward updates to the parent instead (see set_sink)
+        self._sink: Optional[Callable[[Tuple], None]] = None
+
+    def describe(self, name: str, kind: str, help: str, buckets: Optional[Iterable[float]] = None) -> None:
+        with self._lock:
+            self._metrics.setdefault(name, _Metric(name, kind, help, buckets))
+
+    def add_collector(self, fn: Callable[[], Iterable[Tuple]]) -> None:
+        """
+        fn() yields (name, kind, help, [(labels_dict, value), ...]).
+        """
+        self._collectors.append(fn)
+
+    def set_sink(self, sink: Optional[Callable[[Tuple], None]]) -> None:
+        self._sink = sink
+
+    def apply(self, update: Tuple) -> None:
+        """
+        Apply an update tuple (op, name, value, labels) produced by a sink.
+        """
+        op, name, value, labels = update
+        getattr(self, op)(name, value, **dict(labels))
+
+    def _forward(self, op: str, name: str, value: float, labels: Dict) -> bool:
+        if self._sink is None:
+            return False
+        try:
+            self._sink((op, name, value, _key(labels)))
+        except Exception:
+            pass
+        return True
+
+    def _metric(self, name: str, kind: str) -> _Metric:
+        m = self._metrics.get(name)
+        if m is None:
+            m = self._metrics[name] = _Metric(name, kind, name, STAGE_BUCKETS if kind == "histogram" else None)
+        return m
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        if self._forward("inc", name, value, labels):
+            return
+        key = _key(labels)
+        with self._lock:
+            m = self._metric(name, "counter")
+            m.values[key] = m.values.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        if self._forward("set", name, value, labels):
+            return
+        with self._lock:
+            self._metric(name, "gauge").values[_key(labels)] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        if self._forward("observe", name, value, labels):
+            return
+        key = _key(labels)
+        with self._lock:
+            m = self._metric(name, "histogram")
+            h = m.values.get(key)
+            if h is None:
+                h = m.values[key] = [[0] * (len(m.buckets) + 1), 0.0, 0]
+            h[0][bisect.bisect_left(m.buckets, value)] += 1
+            h[1] += value
+            h[2] += 1
+
+    def render(self) -> str:
+        lines = []
+
+        def fmt(labels: _Labels, extra: Tuple = ()) -> str:
+            items = labels + extra
+            if not items:
+                return ""
+            body = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"'))
+                            for k, v in items)
+            return "{" + body + "}"
+
+        with self._lock:
+            metrics = [(m.name, m.kind, m.help, m.buckets, dict(m.values)) for m in self._metrics.values()]
+        for name, kind, help, buckets, values in metrics:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, v in values.items():
+                if kind != "histogram":
+                    lines.append(f"{name}{fmt(labels)} {v}")
+                    continue
+                counts, total, n = v
+                cumulative = 0
+                for bound, c in zip(list(buckets) + ["+Inf"], counts):
+                    cumulative += c
+                    lines.append(f"{name}_bucket{fmt(labels, (('le', bound),))} {cumulative}")
+                lines.append(f"{name}_sum{fmt(labels)} {total}")
+                lines.append(f"{name}_count{fmt(labels)} {n}")
+
+        for collect in self._collectors:
+            try:
+                for name, kind, help, samples in collect():
+                    lines.append(f"# HELP {name} {help}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    for labels, value in samples:
+                        lines.append(f"{name}{fmt(_key(labels))} {value}")
+            except Exception as e:
+                log(f"[Metrics collector error] {e}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+metrics.describe("mom_stage_seconds", "histogram", "Duration of processing stages", STAGE_BUCKETS)
+metrics.describe("mom_stage_errors_total", "counter", "Stages that raised")
+metrics.describe("mom_audio_seconds_total", "counter", "Audio seconds transcribed")
+metrics.describe("mom_asr_seconds_total", "counter", "Wall-clock seconds spent in ASR")
+metrics.describe("mom_http_request_seconds", "histogram", "HTTP request latency", STAGE_BUCKETS)
+metrics.describe("mom_job_seconds", "histogram", "Transcription job time from submit to result", STAGE_BUCKETS)
+
+
+@contextmanager
+def span(stage: str, **fields):
+    """
+    Time a processing stage:
+
+        with span("asr", engine="whisper") as s:
+            ...
+            s["audio_s"] = 12.5
+
+    Records mom_stage_seconds{stage=...} and logs one key=value line with
+    the request id, the enclosing span and any fields set on the way.
+    """
+    parent = _current_span.get()
+    token = _current_span.set(stage)
+    info = dict(fields)
+    status = "ok"
+    t0 = time.perf_counter()
+    try:
+        yield info
+    except BaseException:
+        status = "error"
+        metrics.inc("mom_stage_errors_total", stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - t0
+        _current_span.reset(token)
+        metrics.observe("mom_stage_seconds", elapsed, stage=stage)
+        if LOG_SPANS:
+            extra = " ".join(f"{k}={v}" for k, v in info.items())
+            log(f"[span] stage={stage} parent={parent or '-'} ms={elapsed * 1000:.1f} "
+                f"status={status} pid={os.getpid()}" + (f" {extra}" if extra else ""))
+
+
+def record_asr(audio_seconds: float, elapsed: float) -> None:
+    metrics.inc("mom_audio_seconds_total", audio_seconds)
+    metrics.inc("mom_asr_seconds_total", elapsed)
@@ -0,0 +1,9 @@
+# backend/tests/conftest.py
+import os
+import sys
+import tempfile
+
+# the backend modules import each other by bare name
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# storage.py creates its trees on import; keep them out of the working copy
+os.environ.setdefault("STORAGE_ROOT", tempfile.mkdtemp(prefix="mom_test_storage_"))
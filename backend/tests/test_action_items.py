@@ -0,0 +1,30 @@
+# backend/tests/test_action_items.py
+import pytest
+
+from action_items import ActionItemExtractor
+
+
+@pytest.mark.parametrize("sentence, owner", [
+    ("Remember to assign the task to Priya by Friday.", "Priya"),
+    ("Assign the budget review to Ravi Kumar.", "Ravi Kumar"),
+    ("The deck is assigned to Asha.", "Asha"),
+    ("Priya will send the deck by Friday.", "Priya"),
+    ("We agreed that Ravi should update the budget.", "Ravi"),
+    ("Owner: Meena", "Meena"),
+    ("@sam to check the logs", "sam"),
+    ("Make sure to send the deck.", None),
+    ("Remember to book the room.", None),
+    ("Please circulate the notes.", None),
+    ("Ensure the deliverable is complete by Monday.", None),
+])
+def test_owner(sentence, owner):
+    assert ActionItemExtractor.owner(sentence) == owner
+
+
+def test_extract_owner_and_due():
+    text = "Thanks everyone. Remember to assign the task to Priya by Friday. Ravi will do the slides."
+    items = ActionItemExtractor().extract(text)
+    assert [(i["text"], i["owner"], i["due"]) for i in items] == [
+        ("Remember to assign the task to Priya by Friday.", "Priya", "Friday"),
+        ("Ravi will do the slides.", "Ravi", None),
+    ]
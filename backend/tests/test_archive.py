@@ -0,0 +1,90 @@
+# backend/tests/test_archive.py
+import re
+
+import numpy as np
+import pytest
+
+import archive
+from archive import RRF_K, MeetingArchive, fts_query
+
+# toy embedding space: words about money share a dimension
+_DIMS = {"money": 0, "budget": 0, "costs": 0, "hiring": 1, "recruit": 1, "launch": 2}
+
+
+class _Embedder:
+    def encode(self, texts, **kwargs):
+        vecs = np.full((len(texts), 4), 0.01, dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                vecs[row, _DIMS.get(word, 3)] += 1.0
+        return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def meetings(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "get_embedder", lambda: _Embedder())
+    store = MeetingArchive(str(tmp_path / "archive.db"), pool_size=1, embeddings=True)
+    store.add_meeting("m1", {"meeting_name": "Finance sync", "date": "2024-05-02"}, "transcript one",
+                      [{"start": 0.0, "end": 4.0, "speaker": "Speaker 1", "text": "We need more money for the budget."},
+                       {"start": 4.0, "end": 8.0, "speaker": "Speaker 2", "text": "Costs are rising."}],
+                      {"summary": ["Money is tight."], "action_items": ["Asha to recruit an analyst."]},
+                      {"Speaker 1": "Asked for money."}, "en", "m1.docx")
+    store.add_meeting("m2", {"meeting_name": "Launch review"}, "transcript two",
+                      [{"start": 0.0, "end": 3.0, "text": "The launch slips a week."}],
+                      {"summary": "Launch delayed.", "action_items": []})
+    return store
+
+
+def test_fts_query_quotes_user_input():
+    assert fts_query('money OR "launch"') == '"money" "OR" "launch"*'
+    assert fts_query("  ?! ") == ""
+
+
+def test_fts_search(meetings):
+    hits = meetings.search("money")
+    # BM25: the shorter row ranks first
+    assert [(h["meeting_id"], h["kind"]) for h in hits] == [("m1", "summary"), ("m1", "segment")]
+    assert hits[0]["score"] > hits[1]["score"]
+    assert all("[money]" in h["snippet"].lower() for h in hits)
+
+    # the last word is a prefix; filtering by meeting
+    assert [h["text"] for h in meetings.search("laun")] == ["Launch delayed.", "The launch slips a week."]
+    assert meetings.search("launch", meeting_id="m1") == []
+
+
+def test_get_meeting_and_replace(meetings):
+    meeting = meetings.get_meeting("m1")
+    assert meeting["title"] == "Finance sync"
+    assert meeting["summary"] == ["Money is tight."]
+    assert [s["speaker"] for s in meeting["segments"]] == ["Speaker 1", "Speaker 2"]
+    assert meetings.get_meeting("missing") is None
+
+    # storing a meeting again replaces its indexed rows
+    meetings.add_meeting("m2", {"meeting_name": "Launch review"}, "", [], {"summary": ["On track."]})
+    assert meetings.search("slips") == []
+    assert [h["text"] for h in meetings.search("track")] == ["On track."]
+
+
+def test_hybrid_search_fuses_ranks(meetings):
+    semantic = meetings.search("money", mode="semantic", limit=3)
+    # "Costs are rising." has no word in common with the query, but the same meaning
+    assert "Costs are rising." in [h["text"] for h in semantic]
+
+    hybrid = meetings.search("money", mode="hybrid", limit=3)
+    fts_ids = [h["id"] for h in meetings.search("money", limit=6)]
+    sem_ids = [h["id"] for h in meetings.search("money", mode="semantic", limit=6)]
+    expected = {}
+    for ids in (fts_ids, sem_ids):
+        for rank, sid in enumerate(ids):
+            expected[sid] = expected.get(sid, 0.0) + 1.0 / (RRF_K + rank + 1)
+    best = sorted(expected, key=lambda sid: -expected[sid])[:3]
+    assert [h["id"] for h in hybrid] == best
+    assert [h["score"] for h in hybrid] == [round(expected[sid], 5) for sid in best]
+    # found by both searches: ranked above hits only one of them found
+    assert set(fts_ids) & set(sem_ids) >= {hybrid[0]["id"]}
+
+
+def test_semantic_modes_need_embeddings(tmp_path):
+    store = MeetingArchive(str(tmp_path / "plain.db"), pool_size=1, embeddings=False)
+    with pytest.raises(ValueError):
+        store.search("money", mode="semantic")
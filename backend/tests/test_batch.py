@@ -0,0 +1,69 @@
+# backend/tests/test_batch.py
+import json
+import os
+
+from batch import AUDIO_EXTS, Manifest, _fingerprint, _uid, discover, run
+
+
+def test_discover_walks_directories_and_reads_the_list(tmp_path, capsys):
+    (tmp_path / "b").mkdir()
+    for name in ("a.mp3", "notes.txt", "b/c.WAV"):
+        (tmp_path / name).write_bytes(b"x")
+    listing = tmp_path / "files.jsonl"
+    listing.write_text('# comment\na.mp3\n{"path": "notes.txt", "metadata": {"location": "Room 4"}}\n',
+                       encoding="utf-8")
+
+    found = discover([str(tmp_path), str(tmp_path / "gone.mp3")], str(listing), AUDIO_EXTS)
+
+    assert found == [(str(tmp_path / "a.mp3"), {}), (str(tmp_path / "b" / "c.WAV"), {}),
+                     (str(tmp_path / "notes.txt"), {"location": "Room 4"})]
+    assert "Skipping missing input" in capsys.readouterr().out
+
+
+def test_same_named_recordings_get_distinct_outputs(tmp_path):
+    assert _uid(str(tmp_path / "x" / "talk.mp3")) != _uid(str(tmp_path / "y" / "talk.mp3"))
+    assert _uid(str(tmp_path / "x" / "talk.mp3")).startswith("talk_")
+
+
+def test_manifest_resumes_after_an_interrupted_run(tmp_path):
+    path = str(tmp_path / "manifest.jsonl")
+    docx = tmp_path / "a.docx"
+    docx.write_bytes(b"x")
+    manifest = Manifest(path)
+    manifest.write({"path": "a", "fingerprint": "1:1", "status": "done", "docx": str(docx)})
+    manifest.write({"path": "b", "fingerprint": "2:2", "status": "failed", "attempts": 1})
+    manifest.write({"path": "b", "fingerprint": "2:2", "status": "failed", "attempts": 2})
+    manifest.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"path": "c", "stat')  # killed mid-write
+
+    manifest = Manifest(path)
+    assert manifest.is_done("a", "1:1")
+    assert not manifest.is_done("a", "1:2")  # file changed since
+    assert manifest.attempts("b", "2:2") == 2 and manifest.attempts("b", "3:3") == 0
+    docx.unlink()
+    assert not manifest.is_done("a", "1:1")  # output deleted
+
+    manifest.compact()
+    manifest.close()
+    with open(path, encoding="utf-8") as f:
+        assert [json.loads(line)["path"] for line in f] == ["a", "b"]
+
+
+def test_finished_and_exhausted_files_are_skipped(tmp_path):
+    done, failing = tmp_path / "done.mp3", tmp_path / "failing.mp3"
+    for p in (done, failing):
+        p.write_bytes(b"x")
+    docx = tmp_path / "done.docx"
+    docx.write_bytes(b"x")
+    manifest = Manifest(str(tmp_path / "manifest.jsonl"))
+    manifest.write({"path": str(done), "fingerprint": _fingerprint(str(done)), "status": "done",
+                    "docx": str(docx)})
+    manifest.write({"path": str(failing), "fingerprint": _fingerprint(str(failing)), "status": "failed",
+                    "attempts": 3})
+    items = [(str(done), {}), (str(failing), {}), (str(tmp_path / "gone.mp3"), {})]
+
+    # nothing left to do, so no worker pools are started
+    assert run(items, str(tmp_path), manifest, workers=1, threads=1, archive=False,
+               max_attempts=3, force=False) == (0, 0, 3)
+    manifest.close()
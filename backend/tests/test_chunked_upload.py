@@ -0,0 +1,73 @@
+# backend/tests/test_chunked_upload.py
+import hashlib
+import io
+
+import pytest
+
+import storage
+from chunked_upload import UploadError, UploadManager
+
+
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "UPLOAD_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _uploaded(manager, data=b"x" * 64, sha256=None):
+    session = manager.init("talk.m4a", len(data), sha256=sha256)
+    manager.put_chunk(session.id, 0, io.BytesIO(data), len(data))
+    return session
+
+
+def test_finalize_hashes_through_run():
+    data = b"meeting audio" * 10
+    finals, ran = [], []
+    manager = UploadManager(submit_prefix=lambda s, nbytes, final: finals.append((s.id, nbytes, final)))
+    session = _uploaded(manager, data, sha256=hashlib.sha256(data).hexdigest())
+
+    manager.finalize(session.id, run=lambda fn, *args: ran.append(fn.__name__) or fn(*args))
+
+    assert ran == ["_file_sha256"]
+    assert session.status == "complete"
+    assert finals == [(session.id, len(data), True)]
+
+
+def test_finalize_rejects_checksum_mismatch():
+    manager = UploadManager()
+    session = _uploaded(manager, sha256="0" * 64)
+    with pytest.raises(UploadError) as e:
+        manager.finalize(session.id)
+    assert e.value.status == 422 and session.status == "corrupt"
+
+
+def test_restart_requeues_final_pass_of_finalized_uploads():
+    before = UploadManager(submit_prefix=lambda s, nbytes, final: None)
+    finalized = _uploaded(before)
+    before.finalize(finalized.id)
+    uploading = before.init("half.m4a", 100)
+    processed = _uploaded(before)
+    before.finalize(processed.id)
+    processed.status = "processed"
+    processed.save()
+
+    # a new process: only the finalized, unprocessed upload is queued again
+    finals = []
+    after = UploadManager(submit_prefix=lambda s, nbytes, final: finals.append((s.id, nbytes, final)))
+    assert after.recover() == 1
+    assert finals == [(finalized.id, finalized.size, True)]
+    assert after.get(finalized.id).status == "complete"
+    assert after.get(uploading.id).status == "uploading"
+    assert len(finals) == 1
+
+
+def test_status_poll_after_restart_requeues_final_pass():
+    before = UploadManager(submit_prefix=lambda s, nbytes, final: None)
+    session = _uploaded(before)
+    before.finalize(session.id)
+
+    finals = []
+    after = UploadManager(submit_prefix=lambda s, nbytes, final: finals.append(s.id))
+    after.get(session.id)
+    after.get(session.id)
+    assert finals == [session.id]
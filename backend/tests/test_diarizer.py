@@ -0,0 +1,87 @@
+# backend/tests/test_diarizer.py
+import json
+
+import numpy as np
+
+from transcribe import SAMPLE_RATE, OnlineDiarizer
+
+VOICES = {
+    # (pitch in Hz, formant centres in Hz)
+    "A": (110.0, (500.0, 1500.0, 2500.0)),
+    "B": (230.0, (850.0, 1200.0, 3200.0)),
+}
+
+
+def _voice(rng, who, seconds):
+    """
+    A crude voiced sound: a harmonic source with drifting pitch, shaped by
+    the speaker's formants, so two "speakers" differ the way MFCCs see it.
+    """
+    f0, formants = VOICES[who]
+    n = int(seconds * SAMPLE_RATE)
+    t = np.arange(n) / SAMPLE_RATE
+    pitch = f0 * (1 + 0.08 * np.sin(2 * np.pi * rng.uniform(0.5, 2) * t + rng.uniform(0, 6)))
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    source = sum(np.sin(k * phase) for k in range(1, 40)) + 0.3 * rng.normal(size=n)
+    source *= 1 + 0.5 * np.sin(2 * np.pi * rng.uniform(2, 5) * t)
+    freqs = np.fft.rfftfreq(n, 1 / SAMPLE_RATE)
+    envelope = sum(np.exp(-0.5 * ((freqs - fc) / 120) ** 2) for fc in formants) + 0.02
+    x = np.fft.irfft(np.fft.rfft(source) * envelope, n)
+    return (0.1 * x / np.abs(x).max()).astype(np.float32)
+
+
+def _meeting(turns, seconds=2.0, seed=1):
+    rng = np.random.default_rng(seed)
+    audio = np.concatenate([_voice(rng, who, seconds) for who in turns])
+    segments = [{"start": i * seconds, "end": (i + 1) * seconds, "text": who} for i, who in enumerate(turns)]
+    return audio, segments
+
+
+def test_alternating_speakers_get_stable_labels():
+    audio, segments = _meeting("ABABBA")
+    OnlineDiarizer().label_segments(audio, segments)
+    assert [s["speaker"] for s in segments] == [
+        "Speaker 1", "Speaker 2", "Speaker 1", "Speaker 2", "Speaker 2", "Speaker 1"]
+
+
+def test_state_round_trip_keeps_labels_across_passes():
+    audio, segments = _meeting("ABABBA")
+    whole = [dict(s) for s in segments]
+    OnlineDiarizer().label_segments(audio, whole)
+
+    # two passes over a growing recording, the state stored as JSON in between
+    first = OnlineDiarizer()
+    first.label_segments(audio, segments[:3])
+    state = json.loads(json.dumps(first.state()))
+    offset = segments[3]["start"]
+    OnlineDiarizer.from_state(state).label_segments(audio[int(offset * SAMPLE_RATE):], segments[3:],
+                                                    offset_s=offset)
+    assert [s["speaker"] for s in segments] == [s["speaker"] for s in whole]
+
+
+def test_speaker_limit():
+    audio, segments = _meeting("ABAB")
+    OnlineDiarizer(max_speakers=1).label_segments(audio, segments)
+    assert {s["speaker"] for s in segments} == {"Speaker 1"}
+
+
+def test_short_segments_follow_the_previous_speaker():
+    audio, segments = _meeting("AB")
+    segments.append({"start": 3.5, "end": 3.8, "text": "yes"})
+    diarizer = OnlineDiarizer()
+    diarizer.label_segments(audio, segments)
+    assert segments[2]["speaker"] == segments[1]["speaker"] == "Speaker 2"
+
+    # nothing to go on yet: no label rather than a guess
+    fresh = [{"start": 0.0, "end": 0.3, "text": "hi"}]
+    OnlineDiarizer().label_segments(audio, fresh)
+    assert "speaker" not in fresh[0]
+
+
+def test_speaker_models_stay_bounded():
+    model_frames = 500
+    audio, segments = _meeting("AAAAAA")
+    diarizer = OnlineDiarizer(model_frames=model_frames)
+    diarizer.label_segments(audio, segments)
+    assert {s["speaker"] for s in segments} == {"Speaker 1"}
+    assert all(spk[0] <= model_frames for spk in diarizer.speakers if spk is not None)
@@ -0,0 +1,122 @@
+# backend/tests/test_docx_render.py
+import io
+
+import pytest
+from docx import Document
+
+from docx_render import render_mom_docx
+
+METADATA = {
+    "meeting_name": "Budget review",
+    "date": "2024-05-02",
+    "time": "10:00",
+    "minutes_prepared_by": "Asha",
+    "location": "Room 4",
+    "coordinated_by": "Ravi",
+}
+MINUTES = [{"start": 0.0, "speaker": "", "text": "Opening."},
+           {"start": 5.5, "speaker": "Speaker 1", "text": "Costs are up."}]
+PERSONS = {"Speaker 1": "Talked about costs."}
+
+
+def _shape(source):
+    """
+    (style, text, bold runs) per paragraph: what a reader of the document sees.
+    """
+    doc = Document(source)
+    return [(p.style.name, p.text, [r.text for r in p.runs if r.bold]) for p in doc.paragraphs]
+
+
+def _render(metadata, sections, persons, **kwargs):
+    buf = io.BytesIO()
+    render_mom_docx(buf, metadata, sections, persons, **kwargs)
+    buf.seek(0)
+    return _shape(buf)
+
+
+def _header(doc, metadata, default):
+    doc.add_heading("Minutes of the Meeting", level=1)
+    doc.add_paragraph(f"Meeting Name: {metadata.get('meeting_name', default)}")
+    doc.add_paragraph(f"Date of Meeting: {metadata.get('date', default)}\t Time: {metadata.get('time', default)}")
+    doc.add_paragraph(f"Minutes Prepared By: {metadata.get('minutes_prepared_by', default)}")
+    doc.add_paragraph(f"Location: {metadata.get('location', default)}")
+    doc.add_paragraph("")
+
+
+def _tail(doc, sections, persons, bold_timestamps):
+    doc.add_paragraph("")
+    doc.add_heading("Summary", level=2)
+    for line in sections["summary"]:
+        doc.add_paragraph(line)
+
+    doc.add_paragraph("")
+    doc.add_heading("Action Items / Decisions", level=2)
+    for idx, act in enumerate(sections["action_items"], 1):
+        doc.add_paragraph(f"{idx}. {act}")
+
+    doc.add_paragraph("")
+    doc.add_heading("Detailed Minutes", level=2)
+    for seg in sections["detailed_minutes"]:
+        lead = f"[{seg['start']:.2f}] {seg.get('speaker') or ''} - "
+        if bold_timestamps:
+            p = doc.add_paragraph()
+            p.add_run(lead).bold = True
+            p.add_run(seg["text"])
+        else:
+            doc.add_paragraph(lead + seg["text"])
+
+    doc.add_paragraph("")
+    doc.add_heading("Person-wise Summary", level=2)
+    for sp, summ in persons.items():
+        doc.add_paragraph(f"{sp}: {summ}")
+
+
+def _golden(doc):
+    buf = io.BytesIO()
+    doc.save(buf)
+    buf.seek(0)
+    return _shape(buf)
+
+
+def test_minutes_layout_matches_docgen_output():
+    # docgen.create_docx_and_pdf as built paragraph by paragraph with python-docx
+    sections = {"meeting_objective": "Plan Q3", "summary": ["Costs rose."],
+                "action_items": ["Ravi to cut costs."], "detailed_minutes": MINUTES}
+    doc = Document()
+    _header(doc, METADATA, "")
+    doc.add_heading("1. Meeting Objective", level=2)
+    doc.add_paragraph("Plan Q3")
+    doc.add_paragraph("")
+    doc.add_paragraph("2. Coordinated by: Ravi")
+    doc.add_paragraph("")
+    doc.add_heading("3. Attendance at Meeting", level=2)
+    doc.add_paragraph("No attendees provided.")
+    _tail(doc, sections, PERSONS, bold_timestamps=True)
+
+    assert _render(METADATA, sections, PERSONS) == _golden(doc)
+
+
+def test_upload_layout_matches_app_output():
+    # app.create_mom_docx: coordinator under its own heading, plain timestamps
+    metadata = dict(METADATA, attendees=["Asha", "Ravi"])
+    del metadata["location"]
+    sections = {"meeting_objective": "N/A", "summary": ["1. Opening.", "2. Costs are up."],
+                "action_items": ["Opening.", "Costs are up."], "detailed_minutes": MINUTES}
+    doc = Document()
+    _header(doc, metadata, "N/A")
+    doc.add_heading("1. Meeting Objective", level=2)
+    doc.add_paragraph("N/A")
+    doc.add_paragraph("")
+    doc.add_heading("2. Coordinated by", level=2)
+    doc.add_paragraph("Ravi")
+    doc.add_paragraph("")
+    doc.add_heading("3. Attendance at Meeting", level=2)
+    doc.add_paragraph("Asha, Ravi")
+    _tail(doc, sections, PERSONS, bold_timestamps=False)
+
+    assert _render(metadata, sections, PERSONS, default="N/A", layout="upload") == _golden(doc)
+
+
+def test_unknown_layout():
+    with pytest.raises(ValueError):
+        render_mom_docx(io.BytesIO(), METADATA, {}, layout="fancy")
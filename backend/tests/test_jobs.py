@@ -0,0 +1,122 @@
+# backend/tests/test_jobs.py
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import chunked_upload
+import jobs
+from chunked_upload import UploadManager
+from jobs import JobQueue, QueueFull
+from transcribe import SAMPLE_RATE
+
+
+def _failing_pass(job_id, nbytes):
+    raise RuntimeError("decoder crashed")
+
+
+def _full_pass(job_id, nbytes):
+    return {"segments": [{"start": 0.0, "end": 1.0, "text": "hello"}], "nbytes": nbytes}
+
+
+@pytest.fixture
+def job_queue():
+    # jobs run on a thread instead of a spawned, model-loading process
+    q = JobQueue(1, "tiny", max_pending=2)
+    executor = ThreadPoolExecutor(max_workers=1)
+    q._get_executor = lambda: executor
+    yield q
+    executor.shutdown(wait=True)
+
+
+def _poll_until(q, condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out waiting for jobs"
+        q.poll()
+        time.sleep(0.01)
+
+
+def test_on_error_runs_for_failed_job(job_queue):
+    done, errors = [], []
+    job_id = job_queue.submit_call(_failing_pass, (10,), on_done=lambda job, r: done.append(r),
+                                   on_error=lambda job, e: errors.append((job, e)))
+    _poll_until(job_queue, lambda: errors)
+
+    job, error = errors[0]
+    assert job["id"] == job_id and job["status"] == "failed"
+    assert isinstance(error, RuntimeError)
+    assert not done
+    assert job_queue.get(job_id)["error"] == "decoder crashed"
+
+
+def test_failed_prefix_pass_does_not_stall_finalize(job_queue, monkeypatch):
+    monkeypatch.setattr(chunked_upload, "PREFIX_STEP_BYTES", 10)
+    finals = []
+    manager = UploadManager()
+
+    def submit(session, nbytes, final):
+        # same wiring as app._submit_upload_pass
+        if final:
+            job_queue.submit_call(_full_pass, (nbytes,), bounded=False,
+                                  on_done=lambda job, r: finals.append(r) or r)
+        else:
+            job_queue.submit_call(_failing_pass, (nbytes,),
+                                  on_done=lambda job, r: manager.prefix_done(session, r),
+                                  on_error=lambda job, e: manager.prefix_skipped(session))
+
+    manager.submit_prefix = submit
+    session = manager.init("talk.webm", 100)
+    manager.put_chunk(session.id, 0, io.BytesIO(b"a" * 50), 50)
+    assert session.prefix_inflight
+
+    # the tail arrives and the client finalizes while the prefix pass runs
+    manager.put_chunk(session.id, 50, io.BytesIO(b"b" * 50), 50)
+    manager.finalize(session.id)
+    assert session.finalize_pending
+
+    _poll_until(job_queue, lambda: finals)
+    assert not session.prefix_inflight
+    assert finals[0]["nbytes"] == 100
+
+
+def test_final_pass_decodes_the_complete_file(tmp_path, monkeypatch):
+    path = tmp_path / "talk.m4a"
+    path.write_bytes(b"\0" * 100)
+    decoded = []
+    audio = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    monkeypatch.setattr(jobs, "decode_audio", lambda p: decoded.append(("file", p)) or audio)
+    monkeypatch.setattr(jobs, "decode_prefix", lambda p, n: decoded.append(("prefix", p, n)) or audio)
+    monkeypatch.setattr(jobs, "transcribe_array", lambda *a, **k: ("", [], "en"))
+    monkeypatch.setattr(jobs, "DIARIZATION", False)
+
+    jobs.transcribe_prefix_job("j1", str(path), 60, 0.0, 5.0, None)
+    jobs.transcribe_prefix_job("j2", str(path), 100, 0.0, 0.0, None)
+
+    assert decoded == [("prefix", str(path), 60), ("file", str(path))]
+
+
+def test_full_queue_rejects_new_jobs(job_queue):
+    release = threading.Event()
+
+    def blocked(job_id):
+        release.wait(5)
+        return {}
+
+    job_queue.submit_call(blocked, ())
+    job_queue.submit_call(blocked, ())
+    assert job_queue.full()
+    with pytest.raises(QueueFull) as exc:
+        job_queue.submit_call(blocked, ())
+    assert exc.value.pending == 2 and exc.value.retry_after > 0
+
+    # work already admitted (an upload's last pass) still gets in
+    job_queue.submit_call(blocked, (), bounded=False)
+    assert job_queue.pending() == 3
+
+    release.set()
+    _poll_until(job_queue, lambda: job_queue.pending() == 0)
+    assert not job_queue.full()
@@ -0,0 +1,54 @@
+# backend/tests/test_live_inbox.py
+import threading
+import time
+
+from streaming import LiveInbox
+
+
+def test_inbox_coalesces_chunks_for_one_drainer():
+    inbox = LiveInbox(max_bytes=10)
+    assert inbox.put(b"abc") == (True, True)
+    assert inbox.put(b"def") == (True, False)
+    assert inbox.take() == b"abcdef"
+    assert inbox.put(b"g") == (True, False)  # still the same drainer's turn
+    assert inbox.take() == b"g"
+    assert inbox.take() == b"" and inbox.idle.is_set()
+    assert inbox.put(b"h") == (True, True)
+
+
+def test_inbox_refuses_chunks_beyond_its_budget():
+    inbox = LiveInbox(max_bytes=4)
+    # a single oversized chunk is still taken when nothing is queued
+    assert inbox.put(b"123456") == (True, True)
+    assert inbox.put(b"7") == (False, False)
+    assert inbox.take() == b"123456"
+    assert inbox.put(b"1234") == (True, False)
+    assert inbox.put(b"5") == (False, False)
+
+
+def test_inbox_close_waits_for_the_drainer():
+    inbox = LiveInbox(max_bytes=10)
+    inbox.put(b"ab")
+    drained = []
+
+    def drain():
+        time.sleep(0.1)
+        while True:
+            blob = inbox.take()
+            if not blob:
+                return
+            drained.append(blob)
+
+    drainer = threading.Thread(target=drain)
+    drainer.start()
+    assert inbox.close(timeout=5) == b""
+    drainer.join(5)
+    assert drained == [b"ab"]
+    assert inbox.put(b"cd") == (False, False)
+
+
+def test_inbox_close_returns_what_a_stuck_drainer_left():
+    inbox = LiveInbox(max_bytes=10)
+    inbox.put(b"ab")
+    inbox.put(b"cd")
+    assert inbox.close(timeout=0.05) == b"abcd"
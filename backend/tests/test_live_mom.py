@@ -0,0 +1,98 @@
+# backend/tests/test_live_mom.py
+import threading
+
+import pytest
+
+import live_mom
+from live_mom import LiveMomSession
+
+
+@pytest.fixture
+def summarized(monkeypatch):
+    """Chunk texts sent to the (stub) summarizer, one list per model call."""
+    calls = []
+
+    def summarize_many(requests):
+        calls.append([text for text, _, _ in requests])
+        return [f"S({text.split()[0]})" for text, _, _ in requests]
+
+    monkeypatch.setattr(live_mom, "summarize_many", summarize_many)
+    return calls
+
+
+def _segments(*texts):
+    return [{"start": float(i), "end": float(i + 1), "text": t} for i, t in enumerate(texts)]
+
+
+def test_append_returns_only_new_minutes():
+    session = LiveMomSession(chunk_chars=40)
+    first = session.append(_segments("Alpha starts the call."))
+    second = session.append(_segments("  ", "Beta reviews the budget."))
+
+    assert [m["text"] for m in first["minutes"]] == ["Alpha starts the call."]
+    assert [m["text"] for m in second["minutes"]] == ["Beta reviews the budget."]
+    assert (first["version"], second["version"]) == (1, 2)
+    assert session.append(_segments("", " ")) is None
+
+
+def test_summarize_sends_each_completed_chunk_once(summarized):
+    session = LiveMomSession(chunk_chars=40)
+    session.append(_segments("Alpha opens the meeting today.", "Beta reviews the budget now."))
+    delta = session.summarize()
+
+    # the second sentence no longer fits the first chunk: only that one is complete
+    assert summarized == [["Alpha opens the meeting today."]]
+    assert delta["summary_points"] == ["S(Alpha)"]
+    assert session.summarize() is None
+    assert len(summarized) == 1
+
+    session.append(_segments("Gamma closes the budget item."))
+    delta = session.summarize()
+    assert summarized[-1] == ["Beta reviews the budget now."]
+    assert delta["summary_points"] == ["S(Beta)"]
+    assert delta["summary"] == "S(Alpha) S(Beta)"
+
+
+def test_repeated_chunks_are_tracked_by_index(summarized):
+    # identical chunk texts are distinct chunks: neither is skipped or merged
+    session = LiveMomSession(chunk_chars=20)
+    session.append(_segments("Same line again.", "Same line again.", "Last one here."))
+    session.summarize()
+
+    assert summarized == [["Same line again.", "Same line again."]]
+    assert session.points() == ["S(Same)", "S(Same)"]
+
+
+def test_finish_summarizes_the_open_chunk_once(summarized):
+    session = LiveMomSession(chunk_chars=40)
+    session.append(_segments("Alpha opens the meeting today.", "Beta will deliver the report."))
+    session.summarize()
+    mom = session.finish()
+
+    assert summarized == [["Alpha opens the meeting today."], ["Beta will deliver the report."]]
+    assert mom["summary"] == "S(Alpha) S(Beta)"
+    assert mom["action_items"] == ["Beta will deliver the report."]
+    assert session.summarize(final=True) is None
+    assert len(summarized) == 2
+
+
+def test_summarize_without_wait_skips_while_another_runs(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_summarize_many(requests):
+        started.set()
+        release.wait(5)
+        return ["S" for _ in requests]
+
+    monkeypatch.setattr(live_mom, "summarize_many", slow_summarize_many)
+    session = LiveMomSession(chunk_chars=20)
+    session.append(_segments("First sentence here.", "Second sentence here."))
+    results = []
+    worker = threading.Thread(target=lambda: results.append(session.summarize()))
+    worker.start()
+    assert started.wait(5)
+
+    assert session.summarize(wait=False) is None
+    release.set()
+    worker.join(5)
+    assert results[0]["summary_points"] == ["S"]
@@ -0,0 +1,60 @@
+# backend/tests/test_models.py
+import threading
+import time
+
+import pytest
+
+import models
+from models import ModelRegistry
+
+
+def test_concurrent_first_gets_load_once():
+    loads = []
+
+    def loader():
+        loads.append(1)
+        time.sleep(0.1)
+        return object()
+
+    registry = ModelRegistry()
+    registry.register("summarizer", loader)
+    got = []
+    threads = [threading.Thread(target=lambda: got.append(registry.get("summarizer"))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+
+    assert len(loads) == 1 and len({id(m) for m in got}) == 1
+    assert registry.loaded() == ["summarizer"]
+    assert "summarizer" in registry.load_times()
+    with pytest.raises(KeyError):
+        registry.get("missing")
+
+
+def test_sweep_unloads_only_idle_models():
+    registry = ModelRegistry(ttl=60)
+    registry.register("a", object)
+    registry.register("b", object)
+    first = registry.get("a")
+    registry.get("b")
+    registry._last_used["a"] -= 120
+
+    assert registry.sweep() == ["a"]
+    assert registry.loaded() == ["b"]
+    assert registry.get("a") is not first  # reloaded on next use
+    assert ModelRegistry(ttl=0).sweep() == []
+
+
+def test_warmup_resolves_aliases_and_survives_failures(monkeypatch):
+    registry = ModelRegistry()
+    registry.register("asr", object)
+
+    def broken():
+        raise OSError("no weights")
+
+    registry.register("summarizer", broken)
+    monkeypatch.setattr(models, "registry", registry)
+
+    models.warmup(["whisper", "asr", "summarizer"])
+    assert registry.loaded() == ["asr"]
@@ -0,0 +1,103 @@
+# backend/tests/test_nlp.py
+import pytest
+
+import nlp
+from nlp import summarize_many
+
+
+class _Summarizer:
+    """
+    Stands in for the transformers pipeline: "summarizes" a text to its
+    first word and records every call. Batches containing "boom" fail.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, max_length, min_length, **kwargs):
+        self.calls.append(texts)
+        if isinstance(texts, str):
+            return [{"summary_text": f"{texts.split()[0]}/{max_length}"}]
+        if any("boom" in t for t in texts):
+            raise RuntimeError("batch failed")
+        return [{"summary_text": f"{t.split()[0]}/{max_length}"} for t in texts]
+
+
+@pytest.fixture
+def summarizer(monkeypatch):
+    stub = _Summarizer()
+    monkeypatch.setattr(nlp, "get_summarizer", lambda: stub)
+    return stub
+
+
+def test_duplicates_are_summarized_once(summarizer):
+    out = summarize_many([("Alpha one.", 120, 20), ("Alpha one.", 120, 20), ("Alpha one.", 80, 12)])
+    assert out == ["Alpha/120", "Alpha/120", "Alpha/80"]
+    # one call per length setting, each with the text once
+    assert sorted(summarizer.calls) == [["Alpha one."], ["Alpha one."]]
+
+
+def test_results_keep_input_order_after_length_sort(summarizer):
+    texts = ["Longest text of them all here.", "Short.", "", "Medium sized text."]
+    out = summarize_many([(t, 120, 20) for t in texts], batch_size=2)
+    assert out == ["Longest/120", "Short./120", "", "Medium/120"]
+    # batches are filled shortest first
+    assert summarizer.calls == [["Short.", "Medium sized text."], ["Longest text of them all here."]]
+
+
+def test_failed_batch_falls_back_per_item(summarizer):
+    out = summarize_many([("Fine text.", 120, 20), ("boom goes this one.", 120, 20)])
+    assert out == ["Fine/120", "boom/120"]
+    # the failed batch, then safe_summarize on each of its texts
+    assert summarizer.calls[1:] == ["Fine text.", "boom goes this one."]
+
+
+class _Tokenizer:
+    def encode(self, text, add_special_tokens=True):
+        return text.split()
+
+
+def test_chunk_tokens_packs_whole_sentences(summarizer):
+    summarizer.tokenizer = _Tokenizer()
+    text = "One two three. Four five six. Seven eight nine. A very long sentence of many words here."
+    assert nlp.chunk_tokens(text, max_tokens=7) == [
+        "One two three. Four five six.",
+        "Seven eight nine.",
+        "A very long sentence of many words here.",
+    ]
+    assert nlp.chunk_tokens("", max_tokens=7) == []
+
+
+def test_hierarchical_summary_reduces_level_by_level(summarizer):
+    summarizer.tokenizer = _Tokenizer()
+    text = " ".join(f"Point{i} was discussed at length today." for i in range(16))
+
+    out = nlp.hierarchical_summarize(text, target_chars=40, level_tokens=12, max_levels=4, workers=1)
+
+    # level 1: 8 chunks of two sentences -> 8 one-word summaries, which
+    # fit one chunk at level 2 -> a summary of the summaries
+    assert [len(c) for c in summarizer.calls] == [8, 1]
+    assert out == "Point0/120/120"
+
+
+def test_hierarchical_summary_stops_when_nothing_shrinks(summarizer, monkeypatch):
+    summarizer.tokenizer = _Tokenizer()
+    monkeypatch.setattr(nlp, "summarize_many", lambda requests: [t for t, _, _ in requests])
+    text = "First point. Second point. Third point."
+    assert nlp.hierarchical_summarize(text, target_chars=5, level_tokens=2, max_levels=4, workers=1) == text
+
+
+def test_map_pool_follows_the_requested_worker_count(monkeypatch):
+    created = []
+
+    class Pool:
+        def __init__(self, max_workers, **kwargs):
+            created.append(max_workers)
+
+    monkeypatch.setattr(nlp, "ProcessPoolExecutor", Pool)
+    monkeypatch.setattr(nlp, "_map_pools", {})
+
+    two = nlp._get_map_pool(2)
+    assert nlp._get_map_pool(2) is two
+    assert nlp._get_map_pool(3) is not two
+    assert created == [2, 3]
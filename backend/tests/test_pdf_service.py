@@ -0,0 +1,64 @@
+# backend/tests/test_pdf_service.py
+import threading
+
+import pytest
+from docx import Document
+
+import pdf_service
+from pdf_service import PdfService
+
+
+@pytest.fixture
+def conversions(monkeypatch):
+    calls = []
+    gate = threading.Event()
+
+    def convert(worker, docx, pdf):
+        gate.wait(5)
+        calls.append(docx.name)
+        pdf.write_bytes(b"%PDF " + docx.read_bytes()[:16])
+
+    monkeypatch.setattr(pdf_service, "_have_uno", lambda: True)
+    monkeypatch.setattr(pdf_service._OfficeWorker, "convert", convert)
+    return calls, gate
+
+
+def _docx(path, text):
+    doc = Document()
+    doc.add_paragraph(text)
+    doc.save(path)
+    return path
+
+
+def test_identical_documents_convert_once(tmp_path, conversions):
+    calls, gate = conversions
+    service = PdfService(workers=2, cache_dir=str(tmp_path / "cache"))
+    first = _docx(tmp_path / "a.docx", "Minutes")
+    second = _docx(tmp_path / "b.docx", "Minutes")  # same content, new zip timestamps
+    other = _docx(tmp_path / "c.docx", "Other minutes")
+
+    futures = [service.submit(first), service.submit(second), service.submit(other)]
+    assert service.status(tmp_path / "b.pdf") == "pending"
+    gate.set()
+    results = [f.result(5) for f in futures]
+
+    assert sorted(calls) == ["a.docx", "c.docx"]
+    assert results == [str(tmp_path / n) for n in ("a.pdf", "b.pdf", "c.pdf")]
+    assert (tmp_path / "a.pdf").read_bytes() == (tmp_path / "b.pdf").read_bytes()
+    assert service.status(tmp_path / "b.pdf") == "done"
+
+    # a later request for the same content copies from the cache
+    third = _docx(tmp_path / "d.docx", "Minutes")
+    assert service.submit(third).result(5) == str(tmp_path / "d.pdf")
+    assert len(calls) == 2
+
+
+def test_missing_uno_is_refused_when_required(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_service, "_have_uno", lambda: False)
+    monkeypatch.setattr(pdf_service, "PDF_REQUIRE_UNO", True)
+    with pytest.raises(RuntimeError):
+        PdfService(workers=1, cache_dir=str(tmp_path))
+
+
+def test_blocking_call_runs_inline_when_not_monkey_patched():
+    assert pdf_service._blocking(lambda a, b: a + b, 1, 2) == 3
@@ -0,0 +1,85 @@
+# backend/tests/test_pipeline.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pipeline import Stage, StagedPipeline
+
+
+@pytest.fixture
+def executors():
+    pools = []
+
+    def make(n=1):
+        pools.append(ThreadPoolExecutor(max_workers=n))
+        return pools[-1]
+
+    yield make
+    for pool in pools:
+        pool.shutdown(wait=True)
+
+
+def _timed(name, log, seconds=0.05):
+    def fn(item, value):
+        start = time.time()
+        time.sleep(seconds)
+        log.append((name, item, start, time.time()))
+        return (value or []) + [name]
+    return fn
+
+
+def test_stages_overlap_across_items(executors):
+    log = []
+    pipeline = StagedPipeline([Stage("transcribe", _timed("transcribe", log), executors()),
+                               Stage("summarize", _timed("summarize", log), executors())])
+    results = {item: value for item, value, error in pipeline.run(range(3)) if error is None}
+
+    assert results == {n: ["transcribe", "summarize"] for n in range(3)}
+    spans = {(name, item): (start, end) for name, item, start, end in log}
+    # item 1 is transcribed while item 0 is summarized
+    start, end = spans[("summarize", 0)]
+    other_start, other_end = spans[("transcribe", 1)]
+    assert other_start < end and start < other_end
+
+
+def test_full_queue_stops_reading_input(executors):
+    release = threading.Event()
+    pulled = []
+
+    def source():
+        for n in range(50):
+            pulled.append(n)
+            yield n
+
+    def blocked(item, value):
+        release.wait(5)
+        return item
+
+    pipeline = StagedPipeline([Stage("fast", lambda item, value: item, executors()),
+                               Stage("slow", blocked, executors())], queue_size=2)
+    finished = []
+    consumer = threading.Thread(target=lambda: finished.extend(item for item, _, _ in pipeline.run(source())))
+    consumer.start()
+    time.sleep(0.2)
+    # one item in the slow stage, two queued for it and one finishing the fast stage
+    assert len(pulled) <= 4
+    release.set()
+    consumer.join(5)
+    assert sorted(finished) == list(range(50))
+
+
+def test_failed_item_does_not_stop_the_rest(executors):
+    def fragile(item, value):
+        if item == 1:
+            raise ValueError("bad recording")
+        return item * 10
+
+    pipeline = StagedPipeline([Stage("first", fragile, executors(2), workers=2),
+                               Stage("second", lambda item, value: value + 1, executors())])
+    outcomes = {item: (value, error) for item, value, error in pipeline.run(range(3))}
+
+    assert outcomes[0] == (1, None) and outcomes[2] == (21, None)
+    value, error = outcomes[1]
+    assert value is None and isinstance(error, ValueError)
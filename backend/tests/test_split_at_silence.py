@@ -0,0 +1,85 @@
+# backend/tests/test_split_at_silence.py
+import numpy as np
+
+import transcribe
+from transcribe import SAMPLE_RATE, split_at_silence
+
+
+def _regions_with_gaps(gaps, total_s):
+    # speech everywhere except a 1 s gap centred on each cut point
+    regions, start = [], 0
+    for g in gaps:
+        regions.append((start, int((g - 0.5) * SAMPLE_RATE)))
+        start = int((g + 0.5) * SAMPLE_RATE)
+    regions.append((start, int(total_s * SAMPLE_RATE)))
+    return regions
+
+
+def _split(monkeypatch, gaps, total_s, target_s=60.0, max_s=120.0):
+    monkeypatch.setattr(transcribe, "find_speech_regions",
+                        lambda audio, sr=SAMPLE_RATE: _regions_with_gaps(gaps, total_s))
+    audio = np.zeros(int(total_s * SAMPLE_RATE), dtype=np.float32)
+    bounds = split_at_silence(audio, target_s=target_s, max_s=max_s)
+    return [(round(s / SAMPLE_RATE, 3), round(e / SAMPLE_RATE, 3)) for s, e in bounds]
+
+
+def test_cuts_after_the_chosen_one_stay_candidates(monkeypatch):
+    # four gaps inside the first max_s window: 55 s is chosen, and 100 s
+    # must still be available for the next chunk instead of a hard cut
+    assert _split(monkeypatch, [30, 55, 70, 100], 200) == [(0.0, 55.0), (55.0, 100.0), (100.0, 200.0)]
+
+
+def test_gap_at_target_after_an_early_cut(monkeypatch):
+    assert _split(monkeypatch, [49.995, 109.995, 240], 300.5) == [
+        (0.0, 49.995), (49.995, 109.995), (109.995, 229.995), (229.995, 300.5)]
+
+
+def test_hard_cut_without_gaps(monkeypatch):
+    assert _split(monkeypatch, [], 250) == [(0.0, 120.0), (120.0, 240.0), (240.0, 250.0)]
+
+
+def test_bounds_are_contiguous(monkeypatch):
+    bounds = _split(monkeypatch, [12, 40, 41, 95, 150, 151, 152, 260, 300], 400)
+    assert bounds[0][0] == 0.0 and bounds[-1][1] == 400.0
+    assert all(a[1] == b[0] for a, b in zip(bounds, bounds[1:]))
+    assert all(e - s <= 120.0 for s, e in bounds)
+
+
+def test_vad_compacted_audio_is_split_where_silence_was(monkeypatch):
+    # six 50 s bursts of "speech" with 3 s pauses: after drop_silence the
+    # pauses are gone, so the only sensible cut points are the region joins
+    rng = np.random.default_rng(0)
+    burst, pause = 50 * SAMPLE_RATE, np.zeros(3 * SAMPLE_RATE, dtype=np.float32)
+    parts = []
+    for _ in range(6):
+        parts += [rng.normal(0, 0.1, burst).astype(np.float32), pause]
+    original = np.concatenate(parts)
+    chunks = []
+
+    class Pool:
+        def submit(self, fn, *args):
+            class Done:
+                result = staticmethod(lambda: fn(*args))
+            return Done()
+
+    def transcribe_chunk(audio, offset_s, model_name, options):
+        chunks.append((offset_s, audio.size / SAMPLE_RATE))
+        return [{"start": round(offset_s + 1.0, 2), "end": round(offset_s + 2.0, 2), "text": "words"}]
+
+    monkeypatch.setattr(transcribe, "decode_audio", lambda path: original)
+    monkeypatch.setattr(transcribe, "VAD_FILTER", True)
+    monkeypatch.setattr(transcribe, "DIARIZATION", False)
+    monkeypatch.setattr(transcribe, "_get_chunk_pool", lambda workers: Pool())
+    monkeypatch.setattr(transcribe, "_transcribe_chunk", transcribe_chunk)
+    monkeypatch.setattr(transcribe, "_detect_language_chunk", lambda audio, model_name: "en")
+
+    text, segments, language = transcribe.transcribe_file("talk.wav", use_cache=False, parallel=True)
+
+    compacted, timemap = transcribe.drop_silence(original)
+    joins = [round(j / SAMPLE_RATE, 3) for j in transcribe.region_joins(timemap)]
+    offsets = [round(offset, 3) for offset, _ in chunks]
+    assert len(chunks) > 1
+    assert all(offset in joins for offset in offsets[1:])
+    # segment times come back on the original recording: 1 s into a burst
+    burst_starts = [round(o_start, 1) for _, o_start, _ in timemap]
+    assert all(round(seg["start"] - 1.0, 1) in burst_starts for seg in segments)
@@ -0,0 +1,40 @@
+# backend/tests/test_storage.py
+import os
+import time
+
+import storage
+
+
+def _file(directory, name, size, age_s):
+    path = os.path.join(directory, name)
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    mtime = time.time() - age_s
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_expired_files_in_use_are_kept(tmp_path):
+    uploading = _file(tmp_path, "u1_talk.webm", 10, 7200)
+    sidecar = _file(tmp_path, "u1_talk.webm.upload.json", 10, 7200)
+    done = _file(tmp_path, "old.webm", 10, 7200)
+
+    stats = storage.sweep_directory(str(tmp_path), ttl_seconds=3600, quota_bytes=0,
+                                    keep={os.path.abspath(uploading), os.path.abspath(sidecar)})
+
+    assert stats["removed"] == 1
+    assert not os.path.exists(done)
+    assert os.path.exists(uploading) and os.path.exists(sidecar)
+
+
+def test_quota_skips_files_in_use(tmp_path):
+    # the oldest file is a pending job's input: the next oldest goes instead
+    pending = _file(tmp_path, "job_a.mp3", 100, 300)
+    older = _file(tmp_path, "b.mp3", 100, 200)
+    newer = _file(tmp_path, "c.mp3", 100, 100)
+
+    storage.sweep_directory(str(tmp_path), ttl_seconds=0, quota_bytes=150,
+                            keep={os.path.abspath(pending)})
+
+    assert os.path.exists(pending) and os.path.exists(newer)
+    assert not os.path.exists(older)
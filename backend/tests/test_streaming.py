@@ -0,0 +1,109 @@
+# backend/tests/test_streaming.py
+import numpy as np
+import pytest
+
+import streaming
+from streaming import SAMPLE_RATE, PcmRingBuffer, StreamingTranscriber
+
+
+def _seconds(first, count, rng=np.random.default_rng(0)):
+    # second k of the recording carries k in its DC level, so the stub model
+    # can tell which absolute second it is looking at
+    return np.concatenate([(0.05 * rng.normal(size=SAMPLE_RATE) + k * 0.01).astype(np.float32)
+                           for k in range(first, first + count)])
+
+
+class _Model:
+    """
+    One 1 s segment per second of audio, its text naming the absolute second.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, **options):
+        self.calls.append(round(audio.size / SAMPLE_RATE, 2))
+        segments = []
+        for k in range(audio.size // SAMPLE_RATE):
+            block = audio[k * SAMPLE_RATE:(k + 1) * SAMPLE_RATE]
+            segments.append({"start": float(k), "end": float(k + 1), "text": f"w{int(round(block.mean() * 100))}"})
+        return {"segments": segments, "language": "en"}
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.setattr(streaming, "DIARIZATION", False)
+    return StreamingTranscriber(_Model(), window_s=15.0, overlap_s=2.0)
+
+
+def _texts(segments):
+    return [s["text"] for s in segments]
+
+
+def test_ring_buffer_wraps_and_clamps():
+    ring = PcmRingBuffer(1.0)
+    ring.write(np.arange(SAMPLE_RATE, dtype=np.float32))
+    ring.write(np.full(SAMPLE_RATE // 2, -1.0, dtype=np.float32))
+
+    assert ring.total == SAMPLE_RATE * 3 // 2 and ring.oldest == SAMPLE_RATE // 2
+    # reads before the oldest retained sample are clamped
+    out = ring.read(0)
+    assert out.size == SAMPLE_RATE
+    assert out[0] == SAMPLE_RATE // 2 and out[-1] == -1.0
+    assert ring.read(ring.total, ring.total + 10).size == 0
+
+
+def test_steps_commit_before_the_live_edge_and_close_flushes(engine):
+    engine.buffer.write(_seconds(0, 5))
+    first = engine.step()
+    # everything ending more than overlap_s before the edge is stable
+    assert first["stable"] == "w0 w1 w2" and first["tentative"] == "w3 w4"
+
+    engine.buffer.write(_seconds(5, 5))
+    second = engine.step()
+    assert _texts(second["segments"]) == ["w3", "w4", "w5", "w6", "w7"]
+    assert second["tentative"] == "w8 w9"
+    assert engine.model.calls == [5.0, 7.0]  # only audio after the commit point
+
+    final = engine.close()
+    assert final["stable"] == "w8 w9" and final["tentative"] == ""
+    assert _texts(engine.stable_segments) == [f"w{k}" for k in range(10)]
+    assert [s["start"] for s in engine.stable_segments] == [float(k) for k in range(10)]
+
+
+def test_lagging_session_skips_ahead_but_keeps_tentative_text(monkeypatch):
+    monkeypatch.setattr(streaming, "DIARIZATION", False)
+    engine = StreamingTranscriber(_Model(), window_s=5.0, overlap_s=2.0)
+    engine.buffer.write(_seconds(0, 3))
+    assert engine.step()["tentative"] == "w1 w2"
+
+    # ten seconds arrive while the model was busy: older audio is skipped,
+    # but what was already transcribed as tentative is committed first
+    engine.buffer.write(_seconds(3, 10))
+    update = engine.step()
+    assert update["dropped_s"] == 5.0
+    assert _texts(update["segments"]) == ["w1", "w2", "w8", "w9", "w10"]
+
+
+def test_silence_skips_the_model(engine):
+    engine.buffer.write(np.zeros(3 * SAMPLE_RATE, dtype=np.float32))
+    update = engine.step()
+    assert update["stable"] == "" and engine.model.calls == []
+    assert engine.committed == engine.buffer.total - 2 * SAMPLE_RATE
+
+
+def test_step_requests_are_coalesced(engine):
+    engine.buffer.write(_seconds(0, 3))
+    assert engine.request_step() is True
+    assert engine.request_step() is False  # the running loop picks it up
+    updates = []
+    engine.run_steps(emit=updates.append)
+
+    assert len(updates) == 1 and engine.steps_idle.is_set()
+    assert engine.request_step() is True
+
+
+def test_close_without_finalize_makes_no_model_call(engine):
+    engine.buffer.write(_seconds(0, 3))
+    assert engine.close(finalize=False) is None
+    assert engine.model.calls == []
@@ -0,0 +1,76 @@
+# backend/tests/test_telemetry.py
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import telemetry
+from telemetry import Metrics, get_request_id, in_context, reset_request_id, set_request_id, span
+
+
+def test_histogram_renders_cumulative_buckets():
+    m = Metrics()
+    m.describe("latency", "histogram", "Latency", buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.7, 5):
+        m.observe("latency", value, stage="asr")
+    m.inc("errors_total", stage='say "hi"')
+
+    lines = m.render().splitlines()
+    assert 'latency_bucket{stage="asr",le="0.1"} 1' in lines
+    assert 'latency_bucket{stage="asr",le="1"} 3' in lines
+    assert 'latency_bucket{stage="asr",le="+Inf"} 4' in lines
+    assert 'latency_count{stage="asr"} 4' in lines
+    assert 'errors_total{stage="say \\"hi\\""} 1.0' in lines
+
+
+def test_worker_updates_reach_the_parent_through_the_sink():
+    parent, worker, sent = Metrics(), Metrics(), []
+    worker.set_sink(sent.append)
+    worker.inc("jobs_total", worker="1")
+    worker.set("depth", 3)
+    assert "jobs_total" not in worker.render()
+
+    for update in sent:
+        parent.apply(update)
+    lines = parent.render().splitlines()
+    assert 'jobs_total{worker="1"} 1.0' in lines and "depth 3" in lines
+
+
+def test_broken_collector_does_not_break_the_scrape():
+    m = Metrics()
+    m.inc("ok_total")
+    m.add_collector(lambda: [("queue_depth", "gauge", "Jobs", [({"queue": "asr"}, 2)])])
+    m.add_collector(lambda: 1 / 0)
+
+    lines = m.render().splitlines()
+    assert "ok_total 1.0" in lines and 'queue_depth{queue="asr"} 2' in lines
+
+
+def test_span_records_errors_and_parent(monkeypatch, capsys):
+    m = Metrics()
+    monkeypatch.setattr(telemetry, "metrics", m)
+    monkeypatch.setattr(telemetry, "LOG_SPANS", True)
+    token = set_request_id("abc")
+    try:
+        with span("job"):
+            with pytest.raises(ValueError):
+                with span("asr", engine="whisper") as s:
+                    s["audio_s"] = 2
+                    raise ValueError
+    finally:
+        reset_request_id(token)
+
+    out = capsys.readouterr().out
+    assert "[req abc] [span] stage=asr parent=job" in out and "status=error" in out
+    assert "engine=whisper audio_s=2" in out
+    lines = m.render().splitlines()
+    assert 'mom_stage_errors_total{stage="asr"} 1.0' in lines
+    assert 'mom_stage_seconds_count{stage="job"} 1' in lines
+
+
+def test_in_context_carries_the_request_id_to_other_threads():
+    token = set_request_id("abc")
+    try:
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            assert pool.submit(in_context(get_request_id)).result() == "abc"
+    finally:
+        reset_request_id(token)
@@ -0,0 +1,74 @@
+# backend/tests/test_transcribe.py
+import io
+
+import numpy as np
+import pytest
+
+import transcribe
+from transcribe import SAMPLE_RATE
+
+
+class _Cache:
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, text, segments, language):
+        self.entries[key] = (text, segments, language)
+
+
+def test_silent_recording_is_cached(monkeypatch):
+    cache = _Cache()
+    decoded = []
+    monkeypatch.setattr(transcribe, "get_cache", lambda: cache)
+    monkeypatch.setattr(transcribe, "transcript_cache_key", lambda path: "silent-key")
+    monkeypatch.setattr(transcribe, "VAD_FILTER", True)
+    monkeypatch.setattr(transcribe, "decode_audio",
+                        lambda path: decoded.append(path) or np.zeros(10 * SAMPLE_RATE, dtype=np.float32))
+
+    first = transcribe.transcribe_file("silence.wav")
+    assert first == ("", [], "en")
+    assert cache.entries["silent-key"] == first
+
+    # the second upload of the same file is a cache hit: no decode
+    assert transcribe.transcribe_file("silence.wav") == first
+    assert decoded == ["silence.wav"]
+
+
+class _FailingFfmpeg:
+    # what ffmpeg does with the start of an MP4 whose index is at the end
+    def __init__(self, args, stdin, stdout, stderr):
+        stderr.write(b"moov atom not found\n")
+        self.stdin = io.BytesIO()
+        self.stdout = io.BytesIO(b"")
+        self.returncode = None
+
+    def wait(self):
+        self.returncode = 1
+        return 1
+
+
+def test_undecodable_prefix_raises(tmp_path, monkeypatch):
+    path = tmp_path / "talk.m4a"
+    path.write_bytes(b"\0" * 4096)
+    monkeypatch.setattr(transcribe.subprocess, "Popen", _FailingFfmpeg)
+    with pytest.raises(RuntimeError, match="moov atom not found"):
+        transcribe.decode_prefix(str(path), 4096)
+
+
+def test_chunk_pool_follows_the_requested_worker_count(monkeypatch):
+    created = []
+
+    class Pool:
+        def __init__(self, max_workers, **kwargs):
+            created.append(max_workers)
+
+    monkeypatch.setattr(transcribe, "ProcessPoolExecutor", Pool)
+    monkeypatch.setattr(transcribe, "_chunk_pools", {})
+
+    two = transcribe._get_chunk_pool(2)
+    assert transcribe._get_chunk_pool(2) is two
+    assert transcribe._get_chunk_pool(4) is not two
+    assert created == [2, 4]
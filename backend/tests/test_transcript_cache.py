@@ -0,0 +1,50 @@
+# backend/tests/test_transcript_cache.py
+import importlib
+import os
+
+import transcript_cache
+from transcript_cache import TranscriptCache, make_key
+
+SEGMENTS = [{"start": 0.0, "end": 1.5, "text": "hello"}]
+
+
+def test_default_path_does_not_depend_on_the_working_directory(tmp_path, monkeypatch):
+    monkeypatch.delenv("TRANSCRIPT_CACHE_PATH", raising=False)
+    monkeypatch.chdir(tmp_path)
+    try:
+        importlib.reload(transcript_cache)
+        assert transcript_cache.CACHE_PATH == os.path.join(os.path.dirname(transcript_cache.__file__),
+                                                           "transcript_cache.db")
+    finally:
+        monkeypatch.undo()
+        importlib.reload(transcript_cache)
+
+
+def test_hit_and_miss_are_counted(tmp_path):
+    cache = TranscriptCache(str(tmp_path / "cache.db"))
+    key = make_key("abc", "base", beam_size=5)
+
+    assert cache.get(key) is None
+    cache.put(key, "hello", SEGMENTS, "en")
+    assert cache.get(key) == ("hello", SEGMENTS, "en")
+    assert make_key("abc", "base", beam_size=1) != key
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    cache = TranscriptCache(str(tmp_path / "cache.db"), max_mb=0)
+    cache.max_bytes = 250  # about two entries
+    clock = iter(range(100))
+    monkeypatch.setattr(transcript_cache.time, "time", lambda: next(clock))
+
+    cache.put("a", "x" * 50, SEGMENTS, "en")
+    cache.put("b", "y" * 50, SEGMENTS, "en")
+    assert cache.get("a") is not None  # "b" is now the least recently used
+    cache.put("c", "z" * 50, SEGMENTS, "en")
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
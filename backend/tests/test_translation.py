@@ -0,0 +1,95 @@
+# backend/tests/test_translation.py
+from collections import OrderedDict
+
+import pytest
+
+import transcribe
+from transcribe import split_for_translation, translate_text_if_needed
+
+
+class _Tokenizer:
+    def encode(self, text, add_special_tokens=True):
+        return text.split()
+
+
+class _Translator:
+    tokenizer = _Tokenizer()
+
+    def __init__(self, name="stub"):
+        self.name = name
+        self.calls = []
+
+    def __call__(self, pieces, max_length, batch_size):
+        self.calls.append((list(pieces), batch_size))
+        return [{"translation_text": p.upper()} for p in pieces]
+
+
+def test_sentences_are_packed_up_to_the_token_budget():
+    text = "एक दो तीन। चार पांच छह। सात आठ? Nine ten eleven."
+    assert split_for_translation(text, _Tokenizer(), max_tokens=6) == [
+        "एक दो तीन। चार पांच छह।", "सात आठ? Nine ten eleven."]
+    assert split_for_translation("   ", _Tokenizer(), max_tokens=6) == []
+
+
+def test_overlong_sentence_is_split_on_words():
+    sentence = " ".join(f"w{i}" for i in range(10)) + "."
+    pieces = split_for_translation(f"Short one. {sentence}", _Tokenizer(), max_tokens=4)
+    assert pieces[0] == "Short one."
+    assert " ".join(pieces[1:]) == sentence
+    assert all(len(p.split()) <= 4 for p in pieces)
+
+
+def test_all_pieces_go_through_one_batched_call(monkeypatch):
+    translator = _Translator()
+    monkeypatch.setattr(transcribe, "get_translator", lambda lang: translator)
+    monkeypatch.setattr(transcribe, "TRANSLATION_MAX_TOKENS", 3)
+    monkeypatch.setattr(transcribe, "TRANSLATION_BATCH_SIZE", 8)
+
+    out = translate_text_if_needed("एक दो। तीन चार। पांच छह।", "hi")
+
+    assert out == ("एक दो। तीन चार। पांच छह।".upper(), True)
+    assert len(translator.calls) == 1 and translator.calls[0][1] == 8
+
+
+def test_english_and_failures_pass_text_through(monkeypatch):
+    assert translate_text_if_needed("hello", "en") == ("hello", False)
+    assert translate_text_if_needed("hello", None) == ("hello", False)
+
+    def broken(lang):
+        raise OSError("model download failed")
+
+    monkeypatch.setattr(transcribe, "get_translator", broken)
+    assert translate_text_if_needed("नमस्ते", "hi") == ("नमस्ते", False)
+
+
+@pytest.fixture
+def translator_cache(monkeypatch):
+    loaded = []
+
+    def pipeline(task, model, **kwargs):
+        loaded.append(model)
+        return _Translator(model)
+
+    monkeypatch.setattr(transcribe, "pipeline", pipeline)
+    monkeypatch.setattr(transcribe, "_translation_pipeline_cache", OrderedDict())
+    monkeypatch.setattr(transcribe, "_translator_load_locks", {})
+    monkeypatch.setattr(transcribe, "TRANSLATOR_CACHE_SIZE", 2)
+    return loaded
+
+
+def test_translator_cache_evicts_least_recently_used(translator_cache):
+    hi = transcribe.get_translator("hi")
+    transcribe.get_translator("ta")
+    assert transcribe.get_translator("hi") is hi  # cache hit, now most recent
+    transcribe.get_translator("te")               # evicts "ta"
+
+    assert list(transcribe._translation_pipeline_cache) == ["Helsinki-NLP/opus-mt-hi-en",
+                                                            "Helsinki-NLP/opus-mt-te-en"]
+    transcribe.get_translator("ta")
+    assert translator_cache == ["Helsinki-NLP/opus-mt-hi-en", "Helsinki-NLP/opus-mt-ta-en",
+                                "Helsinki-NLP/opus-mt-te-en", "Helsinki-NLP/opus-mt-ta-en"]
+
+
+def test_unknown_languages_share_the_multilingual_model(translator_cache):
+    assert transcribe.get_translator("xx") is transcribe.get_translator("yy")
+    assert translator_cache == ["Helsinki-NLP/opus-mt-mul-en"]
@@ -0,0 +1,77 @@
+# backend/tests/test_user_store.py
+import threading
+import time
+
+import pytest
+
+from user_store import UserStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = UserStore(str(tmp_path / "mom.db"), pool_size=2)
+    yield store
+    store.pool.close()
+
+
+def test_usernames_are_unique(store):
+    assert store.create_user("asha", "hash1")
+    assert not store.create_user("asha", "hash2")
+
+    user = store.get_user("asha")
+    assert user["password_hash"] == "hash1" and user["last_login_at"] is None
+    assert store.get_user("ravi") is None
+
+
+def test_session_lifecycle(store):
+    store.create_user("asha", "hash")
+    user_id = store.get_user("asha")["id"]
+    store.create_session(user_id, "live", time.time() + 60)
+    store.create_session(user_id, "stale", time.time() - 60)
+
+    assert store.get_user("asha")["last_login_at"] is not None
+    assert store.session_active("live")
+    assert not store.session_active("stale")
+    assert not store.session_active("unknown")
+
+    store.revoke_session("live")
+    assert not store.session_active("live")
+    assert store.purge_sessions() == 1
+
+
+def test_sessions_are_shared_between_stores(tmp_path):
+    # two backend processes opening the same database file
+    first, second = UserStore(str(tmp_path / "mom.db")), UserStore(str(tmp_path / "mom.db"))
+    first.create_user("asha", "hash")
+    first.create_session(first.get_user("asha")["id"], "jti", time.time() + 60)
+    assert second.session_active("jti")
+    second.revoke_session("jti")
+    assert not first.session_active("jti")
+
+
+def test_pool_never_opens_more_than_its_size(store):
+    held, release = [], threading.Event()
+
+    def hold():
+        with store.pool.connection() as conn:
+            held.append(conn)
+            release.wait(5)
+
+    threads = [threading.Thread(target=hold) for _ in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.2)
+    # the third caller waits for one of the two connections
+    assert len(held) == 2 and store.pool._opened == 2
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert len(held) == 3 and len({id(c) for c in held}) == 2
+
+
+def test_failed_write_is_rolled_back(store):
+    with pytest.raises(RuntimeError):
+        with store.pool.connection() as conn:
+            conn.execute("INSERT INTO users (username, password_hash, created_at) VALUES ('x', 'h', 0)")
+            raise RuntimeError("handler failed")
+    assert store.get_user("x") is None
@@ -1,15 +1,195 @@
 # backend/transcribe.py
 import os
-import whisper
+import re
+import mmap
+import time
 import ffmpeg
 import tempfile
+import threading
+import subprocess
+import multiprocessing
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Tuple, List, Dict
+from typing import Tuple, List, Dict, Optional
+from transformers import pipeline
+from transcript_cache import get_cache, hash_file, make_key
+from models import WHISPER_MODEL, load_whisper, registry
+from telemetry import log, record_asr, span
+
+MODEL_NAME = WHISPER_MODEL
+SAMPLE_RATE = 16000
+
+# Recordings longer than this are decoded into an anonymous memory map
+# instead of a growing in-process buffer
+MMAP_DECODE_SECONDS = float(os.getenv("MMAP_DECODE_SECONDS", "1800"))
+# Files smaller than this cannot reach MMAP_DECODE_SECONDS at speech bitrates
+# (16 kbps and up), so they are decoded without an ffprobe round trip
+MMAP_PROBE_MIN_BYTES = int(os.getenv("MMAP_PROBE_MIN_BYTES", str(int(MMAP_DECODE_SECONDS * 2000))))
+
+# Decode options passed to Whisper; also part of the transcript cache key
+DECODE_OPTIONS = {
+    "language": None,
+    "beam_size": 5,
+    "best_of": 5,
+    "temperature": 0.0,
+}
+
+# Drop non-speech audio before Whisper (timestamps are mapped back)
+VAD_FILTER = os.getenv("VAD_FILTER", "1") == "1"
+
+# Label segments with speakers (online clustering of per-segment voice features)
+DIARIZATION = os.getenv("DIARIZATION", "1") == "1"
+DIARIZATION_MAX_SPEAKERS = int(os.getenv("DIARIZATION_MAX_SPEAKERS", "8"))
+# BIC penalty weight: higher merges more readily into existing speakers
+DIARIZATION_PENALTY = float(os.getenv("DIARIZATION_PENALTY", "1.0"))
+# Segments shorter than this never open a new speaker
+DIARIZATION_MIN_SECONDS = 1.0
+# Speaker models keep the statistics of about this many frames (10 ms each),
+# so memory is bounded and a speaker's model follows slow drift
+DIARIZATION_MODEL_FRAMES = 6000
+
+# Parallel chunked transcription for long recordings (0/1 = disabled)
+PARALLEL_TRANSCRIBE_WORKERS = int(os.getenv("PARALLEL_TRANSCRIBE_WORKERS", "0"))
+PARALLEL_MIN_SECONDS = float(os.getenv("PARALLEL_MIN_SECONDS", "300"))
+# Chunks are cut at the silence nearest to this length, never longer than the max
+PARALLEL_CHUNK_SECONDS = 60.0
+PARALLEL_MAX_CHUNK_SECONDS = 120.0
+
+# ASR backend: "whisper" (openai-whisper, PyTorch fp32) or "ctranslate2"
+# (faster-whisper, quantized). Callers only see the engine interface below.
+ASR_ENGINE = os.getenv("ASR_ENGINE", "whisper").lower()
+# Torch intra-op threads for the whisper engine (0 = torch default)
+WHISPER_TORCH_THREADS = int(os.getenv("WHISPER_TORCH_THREADS", "0"))
+# CTranslate2 engine: model size or converted model dir, quantization and threads
+CT2_MODEL = os.getenv("CT2_MODEL", "") or WHISPER_MODEL
+CT2_COMPUTE_TYPE = os.getenv("CT2_COMPUTE_TYPE", "int8")
+CT2_CPU_THREADS = int(os.getenv("CT2_CPU_THREADS", "0"))
+CT2_NUM_WORKERS = int(os.getenv("CT2_NUM_WORKERS", "1"))
+
+
+class AsrEngine:
+    """
+    Engine interface: transcribe() returns a dict shaped like
+    openai-whisper's result (text, segments with start/end/text, language).
+    Subclasses implement _transcribe(); timing and audio-seconds
+    accounting happen here. Each call also refreshes the engine's registry
+    entry, so callers holding on to it (e.g. live sessions) keep it loaded.
+    """
+
+    name = "asr"
+    reentrant = False
+    registry_key: Optional[str] = None
+
+    def transcribe(self, audio, **options) -> Dict:
+        if self.registry_key:
+            registry.touch(self.registry_key)
+        with span("asr", engine=self.name) as s:
+            t0 = time.perf_counter()
+            result = self._transcribe(audio, **options)
+            if isinstance(audio, np.ndarray):
+                s["audio_s"] = round(audio.size / SAMPLE_RATE, 2)
+                record_asr(audio.size / SAMPLE_RATE, time.perf_counter() - t0)
+        return result
+
+    def _transcribe(self, audio, **options) -> Dict:
+        raise NotImplementedError
+
+    def detect_language(self, audio: np.ndarray) -> str:
+        raise NotImplementedError
+
+
+class WhisperEngine(AsrEngine):
+    """
+    openai-whisper on CPU. Not reentrant: concurrent callers need
+    separate replicas.
+    """
+
+    name = "whisper"
+    reentrant = False
+
+    def __init__(self, model_name: str = WHISPER_MODEL):
+        if WHISPER_TORCH_THREADS > 0:
+            import torch
+            torch.set_num_threads(WHISPER_TORCH_THREADS)
+        self.model = load_whisper(model_name)
+
+    def _transcribe(self, audio, **options) -> Dict:
+        options.setdefault("fp16", False)
+        return self.model.transcribe(audio, **options)
+
+    def detect_language(self, audio: np.ndarray) -> str:
+        import whisper
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio)).to(self.model.device)
+        _, probs = self.model.detect_language(mel)
+        return max(probs, key=probs.get)
+
+
+class CTranslate2Engine(AsrEngine):
+    """
+    faster-whisper (CTranslate2) with int8 weights by default. One model
+    serves CT2_NUM_WORKERS concurrent calls; results are returned in the
+    same dict shape as openai-whisper's transcribe().
+    """
+
+    name = "ctranslate2"
+    reentrant = True
+
+    def __init__(self, model_name: str = CT2_MODEL):
+        from faster_whisper import WhisperModel
+        self.model = WhisperModel(model_name, device="cpu", compute_type=CT2_COMPUTE_TYPE,
+                                  cpu_threads=CT2_CPU_THREADS, num_workers=CT2_NUM_WORKERS)
+
+    def _transcribe(self, audio, **options) -> Dict:
+        options.pop("fp16", None)
+        options.pop("verbose", None)
+        segments, info = self.model.transcribe(audio, **options)
+        segments = [{"start": seg.start, "end": seg.end, "text": seg.text} for seg in segments]
+        return {
+            "text": "".join(seg["text"] for seg in segments),
+            "segments": segments,
+            "language": info.language,
+        }
+
+    def detect_language(self, audio: np.ndarray) -> str:
+        # language detection runs eagerly; segments are a lazy generator
+        _, info = self.model.transcribe(audio[:30 * SAMPLE_RATE], beam_size=1)
+        return info.language
+
+
+def _engine_loader(key: str, model_name: str):
+    def load():
+        if ASR_ENGINE in ("ctranslate2", "faster-whisper", "ct2"):
+            engine = CTranslate2Engine(CT2_MODEL if model_name == WHISPER_MODEL else model_name)
+        elif ASR_ENGINE == "whisper":
+            engine = WhisperEngine(model_name)
+        else:
+            raise ValueError(f"Unknown ASR_ENGINE: {ASR_ENGINE}")
+        engine.registry_key = key
+        return engine
+    return load
+
+
+registry.register("asr", _engine_loader("asr", WHISPER_MODEL))
+
+
+def get_asr(model_name: Optional[str] = None, replica: int = 0):
+    """
+    The configured ASR engine. Threads that transcribe concurrently ask
+    for distinct replicas; reentrant engines share one instance. Every
+    engine (and the model inside it) is exactly one registry entry, so
+    idle unloading and the loaded-model metrics see what is really held.
+    """
+    model_name = model_name or MODEL_NAME
+    if ASR_ENGINE != "whisper":
+        replica = 0
+    if model_name == WHISPER_MODEL and not replica:
+        return registry.get("asr")
+    key = f"asr:{model_name}" + (f"#{replica}" if replica else "")
+    registry.register(key, _engine_loader(key, model_name))
+    return registry.get(key)
 
-# Load Whisper model once at startup (fast subsequent calls)
-print("Loading Whisper 'small' model... (10-60 seconds)")
-model = whisper.load_model("tiny")
-print("Whisper model loaded successfully!")
 
 def convert_to_wav(input_path: str) -> str:
     """
@@ -30,7 +210,8 @@ def convert_to_wav(input_path: str) -> str:
             ar="16000",
             loglevel="error"
         )
-        ffmpeg.run(stream, overwrite_output=True, capture_stdout=True, capture_stderr=True)
+        with span("ffmpeg_convert"):
+            ffmpeg.run(stream, overwrite_output=True, capture_stdout=True, capture_stderr=True)
     except ffmpeg.Error as e:
         error_msg = e.stderr.decode() if e.stderr else "Unknown ffmpeg error"
         raise RuntimeError(f"FFmpeg conversion failed: {error_msg}")
@@ -40,44 +221,680 @@ def convert_to_wav(input_path: str) -> str:
     return output_path
 
 
-def transcribe_file(path_in: str) -> Tuple[str, List[Dict], str]:
+def _probe_duration(input_path: str) -> float:
+    try:
+        info = ffmpeg.probe(input_path)
+        return float(info.get("format", {}).get("duration") or 0.0)
+    except Exception:
+        return 0.0
+
+
+def decode_audio(input_path: str, sr: int = SAMPLE_RATE,
+                 duration: Optional[float] = None) -> np.ndarray:
+    """
+    Decode any audio format to mono float32 PCM in [-1, 1] by piping
+    ffmpeg's raw s16le output straight into memory (no temporary WAV).
+    Very long recordings land in an anonymous memory map sized from the
+    duration (passed in when the caller knows it, otherwise probed for
+    files of at least MMAP_PROBE_MIN_BYTES), so the float32 buffer is
+    never copied or regrown.
+    """
+    with span("ffmpeg_decode") as s:
+        audio = _decode_audio(input_path, sr, duration)
+        s["audio_s"] = round(audio.size / sr, 2)
+    return audio
+
+
+def _decode_audio(input_path: str, sr: int, duration: Optional[float]) -> np.ndarray:
+    try:
+        process = (
+            ffmpeg
+            .input(input_path)
+            .output("pipe:", format="s16le", acodec="pcm_s16le", ac=1, ar=str(sr), loglevel="error")
+            .run_async(pipe_stdout=True, pipe_stderr=True)
+        )
+    except Exception as e:
+        raise RuntimeError(f"Audio conversion failed: {str(e)}")
+
+    if MMAP_DECODE_SECONDS <= 0:
+        duration = 0.0
+    elif duration is None:
+        try:
+            large = os.path.getsize(input_path) >= MMAP_PROBE_MIN_BYTES
+        except OSError:
+            large = True
+        duration = _probe_duration(input_path) if large else 0.0
+    block = 1 << 20  # bytes of s16le per read
+
+    if duration > MMAP_DECODE_SECONDS:
+        capacity = int((duration + 1.0) * sr)
+        region = mmap.mmap(-1, capacity * 4)
+        audio = np.frombuffer(region, dtype=np.float32, count=capacity)
+        filled = 0
+        leftover = b""
+        overflow = []
+        while True:
+            data = process.stdout.read(block)
+            if not data:
+                break
+            data = leftover + data
+            usable = len(data) - (len(data) % 2)
+            leftover = data[usable:]
+            samples = np.frombuffer(data[:usable], dtype=np.int16)
+            n = min(samples.size, capacity - filled)
+            audio[filled:filled + n] = samples[:n]
+            audio[filled:filled + n] /= 32768.0
+            filled += n
+            if n < samples.size:
+                # probe under-reported the duration; keep the remainder aside
+                overflow.append(samples[n:].astype(np.float32) / 32768.0)
+        audio = audio[:filled]
+        if overflow:
+            audio = np.concatenate([audio] + overflow)
+    else:
+        raw = process.stdout.read()
+        audio = np.frombuffer(raw[:len(raw) - (len(raw) % 2)], dtype=np.int16).astype(np.float32) / 32768.0
+
+    stderr = process.stderr.read()
+    if process.wait() != 0:
+        raise RuntimeError(f"FFmpeg conversion failed: {stderr.decode(errors='ignore') or 'Unknown ffmpeg error'}")
+    return audio
+
+
+def decode_prefix(input_path: str, nbytes: int, sr: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode only the first `nbytes` of a (possibly still growing) file by
+    feeding them to ffmpeg on stdin. A truncated last frame is ignored;
+    a prefix ffmpeg can't decode at all raises RuntimeError.
+    """
+    with span("ffmpeg_decode", prefix_bytes=nbytes) as s:
+        audio = _decode_prefix(input_path, nbytes, sr)
+        s["audio_s"] = round(audio.size / sr, 2)
+    return audio
+
+
+def _decode_prefix(input_path: str, nbytes: int, sr: int) -> np.ndarray:
+    # stderr goes to a file: a pipe nobody reads could fill up and stall ffmpeg
+    with tempfile.TemporaryFile() as errors:
+        return _run_decode_prefix(input_path, nbytes, sr, errors)
+
+
+def _run_decode_prefix(input_path: str, nbytes: int, sr: int, errors) -> np.ndarray:
+    proc = subprocess.Popen(
+        ["ffmpeg", "-loglevel", "error", "-i", "pipe:0",
+         "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(sr), "pipe:1"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=errors,
+    )
+
+    def feed():
+        remaining = nbytes
+        try:
+            with open(input_path, "rb") as f:
+                while remaining > 0:
+                    block = f.read(min(1 << 20, remaining))
+                    if not block:
+                        break
+                    proc.stdin.write(block)
+                    remaining -= len(block)
+        except (BrokenPipeError, OSError):
+            pass
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+    raw = proc.stdout.read()
+    writer.join()
+    proc.wait()
+    if proc.returncode != 0 and len(raw) < 2:
+        # nothing decodable (corrupt file, or an index ffmpeg can't reach
+        # without seeking): fail instead of returning silence
+        errors.seek(0)
+        message = errors.read().decode(errors="ignore").strip()
+        raise RuntimeError(f"FFmpeg prefix decode failed: {message or f'exit status {proc.returncode}'}")
+    return np.frombuffer(raw[:len(raw) - (len(raw) % 2)], dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def find_speech_regions(audio: np.ndarray, sr: int = SAMPLE_RATE, frame_ms: int = 30,
+                        min_silence_s: float = 0.3, pad_s: float = 0.1) -> List[Tuple[int, int]]:
+    """
+    Energy-based voice activity detection.
+    Returns (start, end) sample ranges of speech. A frame counts as speech
+    when its RMS level is well above the recording's own noise floor
+    (or not far below its typical speech level, for recordings with
+    little silence);
+    gaps shorter than min_silence_s are bridged, regions padded by pad_s.
+    """
+    frame = int(sr * frame_ms / 1000)
+    n_frames = audio.size // frame
+    if n_frames == 0:
+        return []
+    frames = audio[:n_frames * frame].reshape(n_frames, frame)
+    rms_db = 10.0 * np.log10(np.mean(frames.astype(np.float64) ** 2, axis=1) + 1e-10)
+    noise_floor, speech_level = np.percentile(rms_db, [10, 90])
+    threshold = max(-50.0, min(noise_floor + 10.0, speech_level - 20.0))
+    voiced = rms_db > threshold
+
+    regions = []
+    min_gap = int(min_silence_s * 1000 / frame_ms)
+    start = None
+    silent = 0
+    for i, v in enumerate(voiced):
+        if v:
+            if start is None:
+                start = i
+            silent = 0
+        elif start is not None:
+            silent += 1
+            if silent > min_gap:
+                regions.append((start, i - silent + 1))
+                start = None
+                silent = 0
+    if start is not None:
+        regions.append((start, n_frames - silent))
+
+    pad = int(pad_s * sr)
+    return [(max(0, s * frame - pad), min(audio.size, e * frame + pad)) for s, e in regions]
+
+
+def has_speech(audio: np.ndarray, sr: int = SAMPLE_RATE, min_speech_s: float = 0.2) -> bool:
+    """
+    Cheap check used to skip the model entirely for silent audio.
+    """
+    if audio.size < int(min_speech_s * sr):
+        return False
+    # absolute floor: a chunk of pure room noise has no "speech level" to compare against
+    if float(np.sqrt(np.mean(audio.astype(np.float64) ** 2))) < 10 ** (-50.0 / 20):
+        return False
+    return sum(e - s for s, e in find_speech_regions(audio, sr)) >= int(min_speech_s * sr)
+
+
+def drop_silence(audio: np.ndarray, sr: int = SAMPLE_RATE) -> Tuple[np.ndarray, List[Tuple[float, float, float]]]:
+    """
+    Keep only the speech regions of `audio`, concatenated.
+    Returns (compacted_audio, timemap) where each timemap entry is
+    (compacted_start_s, original_start_s, length_s) for one kept region.
+    """
+    with span("vad") as s:
+        regions = find_speech_regions(audio, sr)
+        s["kept_s"] = round(sum(e - b for b, e in regions) / sr, 2)
+    if not regions:
+        return audio[:0], []
+    timemap = []
+    pos = 0
+    for s, e in regions:
+        timemap.append((pos / sr, s / sr, (e - s) / sr))
+        pos += e - s
+    if pos == audio.size:
+        return audio, timemap
+    return np.concatenate([audio[s:e] for s, e in regions]), timemap
+
+
+def remap_time(t: float, timemap: List[Tuple[float, float, float]]) -> float:
+    """
+    Map a time in the compacted audio back to the original recording.
+    """
+    if not timemap:
+        return t
+    for c_start, o_start, length in timemap:
+        if t <= c_start + length:
+            return o_start + max(0.0, t - c_start)
+    c_start, o_start, length = timemap[-1]
+    return o_start + (t - c_start)
+
+
+def region_joins(timemap: List[Tuple[float, float, float]], sr: int = SAMPLE_RATE) -> List[int]:
+    """
+    Sample offsets in drop_silence's compacted audio where two kept regions
+    meet, i.e. where a silence was cut out: the natural places to split it.
+    """
+    return [int(round(c_start * sr)) for c_start, _, _ in timemap[1:]]
+
+
+def remap_segments(segments: List[Dict], timemap: List[Tuple[float, float, float]]) -> List[Dict]:
+    for seg in segments:
+        seg["start"] = round(remap_time(seg["start"], timemap), 2)
+        seg["end"] = round(remap_time(seg["end"], timemap), 2)
+    return segments
+
+
+# Speaker diarization
+_N_FFT = 512
+_WIN = 400   # 25 ms
+_HOP = 160   # 10 ms
+_N_MELS = 40
+_N_CEPS = 13
+_mfcc_basis = None
+
+
+def _get_mfcc_basis(sr: int = SAMPLE_RATE) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
-    Transcribe audio file using Whisper.
+    (window, mel filterbank, DCT matrix), built once.
+    """
+    global _mfcc_basis
+    if _mfcc_basis is None:
+        mel = lambda f: 2595.0 * np.log10(1.0 + f / 700.0)
+        hz = lambda m: 700.0 * (10 ** (m / 2595.0) - 1.0)
+        edges = hz(np.linspace(mel(80.0), mel(7600.0), _N_MELS + 2))
+        bins = np.fft.rfftfreq(_N_FFT, 1.0 / sr)
+        fbank = np.zeros((_N_MELS, bins.size), dtype=np.float32)
+        for i in range(_N_MELS):
+            lo, mid, hi = edges[i:i + 3]
+            fbank[i] = np.clip(np.minimum((bins - lo) / (mid - lo), (hi - bins) / (hi - mid)), 0, None)
+        k = np.arange(_N_MELS)
+        dct = np.cos(np.pi / _N_MELS * (k + 0.5)[None, :] * np.arange(_N_CEPS)[:, None]).astype(np.float32)
+        _mfcc_basis = (np.hamming(_WIN).astype(np.float32), fbank.T.copy(), dct.T.copy())
+    return _mfcc_basis
+
+
+def voice_features(audio: np.ndarray, sr: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    MFCCs (c1..c12, energy dropped) of the louder frames of a segment,
+    shape (frames, 12). Quiet frames (pauses, breaths) are left out.
+    """
+    if audio.size < _WIN:
+        return np.zeros((0, _N_CEPS - 1), dtype=np.float32)
+    window, fbank, dct = _get_mfcc_basis(sr)
+    frames = np.lib.stride_tricks.sliding_window_view(audio.astype(np.float32, copy=False), _WIN)[::_HOP]
+    power = np.abs(np.fft.rfft(frames * window, n=_N_FFT)) ** 2
+    energy = power.sum(axis=1)
+    keep = energy >= max(np.percentile(energy, 30), 1e-6)
+    logmel = np.log(power[keep] @ fbank + 1e-8)
+    return (logmel @ dct)[:, 1:]
+
+
+class OnlineDiarizer:
+    """
+    Single-pass speaker clustering for a stream of segments.
+
+    Every speaker is a diagonal Gaussian over MFCC frames, kept as
+    sufficient statistics (frame count, sum, sum of squares) capped at
+    DIARIZATION_MODEL_FRAMES, so memory is constant however long the
+    meeting runs. A segment joins the speaker for which merging its frames
+    costs least in BIC; if even that merge is not supported by the data
+    (delta-BIC > 0) and the segment is long enough, it opens a new speaker.
+    Two speakers whose models become indistinguishable are merged, and
+    later labels use the older one. state()/from_state() round-trip
+    through JSON so passes over a growing recording keep the same labels.
+    """
+
+    def __init__(self, max_speakers: int = DIARIZATION_MAX_SPEAKERS, penalty: float = DIARIZATION_PENALTY,
+                 min_seconds: float = DIARIZATION_MIN_SECONDS, model_frames: int = DIARIZATION_MODEL_FRAMES):
+        self.max_speakers = max(1, max_speakers)
+        self.penalty = penalty
+        self.min_frames = int(min_seconds * SAMPLE_RATE / _HOP)
+        self.model_frames = model_frames
+        # per speaker: [frames, sum, sum of squares]; None once merged away
+        self.speakers: List[Optional[List]] = []
+        self.alias: Dict[int, int] = {}
+        self.names: Dict[int, str] = {}
+        self.last: Optional[int] = None
+
+    @staticmethod
+    def _logdet(n: float, s1: np.ndarray, s2: np.ndarray) -> float:
+        var = np.maximum(s2 / n - (s1 / n) ** 2, 1e-4)
+        return float(np.log(var).sum())
+
+    def _delta_bic(self, spk: List, n: float, s1: np.ndarray, s2: np.ndarray) -> float:
+        n0, a1, a2 = spk
+        merged = (n0 + n) * self._logdet(n0 + n, a1 + s1, a2 + s2)
+        separate = n0 * self._logdet(n0, a1, a2) + n * self._logdet(n, s1, s2)
+        params = 2 * s1.size
+        return 0.5 * (merged - separate) - 0.5 * self.penalty * params * np.log(n0 + n)
+
+    def _update(self, idx: int, n: float, s1: np.ndarray, s2: np.ndarray) -> None:
+        spk = self.speakers[idx]
+        spk[0] += n
+        spk[1] = spk[1] + s1
+        spk[2] = spk[2] + s2
+        if spk[0] > self.model_frames:
+            scale = self.model_frames / spk[0]
+            spk[0], spk[1], spk[2] = self.model_frames, spk[1] * scale, spk[2] * scale
+
+    def _maybe_merge(self, idx: int) -> int:
+        for j, other in enumerate(self.speakers):
+            if j == idx or other is None:
+                continue
+            if self._delta_bic(other, *self.speakers[idx]) < 0:
+                keep, drop = min(j, idx), max(j, idx)
+                self._update(keep, *self.speakers[drop])
+                self.speakers[drop] = None
+                self.alias[drop] = keep
+                return keep
+        return idx
+
+    def _resolve(self, idx: Optional[int]) -> Optional[int]:
+        while idx in self.alias:
+            idx = self.alias[idx]
+        return idx
+
+    def name(self, idx: Optional[int]) -> Optional[str]:
+        """
+        "Speaker N" for a speaker index, numbered in order of first use.
+        """
+        idx = self._resolve(idx)
+        if idx is None:
+            return None
+        if idx not in self.names:
+            self.names[idx] = f"Speaker {len(self.names) + 1}"
+        return self.names[idx]
+
+    def assign(self, features: np.ndarray) -> Optional[int]:
+        """
+        Speaker index for one segment's frames (None if there is nothing to go on).
+        """
+        n = features.shape[0]
+        if n < 2:
+            return self._resolve(self.last)
+        f = features.astype(np.float64)
+        s1, s2 = f.sum(axis=0), (f * f).sum(axis=0)
+        active = [i for i, spk in enumerate(self.speakers) if spk is not None]
+        if not active:
+            if n < self.min_frames:
+                return None
+            self.speakers.append([float(n), s1, s2])
+            self.last = len(self.speakers) - 1
+            return self.last
+
+        scores = {i: self._delta_bic(self.speakers[i], n, s1, s2) for i in active}
+        best = min(scores, key=scores.get)
+        if n >= self.min_frames:
+            if scores[best] > 0 and len(active) < self.max_speakers:
+                self.speakers.append([float(n), s1, s2])
+                best = len(self.speakers) - 1
+            else:
+                self._update(best, n, s1, s2)
+            best = self._maybe_merge(best)
+        self.last = best
+        return best
+
+    def add(self, features: np.ndarray) -> Optional[str]:
+        return self.name(self.assign(features))
+
+    def label_segments(self, audio: np.ndarray, segments: List[Dict], offset_s: float = 0.0,
+                       sr: int = SAMPLE_RATE) -> List[Dict]:
+        """
+        Set seg["speaker"] in place; segment times minus offset_s index into
+        audio. Labels are resolved after the whole batch, so speakers merged
+        along the way get one name.
+        """
+        with span("diarize", segments=len(segments)) as sp:
+            assigned = []
+            for seg in segments:
+                s = max(0, int((seg["start"] - offset_s) * sr))
+                e = min(audio.size, int((seg["end"] - offset_s) * sr))
+                assigned.append(self.assign(voice_features(audio[s:e], sr)) if e > s else self._resolve(self.last))
+            for seg, idx in zip(segments, assigned):
+                speaker = self.name(idx)
+                if speaker:
+                    seg["speaker"] = speaker
+            sp["speakers"] = len(self.names)
+        return segments
+
+    def state(self) -> Dict:
+        return {
+            "speakers": [None if spk is None else [spk[0], spk[1].tolist(), spk[2].tolist()]
+                         for spk in self.speakers],
+            "alias": [[k, v] for k, v in self.alias.items()],
+            "names": [[k, v] for k, v in self.names.items()],
+            "last": self.last,
+        }
+
+    @classmethod
+    def from_state(cls, state: Optional[Dict]) -> "OnlineDiarizer":
+        d = cls()
+        state = state or {}
+        for spk in state.get("speakers", []):
+            d.speakers.append(None if spk is None else
+                              [float(spk[0]), np.asarray(spk[1], dtype=np.float64),
+                               np.asarray(spk[2], dtype=np.float64)])
+        d.alias = {int(k): int(v) for k, v in state.get("alias", [])}
+        d.names = {int(k): v for k, v in state.get("names", [])}
+        d.last = state.get("last")
+        return d
+
+
+def split_at_silence(audio: np.ndarray, sr: int = SAMPLE_RATE,
+                     target_s: float = PARALLEL_CHUNK_SECONDS,
+                     max_s: float = PARALLEL_MAX_CHUNK_SECONDS,
+                     joins: Optional[List[int]] = None) -> List[Tuple[int, int]]:
+    """
+    Cut the recording into consecutive (start, end) sample ranges of about
+    target_s seconds, placing each cut in the middle of a silence gap.
+    Falls back to a hard cut at max_s when there is no gap.
+    For VAD-compacted audio, pass region_joins(timemap) as `joins`: the
+    silences are gone, but the points where they were are cut points too.
+    """
+    regions = find_speech_regions(audio, sr)
+    # candidate cut points: middle of each gap between speech regions
+    cuts = [(regions[i][1] + regions[i + 1][0]) // 2 for i in range(len(regions) - 1)]
+    if joins:
+        cuts = sorted(set(cuts).union(j for j in joins if 0 < j < audio.size))
+    target, max_len = int(target_s * sr), int(max_s * sr)
+
+    bounds = []
+    start = 0
+    ci = 0
+    while audio.size - start > max_len:
+        best = None
+        # look ahead without consuming: cuts past the chosen one start the next chunk
+        j = ci
+        while j < len(cuts) and cuts[j] - start <= max_len:
+            if cuts[j] - start >= target // 2 and (
+                    best is None or abs(cuts[j] - start - target) < abs(best - start - target)):
+                best = cuts[j]
+            j += 1
+        end = best if best is not None else start + max_len
+        bounds.append((start, end))
+        start = end
+        while ci < len(cuts) and cuts[ci] <= start:
+            ci += 1
+    bounds.append((start, audio.size))
+    return bounds
+
+
+def _init_chunk_worker(model_name: str) -> None:
+    get_asr(model_name)
+
+
+def _detect_language_chunk(audio: np.ndarray, model_name: str) -> str:
+    return get_asr(model_name).detect_language(audio)
+
+
+def _transcribe_chunk(audio: np.ndarray, offset_s: float, model_name: str, options: Dict) -> List[Dict]:
+    result = get_asr(model_name).transcribe(audio, word_timestamps=False, **options)
+    return [{
+        "start": round(offset_s + seg["start"], 2),
+        "end": round(offset_s + seg["end"], 2),
+        "text": seg["text"].strip()
+    } for seg in result.get("segments", []) if seg["text"].strip()]
+
+
+# One pool per requested size, so a caller asking for more workers gets them
+_chunk_pools: Dict[int, ProcessPoolExecutor] = {}
+_chunk_pools_lock = threading.Lock()
+
+
+def _get_chunk_pool(workers: int) -> ProcessPoolExecutor:
+    with _chunk_pools_lock:
+        pool = _chunk_pools.get(workers)
+        if pool is None:
+            pool = _chunk_pools[workers] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_chunk_worker,
+                initargs=(MODEL_NAME,),
+            )
+        return pool
+
+
+def transcribe_parallel(audio: np.ndarray, workers: int = PARALLEL_TRANSCRIBE_WORKERS,
+                        sr: int = SAMPLE_RATE, joins: Optional[List[int]] = None) -> Tuple[str, List[Dict], str]:
+    """
+    Transcribe a decoded recording by splitting it at silences and running
+    the chunks across a process pool. The language is detected once (on the
+    first 30 s) so every chunk decodes with the same language; segment
+    timestamps are shifted back to absolute recording time (of `audio`;
+    `joins` as for split_at_silence).
     Returns (full_text, segments, detected_language)
     """
+    pool = _get_chunk_pool(max(1, workers))
+    bounds = split_at_silence(audio, sr, joins=joins)
+
+    options = dict(DECODE_OPTIONS)
+    language = options.get("language")
+    if not language:
+        language = pool.submit(_detect_language_chunk, audio[:30 * sr], MODEL_NAME).result()
+        options["language"] = language
+
+    # chunk workers are separate processes: account the audio here
+    with span("asr_parallel", chunks=len(bounds), audio_s=round(audio.size / sr, 2)):
+        t0 = time.perf_counter()
+        futures = [pool.submit(_transcribe_chunk, audio[s:e], s / sr, MODEL_NAME, options)
+                   for s, e in bounds]
+        segments = []
+        for f in futures:
+            segments.extend(f.result())
+        record_asr(audio.size / sr, time.perf_counter() - t0)
+
+    text = " ".join(seg["text"] for seg in segments).strip()
+    return text, segments, language
+
+
+def transcribe_array(audio: np.ndarray, offset_s: float = 0.0,
+                     language: str = None, diarize: bool = DIARIZATION) -> Tuple[str, List[Dict], str]:
+    """
+    Transcribe already decoded audio (VAD pre-filter included).
+    Segment times are shifted by offset_s; `language` pins decoding to a
+    previously detected language. diarize=False leaves speaker labelling
+    to the caller (e.g. to continue an earlier pass's OnlineDiarizer).
+    Returns (full_text, segments, detected_language)
+    """
+    timemap = None
+    if VAD_FILTER:
+        audio, timemap = drop_silence(audio)
+    options = dict(DECODE_OPTIONS)
+    options["language"] = language or options.get("language")
+    if audio.size == 0:
+        return "", [], options["language"] or "en"
+
+    result = get_asr().transcribe(audio, word_timestamps=False, **options)
+    segments = [{
+        "start": round(seg["start"], 2),
+        "end": round(seg["end"], 2),
+        "text": seg["text"].strip()
+    } for seg in result.get("segments", []) if seg["text"].strip()]
+    if diarize:
+        OnlineDiarizer().label_segments(audio, segments)
+    if timemap:
+        remap_segments(segments, timemap)
+    for seg in segments:
+        seg["start"] = round(seg["start"] + offset_s, 2)
+        seg["end"] = round(seg["end"] + offset_s, 2)
+    text = " ".join(seg["text"] for seg in segments)
+    return text, segments, result.get("language", options["language"] or "en")
+
+
+def transcript_cache_key(path_in: str) -> str:
+    """
+    Cache key for `path_in` under the current model and decode settings.
+    """
+    engine = ASR_ENGINE if ASR_ENGINE == "whisper" else f"{ASR_ENGINE}:{CT2_MODEL}:{CT2_COMPUTE_TYPE}"
+    return make_key(hash_file(path_in), MODEL_NAME, vad=VAD_FILTER, engine=engine,
+                    diarize=DIARIZATION, **DECODE_OPTIONS)
+
+
+def transcribe_file(path_in: str, use_cache: bool = True, decode: str = "pipe",
+                    parallel: bool = None) -> Tuple[str, List[Dict], str]:
+    """
+    Transcribe audio file with the configured ASR engine (ASR_ENGINE).
+    Returns (full_text, segments, detected_language)
+    Results are cached by file content + model settings, so a repeated
+    upload of the same recording skips ffmpeg and Whisper entirely.
+    decode="pipe" (default) decodes in memory via decode_audio and, with
+    VAD_FILTER, drops silence before Whisper (segment times still refer
+    to the original recording); decode="wav" uses the older temporary-WAV
+    conversion.
+    parallel=None picks transcribe_parallel automatically for recordings
+    longer than PARALLEL_MIN_SECONDS when PARALLEL_TRANSCRIBE_WORKERS > 1.
+    """
+    with span("transcribe", file=Path(path_in).name):
+        return _transcribe_file(path_in, use_cache, decode, parallel)
+
+
+def _transcribe_file(path_in: str, use_cache: bool, decode: str,
+                     parallel: bool) -> Tuple[str, List[Dict], str]:
+    cache_key = None
+    if use_cache:
+        cache_key = transcript_cache_key(path_in)
+        cached = get_cache().get(cache_key)
+        if cached is not None:
+            return cached
+
     p = Path(path_in)
     wav_path = None
     need_cleanup = False
+    timemap = None
 
     try:
-        # Convert to WAV if not already
-        if p.suffix.lower() != ".wav":
+        if decode == "pipe":
+            # Single in-memory decode; Whisper gets the array, not a path
+            audio = decode_audio(path_in)
+            if VAD_FILTER:
+                audio, timemap = drop_silence(audio)
+                if audio.size == 0:
+                    text, segments, language = "", [], DECODE_OPTIONS.get("language") or "en"
+                    if cache_key:
+                        get_cache().put(cache_key, text, segments, language)
+                    return text, segments, language
+            if parallel is None:
+                parallel = (PARALLEL_TRANSCRIBE_WORKERS > 1
+                            and audio.size > PARALLEL_MIN_SECONDS * SAMPLE_RATE)
+        elif p.suffix.lower() != ".wav":
+            # Convert to WAV if not already
             wav_path = convert_to_wav(path_in)
             need_cleanup = True
+            audio = wav_path
+            parallel = False
         else:
             wav_path = path_in
+            audio = wav_path
+            parallel = False
 
-        # Transcribe
-        result = model.transcribe(
-            wav_path,
-            language=None,
-            fp16=False,  
-            beam_size=5,
-            best_of=5,
-            temperature=0.0,
-            word_timestamps=False
-        )
+        if parallel:
+            # with VAD the silences are gone: split where they were cut out
+            text, segments, language = transcribe_parallel(audio, joins=region_joins(timemap) if timemap else None)
+        else:
+            # Transcribe
+            result = get_asr().transcribe(
+                audio,
+                word_timestamps=False,
+                **DECODE_OPTIONS
+            )
 
-        text = result.get("text", "").strip()
-        language = result.get("language", "en")
+            text = result.get("text", "").strip()
+            language = result.get("language", "en")
 
-        segments = []
-        for seg in result.get("segments", []):
-            segments.append({
-                "start": round(seg["start"], 2),
-                "end": round(seg["end"], 2),
-                "text": seg["text"].strip()
-            })
+            segments = []
+            for seg in result.get("segments", []):
+                segments.append({
+                    "start": round(seg["start"], 2),
+                    "end": round(seg["end"], 2),
+                    "text": seg["text"].strip()
+                })
+
+        if DIARIZATION and isinstance(audio, np.ndarray):
+            # segment times still refer to the (VAD-compacted) array here
+            OnlineDiarizer().label_segments(audio, segments)
+
+        if timemap:
+            remap_segments(segments, timemap)
+
+        if cache_key:
+            get_cache().put(cache_key, text, segments, language)
 
         return text, segments, language
 
@@ -91,40 +908,121 @@ def transcribe_file(path_in: str) -> Tuple[str, List[Dict], str]:
 
 
 # Translation 
-from transformers import pipeline
-_translation_pipeline_cache = {}
+
+# Bounded LRU of loaded Marian pipelines, keyed by model name
+TRANSLATOR_CACHE_SIZE = int(os.getenv("TRANSLATOR_CACHE_SIZE", "3"))
+TRANSLATOR_CACHE_MB = float(os.getenv("TRANSLATOR_CACHE_MB", "1500"))
+TRANSLATION_BATCH_SIZE = int(os.getenv("TRANSLATION_BATCH_SIZE", "16"))
+# Input budget per translated piece (the pipeline is capped at 512 tokens)
+TRANSLATION_MAX_TOKENS = 400
+
+_translation_pipeline_cache = OrderedDict()  # model_name -> (translator, bytes)
+_translation_cache_lock = threading.Lock()
+_translator_load_locks = {}
+
+# Best models for Indian languages
+TRANSLATION_MODELS = {
+    "hi": "Helsinki-NLP/opus-mt-hi-en",
+    "ta": "Helsinki-NLP/opus-mt-ta-en",
+    "te": "Helsinki-NLP/opus-mt-te-en",
+    "bn": "Helsinki-NLP/opus-mt-bn-en",
+    "mr": "Helsinki-NLP/opus-mt-mr-en",
+    "gu": "Helsinki-NLP/opus-mt-gu-en",
+    "pa": "Helsinki-NLP/opus-mt-pa-en",
+    "ml": "Helsinki-NLP/opus-mt-ml-en",
+    "kn": "Helsinki-NLP/opus-mt-kn-en",
+    "ur": "Helsinki-NLP/opus-mt-ur-en",
+}
+
+# Sentence ends in Latin and Indic scripts (danda / double danda)
+_SENTENCE_END = re.compile(r"(?<=[.!?।॥])\s+")
+
+
+def _model_bytes(translator) -> int:
+    try:
+        return sum(p.numel() * p.element_size() for p in translator.model.parameters())
+    except Exception:
+        return 0
+
+
+def _evict_translators(keep: str) -> None:
+    # caller holds _translation_cache_lock
+    budget = TRANSLATOR_CACHE_MB * 1024 * 1024
+    total = sum(size for _, size in _translation_pipeline_cache.values())
+    while len(_translation_pipeline_cache) > 1 and (
+            len(_translation_pipeline_cache) > TRANSLATOR_CACHE_SIZE or total > budget):
+        name = next(iter(_translation_pipeline_cache))
+        if name == keep:
+            break
+        _, size = _translation_pipeline_cache.pop(name)
+        total -= size
+        log(f"Evicted translator: {name}")
+
 
 def get_translator(src_lang: str):
-    if src_lang in _translation_pipeline_cache:
-        return _translation_pipeline_cache[src_lang]
-
-    # Best models for Indian languages
-    model_map = {
-        "hi": "Helsinki-NLP/opus-mt-hi-en",
-        "ta": "Helsinki-NLP/opus-mt-ta-en",
-        "te": "Helsinki-NLP/opus-mt-te-en",
-        "bn": "Helsinki-NLP/opus-mt-bn-en",
-        "mr": "Helsinki-NLP/opus-mt-mr-en",
-        "gu": "Helsinki-NLP/opus-mt-gu-en",
-        "pa": "Helsinki-NLP/opus-mt-pa-en",
-        "ml": "Helsinki-NLP/opus-mt-ml-en",
-        "kn": "Helsinki-NLP/opus-mt-kn-en",
-        "ur": "Helsinki-NLP/opus-mt-ur-en",
-    }
-
-    model_name = model_map.get(src_lang, "Helsinki-NLP/opus-mt-mul-en")
-    print(f"Loading translator: {src_lang} → en ({model_name})")
-
-    translator = pipeline(
-        "translation",
-        model=model_name,
-        device=-1,  
-        max_length=512
-    )
-    _translation_pipeline_cache[src_lang] = translator
+    model_name = TRANSLATION_MODELS.get(src_lang, "Helsinki-NLP/opus-mt-mul-en")
+
+    with _translation_cache_lock:
+        if model_name in _translation_pipeline_cache:
+            _translation_pipeline_cache.move_to_end(model_name)
+            return _translation_pipeline_cache[model_name][0]
+        load_lock = _translator_load_locks.setdefault(model_name, threading.Lock())
+
+    # one loader per model; other languages keep translating meanwhile
+    with load_lock:
+        with _translation_cache_lock:
+            if model_name in _translation_pipeline_cache:
+                _translation_pipeline_cache.move_to_end(model_name)
+                return _translation_pipeline_cache[model_name][0]
+
+        log(f"Loading translator: {src_lang} → en ({model_name})")
+        translator = pipeline(
+            "translation",
+            model=model_name,
+            device=-1,  
+            max_length=512
+        )
+
+        with _translation_cache_lock:
+            _translation_pipeline_cache[model_name] = (translator, _model_bytes(translator))
+            _evict_translators(keep=model_name)
     return translator
 
 
+def split_for_translation(text: str, tokenizer, max_tokens: int = TRANSLATION_MAX_TOKENS) -> List[str]:
+    """
+    Split text on sentence boundaries and pack sentences into pieces of at
+    most max_tokens tokens. A single over-long sentence is split on words.
+    """
+    pieces = []
+    cur, cur_tokens = [], 0
+
+    def flush():
+        nonlocal cur, cur_tokens
+        if cur:
+            pieces.append(" ".join(cur))
+        cur, cur_tokens = [], 0
+
+    for sent in _SENTENCE_END.split(text):
+        sent = sent.strip()
+        if not sent:
+            continue
+        n = len(tokenizer.encode(sent, add_special_tokens=False))
+        if n > max_tokens:
+            flush()
+            words = sent.split()
+            step = max(1, len(words) * max_tokens // n)
+            for i in range(0, len(words), step):
+                pieces.append(" ".join(words[i:i + step]))
+            continue
+        if cur and cur_tokens + n > max_tokens:
+            flush()
+        cur.append(sent)
+        cur_tokens += n
+    flush()
+    return pieces
+
+
 def translate_text_if_needed(text: str, detected_lang: str) -> Tuple[str, bool]:
     """
     Translate non-English text to English.
@@ -135,17 +1033,17 @@ def translate_text_if_needed(text: str, detected_lang: str) -> Tuple[str, bool]:
 
     try:
         translator = get_translator(detected_lang)
-        chunks = [text[i:i+4000] for i in range(0, len(text), 4000)]
-        translated_chunks = []
+        pieces = split_for_translation(text, translator.tokenizer)
+        if not pieces:
+            return text, False
 
-        for chunk in chunks:
-            if not chunk.strip():
-                continue
-            result = translator(chunk, max_length=512)
-            translated_chunks.append(result[0]["translation_text"])
+        # all pieces in one pipeline call, batched internally
+        with span("translate", lang=detected_lang, pieces=len(pieces)):
+            results = translator(pieces, max_length=512, batch_size=TRANSLATION_BATCH_SIZE)
+        translated_chunks = [r["translation_text"] for r in results]
 
         return " ".join(translated_chunks), True
 
     except Exception as e:
-        print(f"Translation failed for {detected_lang}: {e}")
-        return text, False
\ No newline at end of file
+        log(f"Translation failed for {detected_lang}: {e}")
+        return text, False
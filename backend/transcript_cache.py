@@ -0,0 +1,150 @@
+# backend/transcript_cache.py
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Default lives next to this module, so the web process, job workers and
+# batch runs share one cache whatever their working directory
+CACHE_PATH = os.getenv("TRANSCRIPT_CACHE_PATH",
+                       os.path.join(os.path.dirname(os.path.abspath(__file__)), "transcript_cache.db"))
+CACHE_MAX_MB = float(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "512"))
+
+
+def hash_file(path: str, block_size: int = 1 << 20) -> str:
+    """
+    SHA-256 of the raw file bytes. Identical uploads hash identically
+    without running ffmpeg, which is what makes a cache hit cheap.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def make_key(audio_hash: str, model_name: str, **options) -> str:
+    """
+    Combine the audio hash with everything that changes Whisper's output
+    (model name and decode options such as beam_size, best_of,
+    temperature, language).
+    """
+    opts = json.dumps(options, sort_keys=True, default=str)
+    return hashlib.sha256(f"{audio_hash}|{model_name}|{opts}".encode("utf-8")).hexdigest()
+
+
+class TranscriptCache:
+    """
+    Persistent SQLite cache of (text, segments, language) with size-bounded
+    LRU eviction. Safe to share between threads; several processes may open
+    the same file (hit/miss counters are kept in the database so they add up
+    across worker processes).
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_mb: float = CACHE_MAX_MB):
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS transcripts (
+                key TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                segments TEXT NOT NULL,
+                language TEXT,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_transcripts_last_access ON transcripts (last_access);
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO counters (name, value) VALUES ('hits', 0), ('misses', 0), ('evictions', 0);
+        """)
+        self._conn.commit()
+
+    def _bump(self, name: str, n: int = 1) -> None:
+        self._conn.execute("UPDATE counters SET value = value + ? WHERE name = ?", (n, name))
+
+    def get(self, key: str) -> Optional[Tuple[str, List[Dict], str]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, segments, language FROM transcripts WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._bump("misses")
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE transcripts SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._bump("hits")
+            self._conn.commit()
+        return row[0], json.loads(row[1]), row[2]
+
+    def put(self, key: str, text: str, segments: List[Dict], language: str) -> None:
+        seg_json = json.dumps(segments, ensure_ascii=False)
+        size = len(text.encode("utf-8")) + len(seg_json.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO transcripts (key, text, segments, language, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, text, seg_json, language, size, now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in self._conn.execute(
+                "SELECT key, size FROM transcripts ORDER BY last_access ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM transcripts WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        self._bump("evictions", evicted)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counters = dict(self._conn.execute("SELECT name, value FROM counters").fetchall())
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transcripts").fetchone()
+        lookups = counters.get("hits", 0) + counters.get("misses", 0)
+        counters.update({
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hit_rate": round(counters.get("hits", 0) / lookups, 4) if lookups else 0.0,
+        })
+        return counters
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM transcripts")
+            self._conn.commit()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_cache() -> TranscriptCache:
+    """
+    Process-wide cache instance (opened on first use).
+    """
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = TranscriptCache()
+        return _default_cache
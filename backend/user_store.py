@@ -0,0 +1,162 @@
+# backend/user_store.py
+import os
+import time
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+# Shared by every backend process, so accounts and sessions survive restarts
+# and need no sticky sessions behind a load balancer
+DB_PATH = os.getenv("MOM_DB_PATH", "mom.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "4"))
+DB_BUSY_TIMEOUT_MS = 5000
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY,
+        username TEXT NOT NULL,
+        password_hash TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        last_login_at REAL
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS ix_users_username ON users (username);
+    CREATE TABLE IF NOT EXISTS sessions (
+        jti TEXT PRIMARY KEY,
+        user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+        created_at REAL NOT NULL,
+        expires_at REAL NOT NULL,
+        revoked INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS ix_sessions_user_id ON sessions (user_id);
+    CREATE INDEX IF NOT EXISTS ix_sessions_expires_at ON sessions (expires_at);
+"""
+
+
+class ConnectionPool:
+    """
+    Fixed-size pool of SQLite connections in WAL mode (readers never wait
+    for the writer). Connections are opened on demand up to `size`; further
+    callers wait for one to be returned.
+    """
+
+    def __init__(self, path: str, size: int = DB_POOL_SIZE):
+        self.path = path
+        self.size = max(1, size)
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=DB_BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                grow = self._opened < self.size
+                if grow:
+                    self._opened += 1
+            if grow:
+                try:
+                    conn = self._open()
+                except Exception:
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+            else:
+                conn = self._idle.get()
+        try:
+            with conn:  # commit on success, roll back on error
+                yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class UserStore:
+    """
+    Accounts (bcrypt hashes only, hashing is the caller's job) and issued
+    JWT sessions, keyed by the token's jti so logout/revocation is visible
+    to every worker.
+    """
+
+    def __init__(self, path: str = DB_PATH, pool_size: int = DB_POOL_SIZE):
+        self.pool = ConnectionPool(path, pool_size)
+        with self.pool.connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def create_user(self, username: str, password_hash: str) -> bool:
+        """
+        False if the username is taken.
+        """
+        try:
+            with self.pool.connection() as conn:
+                conn.execute("INSERT INTO users (username, password_hash, created_at) VALUES (?, ?, ?)",
+                             (username, password_hash, time.time()))
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    def get_user(self, username: str) -> Optional[Dict]:
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT id, username, password_hash, created_at, last_login_at FROM users WHERE username = ?",
+                (username,)).fetchone()
+        return dict(row) if row else None
+
+    def create_session(self, user_id: int, jti: str, expires_at: float) -> None:
+        now = time.time()
+        with self.pool.connection() as conn:
+            conn.execute("INSERT INTO sessions (jti, user_id, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                         (jti, user_id, now, expires_at))
+            conn.execute("UPDATE users SET last_login_at = ? WHERE id = ?", (now, user_id))
+
+    def revoke_session(self, jti: str) -> None:
+        with self.pool.connection() as conn:
+            conn.execute("UPDATE sessions SET revoked = 1 WHERE jti = ?", (jti,))
+
+    def session_active(self, jti: str) -> bool:
+        """
+        True for a known, unrevoked, unexpired session.
+        """
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT revoked, expires_at FROM sessions WHERE jti = ?", (jti,)).fetchone()
+        return bool(row) and not row["revoked"] and row["expires_at"] > time.time()
+
+    def purge_sessions(self) -> int:
+        """
+        Drop expired sessions; returns how many were removed.
+        """
+        with self.pool.connection() as conn:
+            return conn.execute("DELETE FROM sessions WHERE expires_at < ?", (time.time(),)).rowcount
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_user_store() -> UserStore:
+    """
+    Process-wide store (schema created on first use).
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = UserStore()
+        return _store